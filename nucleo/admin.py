@@ -4,12 +4,16 @@ from django.urls import path
 from django.shortcuts import redirect
 
 # [ALUNO 10] Importação do serviço de geração de relatórios
-from weka_adapter.services.report_generator import ReportService
+from weka_adapter.services.fila_pdf import solicitar_renderizacao
+
+from .busca_nome import ids_por_nome
 
 # Importação centralizada dos modelos do projeto
 from .models import (
     Instituicao, PerfilUsuario, Paciente, ImagemExame, 
-    AnaliseImagem, Laudo, HistoricoLaudo, LaudoImpressao, LogAuditoria
+    AnaliseImagem, Laudo, HistoricoLaudo, LaudoImpressao, LogAuditoria,
+    VersaoModelo, CaracteristicasImagem, ReclassificacaoAnalise, RenderizacaoPDF, FilaImpressao,
+    AgregadoDiarioLaudos,
 )
 
 # --- 1. CONFIGURAÇÕES ESPECIAIS (CLASSES ADMIN CUSTOMIZADAS) ---
@@ -36,18 +40,36 @@ class LaudoAdmin(admin.ModelAdmin):
     [ALUNOS 9 e 10] Configuração do Laudo: Layout Dinâmico, Assinatura e Exportação.
     """
     list_display = ('id', 'analise', 'usuario_responsavel', 'data_hora_emissao', 'link_pdf')
+    # __str__ da análise percorre imagem -> paciente; link_pdf consulta os jobs
+    list_select_related = ('analise__imagem__paciente', 'usuario_responsavel__usuario')
     
     # [ALUNO 10] Bloqueia upload manual. O sistema gera o arquivo automaticamente.
     readonly_fields = ('caminho_pdf', 'data_hora_emissao')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('renderizacoes')
+
     # [ALUNO 10] Implementação do Preview do Laudo na Interface
     def link_pdf(self, obj):
+        # Renderização em andamento (fila em segundo plano)
+        job = obj.renderizacoes.first()
+        if job and job.status in RenderizacaoPDF.ATIVOS:
+            return format_html(
+                '<span style="background-color: #6c757d; color: white; padding: 5px 10px; border-radius: 4px;">⏳ {}</span>',
+                job.get_status_display()
+            )
         if obj.caminho_pdf:
             # Botão Verde: Arquivo existe (Visualização/Preview)
             return format_html(
                 '<a class="button" href="{}" target="_blank" style="background-color: #28a745; color: white; padding: 5px 10px; border-radius: 4px; text-decoration: none;">📄 Ver PDF</a>', 
                 obj.caminho_pdf.url
             )
+        if job and job.status == RenderizacaoPDF.FALHOU:
+            # Botão Vermelho: última renderização falhou (permite tentar de novo)
+            return format_html(
+                '<a class="button" href="gerar/{}/" title="{}" style="background-color: #dc3545; color: white; padding: 5px 10px; border-radius: 4px; text-decoration: none;">⚠️ Falhou - Tentar de novo</a>', 
+                obj.id, job.erro
+            )
         # Botão Azul: Arquivo inexistente (Ação de Geração/Exportação)
         return format_html(
             '<a class="button" href="gerar/{}/" style="background-color: #007bff; color: white; padding: 5px 10px; border-radius: 4px; text-decoration: none;">⚙️ Gerar PDF</a>', 
@@ -66,27 +88,87 @@ class LaudoAdmin(admin.ModelAdmin):
 
     def processar_geracao_pdf(self, request, laudo_id):
         """
-        [ALUNO 10] Processa a criação física do arquivo.
+        [ALUNO 10] Solicita a criação física do arquivo.
+        A renderização roda em segundo plano (fila de PDFs); a página volta na hora.
         [INTEGRAÇÃO] Captura Usuário e IP para os requisitos de Auditoria e Assinatura.
         """
         laudo = self.get_object(request, laudo_id)
         
-        # Chama o serviço atualizado com Platypus (Layout Dinâmico)
-        ReportService.gerar_pdf_para_laudo_existente(
-            laudo_obj=laudo, 
+        job, criado = solicitar_renderizacao(
+            laudo, 
             usuario_solicitante=request.user, 
             ip_cliente=request.META.get('REMOTE_ADDR')
         )
         
-        self.message_user(request, f"Sucesso: PDF do Laudo #{laudo_id} foi gerado e assinado digitalmente.")
+        if criado:
+            self.message_user(request, f"PDF do Laudo #{laudo_id} enviado para renderização (job #{job.id}).")
+        else:
+            self.message_user(request, f"O PDF do Laudo #{laudo_id} já está em renderização (job #{job.id}).")
         return redirect('/admin/nucleo/laudo/')
 
 
+class PacienteAdmin(admin.ModelAdmin):
+    """
+    Busca por nome pelo índice cego (nucleo/busca_nome.py): o search_fields
+    padrão faria icontains no texto cifrado e nunca encontraria nada.
+    """
+    list_display = ('nome_completo', 'uuid_paciente', 'data_cadastro')
+    search_fields = ('nome_completo',)
+    search_help_text = "Parte do nome (3 letras ou mais por palavra)"
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = ids_por_nome(search_term)
+        if ids is None:
+            return queryset.none(), False
+        return queryset.filter(id__in=ids), False
+
+
+class RenderizacaoPDFAdmin(admin.ModelAdmin):
+    """Acompanhamento da fila de renderização de PDFs (somente leitura)."""
+    list_display = ('id', 'laudo', 'status', 'usuario_solicitante', 'data_criacao', 'data_conclusao')
+    list_filter = ('status',)
+    readonly_fields = ('laudo', 'status', 'usuario_solicitante', 'ip_origem', 'erro',
+                       'data_criacao', 'data_inicio', 'data_conclusao')
+
+    def has_add_permission(self, request):
+        return False
+
+
+class FilaImpressaoAdmin(admin.ModelAdmin):
+    """Acompanhamento da fila de impressão por local (o spooler grava os lotes)."""
+    list_display = ('id', 'laudo', 'local_impressao', 'status', 'usuario_solicitante', 'data_solicitacao', 'data_impressao')
+    list_filter = ('status', 'local_impressao')
+    readonly_fields = ('laudo', 'usuario_solicitante', 'ip_origem', 'status', 'arquivo_lote', 'erro',
+                       'data_solicitacao', 'data_impressao')
+
+    def has_add_permission(self, request):
+        return False
+
+
+class AgregadoDiarioLaudosAdmin(admin.ModelAdmin):
+    """Agregados do relatório gerencial (mantidos por signals; somente leitura)."""
+    list_display = ('dia', 'instituicao', 'resultado_classificacao', 'total_analises', 'total_laudos')
+    list_filter = ('instituicao', 'resultado_classificacao')
+    date_hierarchy = 'dia'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # --- 2. REGISTRO DOS MODELOS NO SISTEMA ---
 
 # Modelos com inteligência administrativa personalizada
 admin.site.register(LogAuditoria, LogAuditoriaAdmin)
 admin.site.register(Laudo, LaudoAdmin)
+admin.site.register(Paciente, PacienteAdmin)
+admin.site.register(RenderizacaoPDF, RenderizacaoPDFAdmin)
+admin.site.register(FilaImpressao, FilaImpressaoAdmin)
+admin.site.register(AgregadoDiarioLaudos, AgregadoDiarioLaudosAdmin)
 
 # Modelos com registro simples (Interface padrão Django)
 admin.site.register([
@@ -94,9 +176,11 @@ admin.site.register([
     HistoricoLaudo,
     ImagemExame,
     Instituicao,
-    Paciente,
     PerfilUsuario,
-    LaudoImpressao
+    LaudoImpressao,
+    VersaoModelo,
+    CaracteristicasImagem,
+    ReclassificacaoAnalise
 ])
 
 # --- NOTAS DO DESENVOLVIMENTO ---
@@ -0,0 +1,107 @@
+"""
+Manutenção da tabela AgregadoDiarioLaudos (dia x instituição x resultado).
+
+Cada criação/alteração/remoção de AnaliseImagem ou Laudo vira um ajuste
+de +1/-1 nas linhas afetadas (UPDATE com F(), na mesma transação do save):
+o relatório gerencial nunca precisa varrer laudos nem decifrar pacientes.
+
+Alterações feitas por queryset.update()/bulk_create não disparam signals;
+nesses casos rode `reconstruir_agregados_laudos`.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AgregadoDiarioLaudos, AnaliseImagem, Laudo
+
+
+def dia_local(momento):
+    return timezone.localtime(momento).date() if momento else None
+
+
+def chave_analise(analise):
+    """(dia, instituicao_id, resultado) onde a análise é contada."""
+    return (
+        dia_local(analise.data_hora_solicitacao),
+        analise.imagem.instituicao_id,
+        analise.resultado_classificacao,
+    )
+
+
+def chave_laudo(laudo):
+    """(dia, instituicao_id, resultado) onde o laudo é contado."""
+    analise = laudo.analise
+    return (
+        dia_local(laudo.data_hora_emissao),
+        analise.imagem.instituicao_id,
+        analise.resultado_classificacao,
+    )
+
+
+def ajustar(chave, analises=0, laudos=0):
+    """Soma `analises`/`laudos` (podem ser negativos) à linha da chave, criando-a se preciso."""
+    dia, instituicao_id, resultado = chave
+    if dia is None or (not analises and not laudos):
+        return
+    linha = AgregadoDiarioLaudos.objects.filter(
+        dia=dia, instituicao_id=instituicao_id, resultado_classificacao=resultado
+    )
+    incremento = dict(total_analises=F('total_analises') + analises, total_laudos=F('total_laudos') + laudos)
+    if linha.update(**incremento):
+        return
+    try:
+        with transaction.atomic():
+            AgregadoDiarioLaudos.objects.create(
+                dia=dia, instituicao_id=instituicao_id, resultado_classificacao=resultado,
+                total_analises=analises, total_laudos=laudos,
+            )
+    except IntegrityError:
+        # Outra transação criou a linha entre o UPDATE e o INSERT
+        linha.update(**incremento)
+
+
+def mover(anterior, atual, analises=0, laudos=0):
+    """Tira as contagens da chave anterior e põe na atual (se mudou)."""
+    if anterior == atual:
+        return
+    if anterior is not None:
+        ajustar(anterior, -analises, -laudos)
+    ajustar(atual, analises, laudos)
+
+
+def reconstruir(inicio=None, fim=None):
+    """
+    Recalcula os agregados a partir das tabelas de origem (todos os dias,
+    ou só o intervalo [inicio, fim]). Retorna o número de linhas gravadas.
+    """
+    analises = AnaliseImagem.objects.annotate(dia=TruncDate('data_hora_solicitacao'))
+    laudos = Laudo.objects.annotate(dia=TruncDate('data_hora_emissao'))
+    linhas = AgregadoDiarioLaudos.objects.all()
+    if inicio:
+        analises, laudos, linhas = analises.filter(dia__gte=inicio), laudos.filter(dia__gte=inicio), linhas.filter(dia__gte=inicio)
+    if fim:
+        analises, laudos, linhas = analises.filter(dia__lte=fim), laudos.filter(dia__lte=fim), linhas.filter(dia__lte=fim)
+
+    contagens = {}
+    for r in analises.values('dia', 'imagem__instituicao_id', 'resultado_classificacao').annotate(n=Count('id')):
+        chave = (r['dia'], r['imagem__instituicao_id'], r['resultado_classificacao'])
+        contagens.setdefault(chave, [0, 0])[0] = r['n']
+    for r in laudos.values('dia', 'analise__imagem__instituicao_id', 'analise__resultado_classificacao').annotate(n=Count('id')):
+        chave = (r['dia'], r['analise__imagem__instituicao_id'], r['analise__resultado_classificacao'])
+        contagens.setdefault(chave, [0, 0])[1] = r['n']
+
+    with transaction.atomic():
+        linhas.delete()
+        AgregadoDiarioLaudos.objects.bulk_create(
+            [
+                AgregadoDiarioLaudos(
+                    dia=dia, instituicao_id=instituicao_id, resultado_classificacao=resultado,
+                    total_analises=n_analises, total_laudos=n_laudos,
+                )
+                for (dia, instituicao_id, resultado), (n_analises, n_laudos) in contagens.items()
+            ],
+            batch_size=500,
+        )
+    return len(contagens)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class NucleoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'nucleo'
+
+    def ready(self):
+        # Agregados diários, versões de coleção e cache de respostas (nucleo/signals.py)
+        from . import signals  # noqa: F401
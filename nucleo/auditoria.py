@@ -1,15 +1,285 @@
+"""
+Auditoria (RDC 330) com escrita tardia (write-behind).
+
+    audit_log(request, 'UPLOAD_IMAGEM', 'ImagemExame', "imagem_id=7")
+    registrar('LAUDO_IMPRESSO', 'PDF Laudo', detalhe, usuario=..., ip_origem=...)
+
+Nenhum INSERT no caminho da requisição: o evento é acrescentado (com
+fsync) a um diário local só de acréscimo, um arquivo NDJSON por processo,
+e uma thread em segundo plano grava os eventos em LogAuditoria com
+bulk_create, em lotes (a cada AUDITORIA_INTERVALO segundos ou quando o
+segmento chega a AUDITORIA_LOTE eventos).
+
+Ciclo de um segmento do diário (AUDITORIA_DIARIO_DIR):
+
+    <host>-<pid>-<token>-<n>.aberto    recebendo eventos (só o processo dono escreve)
+    ....pronto                          selado pelo dono, aguardando gravação
+    ....gravando                        reivindicado (rename atômico) por quem vai gravar
+    (apagado)                           depois do commit do bulk_create
+
+Sem perda em queda do processo: segmentos selados são gravados por
+qualquer processo; segmentos abertos ou em gravação parados há mais de
+AUDITORIA_SEGMENTO_ORFAO segundos são de um processo que morreu e também
+são regravados (replay), no início do próximo processo ou pelo comando
+`descarregar_auditoria`. Cada evento leva um id (LogAuditoria.id_evento,
+único): regravar um segmento não duplica linhas.
+
+Só com AUDITORIA_ESCRITA_TARDIA=True (variável de ambiente de mesmo nome
+= 1, em produção); sem ela, inclusive nos testes com qualquer runner, o
+evento é gravado na hora, como antes.
+"""
+
+import atexit
+import json
 import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import LogAuditoria
 
 logger = logging.getLogger(__name__)
 
-def audit_log(usuario, acao, detalhes=None):
-    """
-    Registra ações do sistema para auditoria e conformidade (RDC 330).
-    """
-    mensagem = f"AUDITORIA - Usuário: {usuario} | Ação: {acao} | Detalhes: {detalhes}"
-    
-    # Imprime no terminal do servidor
-    print(mensagem)
-    
-    # Opcional: Salvar em arquivo de log ou banco de dados
-    logger.info(mensagem)
\ No newline at end of file
+_lock = threading.Lock()
+_acordar = threading.Event()
+_estado = {}
+
+
+def _config(nome, padrao):
+    return getattr(settings, f'AUDITORIA_{nome}', padrao)
+
+
+def _reiniciar_estado():
+    """Estado do processo atual (também depois de um fork: o filho não herda o segmento do pai)."""
+    _estado.clear()
+    _estado.update({
+        'pid': os.getpid(),
+        'prefixo': f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}",
+        'sequencia': 0,
+        'arquivo': None,
+        'caminho': None,
+        'linhas': [],
+        'flusher': None,
+    })
+
+
+# ============================================
+# REGISTRO
+# ============================================
+def registrar(acao, recurso=None, detalhe=None, usuario=None, ip_origem=None):
+    """Registra um evento de auditoria (no diário ou, sem escrita tardia, direto no banco)."""
+    usuario_id = usuario.pk if usuario is not None and usuario.is_authenticated else None
+    ip_origem = ip_origem or "0.0.0.0"
+
+    if not _config('ESCRITA_TARDIA', False):
+        LogAuditoria.objects.create(
+            usuario_id=usuario_id, acao=acao, recurso=recurso, detalhe=detalhe, ip_origem=ip_origem,
+        )
+        return
+
+    evento = {
+        "id": uuid.uuid4().hex,
+        "data_hora": timezone.now().isoformat(),
+        "usuario_id": usuario_id,
+        "acao": acao,
+        "recurso": recurso,
+        "detalhe": detalhe,
+        "ip_origem": ip_origem,
+    }
+    linha = json.dumps(evento, ensure_ascii=False).encode('utf-8') + b"\n"
+
+    with _lock:
+        if _estado.get('pid') != os.getpid():
+            _reiniciar_estado()
+        if _estado['flusher'] is None:
+            _estado['flusher'] = _iniciar_flusher()
+        if _estado['arquivo'] is None:
+            _abrir_segmento()
+
+        arquivo = _estado['arquivo']
+        arquivo.write(linha)
+        arquivo.flush()
+        if _config('FSYNC', True):
+            os.fsync(arquivo.fileno())
+        _estado['linhas'].append(linha)
+        cheio = len(_estado['linhas']) >= _config('LOTE', 500)
+
+    if cheio:
+        _acordar.set()
+
+
+def audit_log(request, acao, recurso, detalhe=None):
+    """Atalho para as views: usuário e IP vêm da requisição."""
+    registrar(acao, recurso, detalhe, usuario=getattr(request, 'user', None),
+              ip_origem=request.META.get('REMOTE_ADDR'))
+
+
+# ============================================
+# DIÁRIO
+# ============================================
+def _diretorio():
+    diretorio = str(_config('DIARIO_DIR', 'auditoria_diario'))
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+
+def _abrir_segmento():
+    _estado['sequencia'] += 1
+    nome = f"{_estado['prefixo']}-{_estado['sequencia']:06d}"
+    _estado['caminho'] = os.path.join(_diretorio(), nome)
+    _estado['arquivo'] = open(_estado['caminho'] + '.aberto', 'ab')
+    _estado['linhas'] = []
+
+
+def _selar():
+    """Fecha o segmento aberto deste processo e o marca como pronto para gravação."""
+    with _lock:
+        if _estado.get('pid') != os.getpid() or _estado['arquivo'] is None:
+            return
+        arquivo, caminho, linhas = _estado['arquivo'], _estado['caminho'], _estado['linhas']
+        _estado['arquivo'] = None
+        _estado['linhas'] = []
+        arquivo.close()
+        try:
+            os.rename(caminho + '.aberto', caminho + '.pronto')
+        except FileNotFoundError:
+            # Tomado como órfão por outro processo (flusher parado por muito
+            # tempo): regrava o segmento inteiro, o id evita duplicar
+            with open(caminho + '.tmp', 'wb') as copia:
+                copia.writelines(linhas)
+                copia.flush()
+                os.fsync(copia.fileno())
+            os.rename(caminho + '.tmp', caminho + '.pronto')
+
+
+def _pendentes():
+    """Segmentos a gravar: prontos, e abertos/em gravação abandonados por processos mortos."""
+    diretorio = _diretorio()
+    limite = time.time() - _config('SEGMENTO_ORFAO', 120)
+    proprio = _estado.get('prefixo') if _estado.get('pid') == os.getpid() else None
+    segmentos = []
+    for nome in sorted(os.listdir(diretorio)):
+        base, extensao = os.path.splitext(nome)
+        caminho = os.path.join(diretorio, nome)
+        if extensao == '.pronto':
+            segmentos.append(caminho)
+        elif extensao in ('.aberto', '.gravando') and not (proprio and base.startswith(proprio)):
+            try:
+                orfao = os.path.getmtime(caminho) < limite
+            except FileNotFoundError:
+                continue
+            if orfao:
+                segmentos.append(caminho)
+    return segmentos
+
+
+def _ler_eventos(caminho):
+    eventos = []
+    with open(caminho, 'rb') as arquivo:
+        for numero, linha in enumerate(arquivo, start=1):
+            try:
+                eventos.append(json.loads(linha))
+            except ValueError:
+                # Linha truncada por queda no meio da escrita: o registrar() não chegou a retornar
+                logger.warning("Auditoria: linha %s ilegível em %s (ignorada).", numero, caminho)
+    return eventos
+
+
+def _inserir(eventos):
+    usuarios = {e['usuario_id'] for e in eventos if e['usuario_id'] is not None}
+    # Usuário removido depois do evento: mesmo efeito do SET_NULL
+    existentes = set(User.objects.filter(id__in=usuarios).values_list('id', flat=True)) if usuarios else set()
+    registros = [
+        LogAuditoria(
+            id_evento=uuid.UUID(e['id']),
+            data_hora=parse_datetime(e['data_hora']),
+            usuario_id=e['usuario_id'] if e['usuario_id'] in existentes else None,
+            acao=e['acao'],
+            recurso=e['recurso'],
+            detalhe=e['detalhe'],
+            ip_origem=e['ip_origem'],
+        )
+        for e in eventos
+    ]
+    with transaction.atomic():
+        LogAuditoria.objects.bulk_create(registros, batch_size=_config('LOTE', 500), ignore_conflicts=True)
+
+
+def _gravar_segmento(caminho):
+    base, extensao = os.path.splitext(caminho)
+    gravando = base + '.gravando'
+    try:
+        if extensao == '.gravando':
+            # Processo que morreu gravando: volta para a fila antes de reivindicar
+            os.rename(caminho, base + '.pronto')
+            caminho = base + '.pronto'
+        os.rename(caminho, gravando)  # reivindica: só um processo consegue
+        os.utime(gravando)  # renova o prazo de órfão enquanto grava
+        eventos = _ler_eventos(gravando)
+    except FileNotFoundError:
+        return 0
+
+    try:
+        if eventos:
+            _inserir(eventos)
+    except Exception:
+        os.rename(gravando, base + '.pronto')  # tenta de novo no próximo ciclo
+        raise
+    try:
+        os.remove(gravando)
+    except FileNotFoundError:
+        pass
+    return len(eventos)
+
+
+def descarregar():
+    """Sela o segmento deste processo e grava tudo que estiver pendente. Retorna o nº de eventos."""
+    _selar()
+    total = 0
+    for caminho in _pendentes():
+        # Um segmento que falha (volta a .pronto) não pode travar os seguintes
+        try:
+            total += _gravar_segmento(caminho)
+        except Exception:
+            logger.exception("Auditoria: falha ao gravar %s (nova tentativa no próximo ciclo).", caminho)
+    return total
+
+
+# ============================================
+# FLUSHER EM SEGUNDO PLANO
+# ============================================
+def _laco():
+    while True:
+        # Primeiro ciclo logo ao iniciar: replay do que ficou de processos anteriores
+        try:
+            descarregar()
+        except Exception:
+            logger.exception("Auditoria: falha ao ler o diário (nova tentativa no próximo ciclo).")
+        finally:
+            close_old_connections()
+        _acordar.wait(_config('INTERVALO', 1.0))
+        _acordar.clear()
+
+
+def _iniciar_flusher():
+    flusher = threading.Thread(target=_laco, name="auditoria-flusher", daemon=True)
+    flusher.start()
+    return flusher
+
+
+@atexit.register
+def _ao_sair():
+    # Melhor esforço no desligamento normal; o que não for gravado aqui fica no diário
+    if _estado.get('pid') == os.getpid() and _estado.get('flusher') is not None:
+        try:
+            descarregar()
+        except Exception:
+            logger.exception("Auditoria: diário não descarregado no desligamento.")
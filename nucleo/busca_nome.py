@@ -0,0 +1,121 @@
+"""
+Busca de pacientes por parte do nome sem decifrar a tabela.
+
+O nome é cifrado com nonce aleatório (EncryptedCharField), então nem
+`icontains` nem o search_fields do admin funcionam sem ler e decifrar todas
+as linhas. Em vez disso, cada paciente tem tokens em TokenNomePaciente:
+
+    "José da Silva" -> palavras normalizadas (sem acento, minúsculas, sem
+    "da/de/do/dos/das/e") -> prefixos de 3 até 20 letras de cada palavra
+    -> HMAC de cada prefixo (blind_index, chave derivada de AES_KEY)
+
+A busca "jos silv" vira um token por termo; o SQL devolve os pacientes que
+têm TODOS os tokens (GROUP BY ... HAVING COUNT = n). Só esses são lidos e
+decifrados, e o nome decifrado é conferido de novo (termos com mais de
+20 letras e colisões de HMAC).
+
+O índice revela quantos pacientes compartilham um prefixo, nunca o texto.
+Se AES_KEY mudar, rode `reindexar_nomes_pacientes`.
+"""
+
+import re
+import unicodedata
+
+from django.db.models import Count
+
+from .models import Paciente, TokenNomePaciente
+from .seguranca.crypto_utils import blind_index
+
+TAMANHO_MINIMO = 3
+TAMANHO_MAXIMO = 20
+PARTICULAS = {'da', 'de', 'do', 'das', 'dos', 'e'}
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos ("Conceição" -> "conceicao")."""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def palavras(texto):
+    return [p for p in re.findall(r'[a-z0-9]+', normalizar(texto)) if p not in PARTICULAS]
+
+
+def _token(prefixo):
+    # Prefixo de domínio: o mesmo texto não gera o mesmo HMAC do índice do CPF
+    return blind_index(f"nome:{prefixo}")
+
+
+def tokens_nome(nome):
+    """Tokens de todos os prefixos (3..20 letras) de cada palavra do nome."""
+    tokens = set()
+    for palavra in palavras(nome):
+        for tamanho in range(TAMANHO_MINIMO, min(len(palavra), TAMANHO_MAXIMO) + 1):
+            tokens.add(_token(palavra[:tamanho]))
+    return tokens
+
+
+def termos_busca(texto):
+    """Palavras da busca que podem ser procuradas (3 letras ou mais)."""
+    return [p for p in palavras(texto) if len(p) >= TAMANHO_MINIMO]
+
+
+# ============================================
+# MANUTENÇÃO DO ÍNDICE
+# ============================================
+def indexar(paciente):
+    """Recria os tokens de um paciente salvo."""
+    TokenNomePaciente.objects.filter(paciente=paciente).delete()
+    indexar_lote([paciente])
+
+
+def indexar_lote(pacientes):
+    """Cria os tokens de pacientes recém-inseridos (ex.: após bulk_create)."""
+    TokenNomePaciente.objects.bulk_create(
+        [TokenNomePaciente(paciente_id=p.pk, token=t) for p in pacientes for t in tokens_nome(p.nome_completo)],
+        batch_size=1000,
+    )
+
+
+# ============================================
+# BUSCA
+# ============================================
+def ids_por_nome(texto):
+    """
+    Subconsulta com os ids de pacientes que têm todos os termos como
+    prefixo de alguma palavra do nome. None se não há termo pesquisável.
+    """
+    termos = {_token(t[:TAMANHO_MAXIMO]) for t in termos_busca(texto)}
+    if not termos:
+        return None
+    return (
+        TokenNomePaciente.objects.filter(token__in=termos)
+        .values('paciente_id')
+        .annotate(encontrados=Count('token', distinct=True))
+        .filter(encontrados=len(termos))
+        .values('paciente_id')
+    )
+
+
+def confere(nome, texto):
+    """Confirma, no nome já decifrado, que cada termo é prefixo de uma palavra."""
+    palavras_nome = palavras(nome)
+    return all(any(p.startswith(t) for p in palavras_nome) for t in termos_busca(texto))
+
+
+def buscar(texto, limite=20):
+    """Pacientes (decifrados) cujo nome casa com a busca, mais recentes primeiro."""
+    ids = ids_por_nome(texto)
+    if ids is None:
+        return []
+    candidatos = Paciente.objects.filter(id__in=ids).order_by('-data_cadastro', '-id')
+    # Candidatos descartados na conferência (termo > 20 letras, colisão) não
+    # podem encurtar o resultado: lê o próximo lote até completar o limite
+    encontrados, inicio = [], 0
+    while len(encontrados) < limite:
+        lote = list(candidatos[inicio:inicio + limite])
+        encontrados += [p for p in lote if confere(p.nome_completo, texto)]
+        if len(lote) < limite:
+            break
+        inicio += limite
+    return encontrados[:limite]
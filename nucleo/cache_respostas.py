@@ -0,0 +1,177 @@
+"""
+Cache de leitura (read-through) para respostas de views pouco alteradas.
+
+    dados, acerto = obter_ou_calcular(request, 'historico_laudos',
+                                      tags=['laudos', 'pacientes'], calcular=montar_pagina)
+
+A chave junta o nome da view, o escopo (usuário ou global), host, caminho,
+parâmetros da query e a *geração* de cada tag. Invalidar uma tag
+(`invalidar('laudos')`) só incrementa a geração dela: todas as entradas
+que dependiam da tag deixam de ser encontradas, sem varrer o cache. As
+entradas antigas expiram pelo TTL.
+
+As gerações são incrementadas pelos signals (nucleo/signals.py,
+simulador/signals.py) no save/delete e de novo no commit. Assim, uma
+leitura concorrente que guardou a versão antiga antes do commit não
+sobrevive.
+
+A invalidação por tag só alcança quem lê o mesmo backend: com cache local
+por processo (LocMemCache, o padrão), os outros workers não veem o
+incremento. Por isso, nesse backend, entradas só com tags não são
+guardadas, a não ser com CACHE_RESPOSTAS_PROCESSO_UNICO=True (runserver).
+Entradas com `versao` (ex.: Paciente.versao, lida do banco a cada
+requisição) valem só para aquela versão e dispensam invalidação: são
+seguras em qualquer backend.
+
+Conteúdo com dados de paciente é guardado cifrado (AES-GCM, mesma chave dos
+campos do banco): quem lê o backend de cache (Redis/Memcached) não vê o
+texto claro. Acertos e faltas por view ficam em contadores no próprio cache
+(`estatisticas()`; comando `estatisticas_cache_respostas`).
+
+Configuração: CACHE_RESPOSTAS_ATIVO (padrão True), CACHE_RESPOSTAS_TTL (s),
+CACHE_RESPOSTAS_PROCESSO_UNICO (padrão False).
+"""
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from .seguranca.crypto_utils import decrypt_value, encrypt_value
+
+_PREFIXO = "cache_respostas"
+_CHAVE_NOMES = f"{_PREFIXO}:nomes"
+_nomes_registrados = set()
+
+
+def _ativo():
+    return getattr(settings, 'CACHE_RESPOSTAS_ATIVO', True)
+
+
+def _invalidacao_alcanca_todos():
+    """A invalidação por tag vale para todos os processos do servidor?"""
+    if getattr(settings, 'CACHE_RESPOSTAS_PROCESSO_UNICO', False):
+        return True
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+# ============================================
+# GERAÇÕES DAS TAGS
+# ============================================
+def _chave_geracao(tag):
+    return f"{_PREFIXO}:geracao:{tag}"
+
+
+def _geracoes(tags):
+    chaves = [_chave_geracao(tag) for tag in tags]
+    atuais = cache.get_many(chaves)
+    for chave in chaves:
+        if chave not in atuais:
+            # Começa num valor novo (e não em 0): se a geração foi descartada
+            # pelo cache, entradas antigas não voltam a ser encontradas
+            cache.add(chave, time.time_ns(), timeout=None)
+            atuais[chave] = cache.get(chave)
+    return [atuais[chave] for chave in chaves]
+
+
+def _incrementar(tags):
+    for tag in tags:
+        try:
+            cache.incr(_chave_geracao(tag))
+        except ValueError:
+            cache.set(_chave_geracao(tag), time.time_ns(), timeout=None)
+
+
+def invalidar(*tags):
+    """Invalida as entradas que dependem das tags (agora e no commit da transação)."""
+    if not tags:
+        return
+    _incrementar(tags)
+    transaction.on_commit(lambda: _incrementar(tags))
+
+
+# ============================================
+# ESTATÍSTICAS
+# ============================================
+def _contar(nome, campo):
+    if nome not in _nomes_registrados:
+        nomes = cache.get(_CHAVE_NOMES) or set()
+        if nome not in nomes:
+            cache.set(_CHAVE_NOMES, nomes | {nome}, timeout=None)
+        _nomes_registrados.add(nome)
+    chave = f"{_PREFIXO}:estat:{nome}:{campo}"
+    if not cache.add(chave, 1, timeout=None):
+        try:
+            cache.incr(chave)
+        except ValueError:
+            cache.set(chave, 1, timeout=None)
+
+
+def estatisticas():
+    """{nome: {"acertos": n, "faltas": n, "taxa_acerto": 0..1}} das views com cache."""
+    resultado = {}
+    for nome in sorted(cache.get(_CHAVE_NOMES) or ()):
+        acertos = cache.get(f"{_PREFIXO}:estat:{nome}:acertos", 0)
+        faltas = cache.get(f"{_PREFIXO}:estat:{nome}:faltas", 0)
+        total = acertos + faltas
+        resultado[nome] = {
+            "acertos": acertos,
+            "faltas": faltas,
+            "taxa_acerto": round(acertos / total, 3) if total else None,
+        }
+    return resultado
+
+
+def zerar_estatisticas():
+    nomes = cache.get(_CHAVE_NOMES) or ()
+    cache.delete_many([f"{_PREFIXO}:estat:{nome}:{campo}" for nome in nomes for campo in ("acertos", "faltas")])
+
+
+# ============================================
+# LEITURA / GRAVAÇÃO
+# ============================================
+def _chave(request, nome, tags, por_usuario, versao):
+    escopo = f"u{request.user.pk}" if por_usuario else "global"
+    parametros = sorted(request.GET.lists())
+    partes = [nome, escopo, request.get_host(), request.path, repr(parametros),
+              repr(list(zip(tags, _geracoes(tags)))), repr(versao)]
+    resumo = hashlib.sha256("\x1f".join(partes).encode()).hexdigest()
+    return f"{_PREFIXO}:{nome}:{resumo}"
+
+
+def obter_ou_calcular(request, nome, tags, calcular, por_usuario=True, cifrar=True, ttl=None, versao=None):
+    """
+    Devolve (dados, acerto). `calcular()` monta os dados (serializáveis em
+    JSON) quando não há entrada válida; exceções (ex.: Http404) não são
+    guardadas. Com `cifrar`, o conteúdo vai cifrado para o cache.
+    `versao`: versão atual do recurso no banco; entra na chave.
+    """
+    if not _ativo() or (versao is None and not _invalidacao_alcanca_todos()):
+        return calcular(), False
+
+    chave = _chave(request, nome, list(tags), por_usuario, versao)
+    guardado = cache.get(chave)
+    if guardado is not None:
+        _contar(nome, "acertos")
+        texto = decrypt_value(guardado) if cifrar else guardado
+        return json.loads(texto), True
+
+    _contar(nome, "faltas")
+    dados = calcular()
+    # Mesmo encoder do JSONRenderer: a resposta de um acerto é idêntica à original
+    texto = json.dumps(dados, cls=JSONEncoder, ensure_ascii=False)
+    ttl = ttl if ttl is not None else getattr(settings, 'CACHE_RESPOSTAS_TTL', 300)
+    cache.set(chave, encrypt_value(texto) if cifrar else texto, timeout=ttl)
+    return json.loads(texto), False
+
+
+def marcar(resposta, acerto):
+    """Cabeçalho X-Cache: HIT/MISS (diagnóstico)."""
+    resposta['X-Cache'] = 'HIT' if acerto else 'MISS'
+    return resposta
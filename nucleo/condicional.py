@@ -0,0 +1,52 @@
+"""
+Requisições condicionais (ETag / Last-Modified / 304).
+
+As views calculam um validador barato (versão do registro ou da coleção)
+e chamam `nao_modificado` ANTES de carregar/decifrar qualquer linha: se o
+cliente já tem aquela versão, a resposta é um 304 sem corpo.
+"""
+
+from django.http import HttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+
+def etag_confere(cabecalho, etag):
+    """If-None-Match: aceita lista de ETags, '*' e validadores fracos (comparação fraca)."""
+    if not cabecalho:
+        return False
+    candidatos = [c.strip() for c in cabecalho.split(',')]
+    return '*' in candidatos or any(c.removeprefix('W/') == etag for c in candidatos)
+
+
+def if_range_confere(cabecalho, etag):
+    """
+    If-Range (RFC 9110, 13.1.5): um único validador, comparação forte.
+    ETag fraca, '*', lista ou data não confirmam: a resposta vem inteira (200).
+    """
+    cabecalho = (cabecalho or '').strip()
+    return cabecalho.startswith('"') and not etag.startswith('W/') and cabecalho == etag
+
+
+def nao_modificado(request, etag, ultima_modificacao=None):
+    """
+    True se o cliente já tem esta versão. If-None-Match tem precedência;
+    If-Modified-Since só é considerado sem ele (RFC 9110).
+    `ultima_modificacao` é um datetime (ou None).
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return etag_confere(if_none_match, etag)
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE') or '')
+    return bool(if_modified_since and ultima_modificacao
+                and int(ultima_modificacao.timestamp()) <= if_modified_since)
+
+
+def aplicar_validadores(resposta, etag, ultima_modificacao=None):
+    resposta['ETag'] = etag
+    if ultima_modificacao:
+        resposta['Last-Modified'] = http_date(ultima_modificacao.timestamp())
+    return resposta
+
+
+def resposta_304(etag, ultima_modificacao=None):
+    return aplicar_validadores(HttpResponse(status=304), etag, ultima_modificacao)
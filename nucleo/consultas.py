@@ -0,0 +1,54 @@
+"""
+Contagem de consultas SQL por requisição (ou por bloco de código).
+
+`registrar_consultas()` instala um execute_wrapper na conexão e anota
+quantas consultas rodaram, o tempo total no banco e quais comandos se
+repetiram (o sinal típico de N+1: o mesmo SELECT com parâmetros
+diferentes, uma vez por linha).
+
+Usado pelo MedicaoConsultasMiddleware (cabeçalhos X-Consultas*) e pelo
+helper de orçamento de consultas dos testes (tests/orcamento_consultas.py).
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class RegistroConsultas:
+    """Callable para connection.execute_wrapper."""
+
+    def __init__(self):
+        self.total = 0
+        self.tempo = 0.0
+        self.comandos = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo += time.perf_counter() - inicio
+            self.total += 1
+            self.comandos[sql] += 1
+
+    @property
+    def repetidas(self):
+        """Execuções além da primeira de cada comando (mesmo SQL, parâmetros quaisquer)."""
+        return sum(n - 1 for n in self.comandos.values() if n > 1)
+
+    def mais_repetidas(self, limite=3):
+        return [(sql, n) for sql, n in self.comandos.most_common(limite) if n > 1]
+
+    def resumo(self, limite=10):
+        """Texto com os comandos mais executados (para logs e mensagens de teste)."""
+        return "\n".join(f"  {n}x {sql[:300]}" for sql, n in self.comandos.most_common(limite))
+
+
+@contextmanager
+def registrar_consultas(using=DEFAULT_DB_ALIAS):
+    registro = RegistroConsultas()
+    with connections[using].execute_wrapper(registro):
+        yield registro
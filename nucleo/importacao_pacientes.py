@@ -0,0 +1,197 @@
+"""
+Importação em lote de pacientes (CSV / NDJSON).
+
+Usado pela rota `pacientes/importar/` e pelo comando `importar_pacientes`.
+Cada linha é validada (nome obrigatório, CPF com dígitos verificadores) e
+normalizada; as válidas são gravadas com bulk_create em lotes, cada lote
+na sua transação. Duplicados são detectados pelo índice cego do CPF
+(Paciente.cpf_indice): dentro do próprio arquivo e contra o banco, com uma
+consulta por lote e sem decifrar nenhum paciente.
+
+O resultado traz, por linha, o que foi rejeitado e por quê.
+
+Campos aceitos: nome_completo, cpf, data_nascimento, sintomas,
+possivel_diagnostico (outros são ignorados).
+"""
+
+import csv
+import io
+import json
+import os
+
+from django.db import IntegrityError, transaction
+
+from .busca_nome import indexar_lote
+from .models import ContadorVersao, Paciente, formatar_cpf
+from .seguranca.crypto_utils import blind_index
+
+CAMPOS = ('nome_completo', 'cpf', 'data_nascimento', 'sintomas', 'possivel_diagnostico')
+FORMATOS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+TAMANHO_LOTE = 500
+
+
+class ResultadoImportacao:
+    def __init__(self):
+        self.criados = 0
+        self.duplicados = []  # [{"linha": n, "motivo": ...}]
+        self.erros = []       # [{"linha": n, "erro": ...}]
+
+    def duplicado(self, linha, motivo):
+        self.duplicados.append({"linha": linha, "motivo": motivo})
+
+    def erro(self, linha, mensagem):
+        self.erros.append({"linha": linha, "erro": mensagem})
+
+    def como_dict(self):
+        return {
+            "criados": self.criados,
+            "duplicados": self.duplicados,
+            "erros": self.erros,
+        }
+
+
+# ============================================
+# LEITURA
+# ============================================
+def formato_do_arquivo(nome, formato=None):
+    """'csv' ou 'ndjson', pelo parâmetro explícito ou pela extensão do arquivo."""
+    if formato:
+        formato = formato.lower()
+        if formato not in ('csv', 'ndjson'):
+            raise ValueError("Formato deve ser 'csv' ou 'ndjson'.")
+        return formato
+    extensao = os.path.splitext(nome or '')[1].lower()
+    if extensao not in FORMATOS:
+        raise ValueError("Não foi possível deduzir o formato: use arquivo .csv/.ndjson ou informe 'formato'.")
+    return FORMATOS[extensao]
+
+
+def ler_registros(arquivo, formato):
+    """
+    Gera (linha, registro, erro) a partir de um arquivo binário, sem
+    carregá-lo inteiro. `erro` é preenchido quando a linha não pôde ser lida.
+    """
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    if formato == 'csv':
+        leitor = csv.DictReader(texto)
+        for registro in leitor:
+            yield leitor.line_num, registro, None
+        return
+
+    for linha, conteudo in enumerate(texto, start=1):
+        if not conteudo.strip():
+            continue
+        try:
+            registro = json.loads(conteudo)
+        except ValueError:
+            yield linha, None, "JSON inválido."
+            continue
+        if not isinstance(registro, dict):
+            yield linha, None, "Cada linha deve ser um objeto JSON."
+            continue
+        yield linha, registro, None
+
+
+# ============================================
+# VALIDAÇÃO
+# ============================================
+def cpf_valido(digitos):
+    """11 dígitos, não todos iguais, com os dois dígitos verificadores corretos."""
+    if len(digitos) != 11 or len(set(digitos)) == 1:
+        return False
+    for posicao in (9, 10):
+        soma = sum(int(d) * peso for d, peso in zip(digitos[:posicao], range(posicao + 1, 1, -1)))
+        if (soma * 10) % 11 % 10 != int(digitos[posicao]):
+            return False
+    return True
+
+
+def _texto(registro, campo):
+    valor = registro.get(campo)
+    if valor is None:
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+
+def preparar_paciente(registro):
+    """Devolve (Paciente não salvo, None) ou (None, mensagem de erro)."""
+    dados = {campo: _texto(registro, campo) for campo in CAMPOS}
+    if not dados['nome_completo']:
+        return None, "O campo 'nome_completo' é obrigatório."
+
+    paciente = Paciente(**dados)
+    if dados['cpf']:
+        paciente.cpf, digitos = formatar_cpf(dados['cpf'])
+        if not cpf_valido(digitos):
+            return None, "CPF inválido."
+        paciente.cpf_indice = blind_index(digitos)
+    return paciente, None
+
+
+# ============================================
+# GRAVAÇÃO
+# ============================================
+def _gravar_lote(lote, resultado):
+    indices = [p.cpf_indice for _, p in lote if p.cpf_indice]
+    existentes = set(Paciente.objects.filter(cpf_indice__in=indices).values_list('cpf_indice', flat=True))
+
+    novos = []
+    for linha, paciente in lote:
+        if paciente.cpf_indice in existentes:
+            resultado.duplicado(linha, "CPF já cadastrado.")
+        else:
+            novos.append((linha, paciente))
+
+    try:
+        with transaction.atomic():
+            criados = Paciente.objects.bulk_create([p for _, p in novos])
+            indexar_lote(criados)
+        resultado.criados += len(novos)
+    except IntegrityError:
+        # Outro cadastro entrou entre a consulta e o insert: um a um, para apontar a linha
+        for linha, paciente in novos:
+            try:
+                with transaction.atomic():
+                    indexar_lote(Paciente.objects.bulk_create([paciente]))
+                resultado.criados += 1
+            except IntegrityError:
+                resultado.duplicado(linha, "CPF já cadastrado.")
+
+
+def importar_pacientes(registros, tamanho_lote=TAMANHO_LOTE):
+    """
+    `registros`: iterável de (linha, dict, erro), como o de ler_registros.
+    Devolve um ResultadoImportacao.
+    """
+    resultado = ResultadoImportacao()
+    vistos = set()
+    lote = []
+
+    for linha, registro, erro in registros:
+        if erro:
+            resultado.erro(linha, erro)
+            continue
+        paciente, erro = preparar_paciente(registro)
+        if erro:
+            resultado.erro(linha, erro)
+            continue
+        if paciente.cpf_indice:
+            if paciente.cpf_indice in vistos:
+                resultado.duplicado(linha, "CPF repetido no arquivo.")
+                continue
+            vistos.add(paciente.cpf_indice)
+
+        lote.append((linha, paciente))
+        if len(lote) >= tamanho_lote:
+            _gravar_lote(lote, resultado)
+            lote = []
+
+    if lote:
+        _gravar_lote(lote, resultado)
+
+    # bulk_create não dispara signals: o índice do nome é criado em _gravar_lote
+    # e a versão da listagem (ETag) sobe aqui
+    if resultado.criados:
+        ContadorVersao.incrementar('pacientes')
+    return resultado
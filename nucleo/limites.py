@@ -0,0 +1,203 @@
+"""
+Controle de admissão para os endpoints pesados (upload com classificação,
+PDF de laudos, lote de simulações).
+
+1. Baldes de tokens (LIMITES_TAXA): cada escopo tem um balde por usuário
+   (ou IP, se anônimo) e um por instituição. Uma rajada de um cliente
+   esvazia o balde dele, não o dos outros; acima do limite, 429 com
+   Retry-After.
+
+       class MinhaView(APIView):
+           throttle_classes = [UploadImagemThrottle]
+
+2. Vagas de processamento (PROCESSAMENTO_SIMULTANEO): no máximo N trabalhos
+   pesados de CPU ao mesmo tempo no servidor inteiro. Sem vaga, 503 com
+   Retry-After na hora, em vez de empilhar requisições até estourar o
+   tempo limite de todas.
+
+       with vaga_processamento():
+           ...
+
+Os dois ficam no banco (BaldeTokens, VagaProcessamento), único
+armazenamento compartilhado por todos os processos do servidor (o cache
+padrão é local de cada processo). Cada decisão é um UPDATE condicional,
+atômico mesmo com vários workers disputando a mesma linha.
+
+O balde usa GCRA: guarda só o "horário teórico de chegada" (tat). Com
+taxa n/período, cada requisição empurra tat em período/n, e é aceita
+enquanto tat não passa de agora + (n - 1) * período/n.
+"""
+
+import math
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Greatest
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.throttling import BaseThrottle
+
+from .models import BaldeTokens, PerfilUsuario, VagaProcessamento
+
+_PERIODOS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class ServicoSobrecarregado(APIException):
+    """503 com Retry-After (o exception handler do DRF usa `wait`)."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Servidor ocupado com outros processamentos. Tente novamente em instantes."
+    default_code = 'servico_sobrecarregado'
+
+    def __init__(self, wait=None, detail=None):
+        super().__init__(detail)
+        self.wait = wait if wait is not None else getattr(settings, 'PROCESSAMENTO_RETRY_AFTER', 5)
+
+
+# ============================================
+# BALDES DE TOKENS
+# ============================================
+def _taxa(texto):
+    """'30/min' -> (30, 60.0)."""
+    quantidade, periodo = texto.split('/')
+    return int(quantidade), float(_PERIODOS[periodo[0]])
+
+
+def consumir(chave, taxa):
+    """
+    Tira um token do balde `chave`. Retorna None se havia token, ou os
+    segundos até o próximo token.
+    """
+    quantidade, periodo = _taxa(taxa)
+    intervalo = periodo / quantidade
+    agora = time.time()
+    teto = agora + (quantidade - 1) * intervalo
+
+    for _tentativa in range(2):
+        if BaldeTokens.objects.filter(chave=chave, tat__lte=teto).update(
+            tat=Greatest(F('tat'), Value(agora), output_field=FloatField()) + intervalo
+        ):
+            return None
+        tat = BaldeTokens.objects.filter(chave=chave).values_list('tat', flat=True).first()
+        if tat is not None:
+            return max(tat - teto, 0.001)
+        # Primeira requisição da chave (ignore_conflicts: outro processo pode criar junto)
+        BaldeTokens.objects.bulk_create([BaldeTokens(chave=chave, tat=0)], ignore_conflicts=True)
+    return None
+
+
+def devolver(chave, taxa):
+    """Devolve um token tirado por consumir() (requisição recusada por outro balde)."""
+    quantidade, periodo = _taxa(taxa)
+    BaldeTokens.objects.filter(chave=chave).update(tat=F('tat') - periodo / quantidade)
+
+
+def _identidades(request):
+    """{'usuario': ..., 'instituicao': ...} de quem fez a requisição."""
+    usuario = getattr(request, 'user', None)
+    if usuario is None or not usuario.is_authenticated:
+        # Mesmo critério de IP dos throttles do DRF (respeita NUM_PROXIES)
+        return {'usuario': f"ip-{BaseThrottle().get_ident(request)}"}
+    instituicao = PerfilUsuario.objects.filter(usuario_id=usuario.pk).values_list('instituicao_id', flat=True).first()
+    identidades = {'usuario': usuario.pk}
+    if instituicao is not None:
+        identidades['instituicao'] = instituicao
+    return identidades
+
+
+def espera_para(request, escopo):
+    """
+    Consome um token de cada balde do escopo; None ou segundos de espera.
+    Tudo ou nada: se um balde recusa, os tokens já tirados dos outros voltam
+    (uma requisição recusada não conta contra o usuário).
+    """
+    limites = getattr(settings, 'LIMITES_TAXA', {}).get(escopo)
+    if not limites:
+        return None
+    identidades = _identidades(request)
+    consumidos = []
+    for tipo, taxa in limites.items():
+        if tipo not in identidades:
+            continue
+        chave = f"{escopo}:{tipo}:{identidades[tipo]}"
+        espera = consumir(chave, taxa)
+        if espera is not None:
+            for chave_consumida, taxa_consumida in consumidos:
+                devolver(chave_consumida, taxa_consumida)
+            return espera
+        consumidos.append((chave, taxa))
+    return None
+
+
+def exigir_token(request, escopo):
+    """Levanta Throttled (429 + Retry-After) se algum balde do escopo está vazio."""
+    espera = espera_para(request, escopo)
+    if espera is not None:
+        raise Throttled(wait=math.ceil(espera))
+
+
+class BaldeTokensThrottle(BaseThrottle):
+    """Throttle do DRF sobre os baldes de `escopo` (subclasses abaixo)."""
+    escopo = None
+
+    def allow_request(self, request, view):
+        self.espera = espera_para(request, self.escopo)
+        return self.espera is None
+
+    def wait(self):
+        return math.ceil(self.espera)
+
+
+class UploadImagemThrottle(BaldeTokensThrottle):
+    escopo = 'upload_imagem'
+
+
+class LaudoPdfThrottle(BaldeTokensThrottle):
+    escopo = 'laudo_pdf'
+
+
+class SimulacaoLoteThrottle(BaldeTokensThrottle):
+    escopo = 'simulacao_lote'
+
+
+# ============================================
+# VAGAS DE PROCESSAMENTO
+# ============================================
+def _ocupar(dono, limite, prazo):
+    agora = time.time()
+    livres = VagaProcessamento.objects.filter(numero__lt=limite, ocupada_ate__lt=agora)
+    for numero in livres.values_list('numero', flat=True):
+        # Condicional: outro processo pode ter pegado a mesma vaga entre as consultas
+        if VagaProcessamento.objects.filter(numero=numero, ocupada_ate__lt=agora).update(
+            ocupada_ate=agora + prazo, dono=dono
+        ):
+            return numero
+    return None
+
+
+@contextmanager
+def vaga_processamento():
+    """Ocupa uma das PROCESSAMENTO_SIMULTANEO vagas ou levanta ServicoSobrecarregado (503)."""
+    limite = getattr(settings, 'PROCESSAMENTO_SIMULTANEO', 0)
+    if not limite:
+        yield
+        return
+
+    dono = uuid.uuid4().hex
+    prazo = getattr(settings, 'PROCESSAMENTO_PRAZO_VAGA', 300)
+    numero = _ocupar(dono, limite, prazo)
+    if numero is None and VagaProcessamento.objects.filter(numero__lt=limite).count() < limite:
+        # Primeiro uso (ou limite aumentado): cria as vagas que faltam
+        VagaProcessamento.objects.bulk_create(
+            [VagaProcessamento(numero=n) for n in range(limite)], ignore_conflicts=True
+        )
+        numero = _ocupar(dono, limite, prazo)
+    if numero is None:
+        raise ServicoSobrecarregado()
+
+    try:
+        yield
+    finally:
+        VagaProcessamento.objects.filter(numero=numero, dono=dono).update(ocupada_ate=0, dono="")
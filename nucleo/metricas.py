@@ -0,0 +1,182 @@
+"""
+Métricas de latência do pipeline de análise.
+
+Fluxo instrumentado:
+    upload -> AnaliseImagem -> classificação -> Laudo -> PDF (ReportService)
+
+Responsabilidades:
+- Cronometrar cada etapa (context manager `cronometrar`)
+- Agregar tempos em histogramas e contadores em memória (por processo)
+- Exportar tudo no formato texto do Prometheus (endpoint /weka/metrics/)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Histograma:
+    """Contagem acumulada por bucket + soma e total de observações."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.contagens = [0] * len(buckets)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.soma += valor
+        self.total += 1
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contagens[i] += 1
+
+
+class _Familia:
+    """Uma métrica (nome + tipo) com uma série por combinação de rótulos."""
+
+    def __init__(self, nome, tipo, ajuda, buckets=None):
+        self.nome = nome
+        self.tipo = tipo
+        self.ajuda = ajuda
+        self.buckets = buckets
+        self.series = {}
+
+
+class RegistroMetricas:
+    """
+    Registro em memória, seguro para threads.
+    Cada processo do servidor mantém o seu próprio registro.
+    """
+
+    def __init__(self):
+        self._familias = {}
+        self._lock = threading.Lock()
+
+    # --- Declaração ---
+    def contador(self, nome, ajuda):
+        return self._declarar(nome, 'counter', ajuda)
+
+    def medidor(self, nome, ajuda):
+        return self._declarar(nome, 'gauge', ajuda)
+
+    def histograma(self, nome, ajuda, buckets=BUCKETS_PADRAO):
+        return self._declarar(nome, 'histogram', ajuda, buckets)
+
+    def _declarar(self, nome, tipo, ajuda, buckets=None):
+        with self._lock:
+            if nome not in self._familias:
+                self._familias[nome] = _Familia(nome, tipo, ajuda, buckets)
+            return self._familias[nome]
+
+    # --- Atualização ---
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            familia = self._familias[nome]
+            familia.series[chave] = familia.series.get(chave, 0) + valor
+
+    def definir(self, nome, valor, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            self._familias[nome].series[chave] = valor
+
+    def observar(self, nome, valor, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            familia = self._familias[nome]
+            serie = familia.series.get(chave)
+            if serie is None:
+                serie = familia.series[chave] = _Histograma(familia.buckets)
+            serie.observar(valor)
+
+    # --- Leitura ---
+    def valor(self, nome, **rotulos):
+        """Valor atual de um contador/medidor (0 se a série não existir)."""
+        chave = tuple(sorted(rotulos.items()))
+        with self._lock:
+            return self._familias[nome].series.get(chave, 0)
+
+    def limpar(self):
+        """Zera todas as séries (mantém as declarações). Usado nos testes."""
+        with self._lock:
+            for familia in self._familias.values():
+                familia.series.clear()
+
+    def exportar_prometheus(self):
+        """Gera o texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        linhas = []
+        with self._lock:
+            for familia in self._familias.values():
+                linhas.append(f"# HELP {familia.nome} {familia.ajuda}")
+                linhas.append(f"# TYPE {familia.nome} {familia.tipo}")
+                for chave, serie in sorted(familia.series.items()):
+                    if familia.tipo == 'histogram':
+                        linhas.extend(_linhas_histograma(familia.nome, chave, serie))
+                    else:
+                        linhas.append(f"{familia.nome}{_rotulos(chave)} {_numero(serie)}")
+        return "\n".join(linhas) + "\n"
+
+
+def _rotulos(chave, extra=()):
+    pares = list(chave) + list(extra)
+    if not pares:
+        return ""
+    conteudo = ",".join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pares
+    )
+    return "{" + conteudo + "}"
+
+
+def _numero(valor):
+    if isinstance(valor, float):
+        return repr(valor)
+    return str(valor)
+
+
+def _linhas_histograma(nome, chave, serie):
+    linhas = []
+    for limite, contagem in zip(serie.buckets, serie.contagens):
+        linhas.append(f"{nome}_bucket{_rotulos(chave, [('le', limite)])} {contagem}")
+    linhas.append(f"{nome}_bucket{_rotulos(chave, [('le', '+Inf')])} {serie.total}")
+    linhas.append(f"{nome}_sum{_rotulos(chave)} {_numero(serie.soma)}")
+    linhas.append(f"{nome}_count{_rotulos(chave)} {serie.total}")
+    return linhas
+
+
+# Registro global do processo
+registro = RegistroMetricas()
+
+registro.histograma(
+    'sad_pipeline_etapa_segundos',
+    'Duração de cada etapa do pipeline de análise (segundos).',
+)
+registro.contador(
+    'sad_pipeline_etapa_total',
+    'Execuções de cada etapa do pipeline, por resultado (ok/erro).',
+)
+
+
+@contextmanager
+def cronometrar(etapa):
+    """
+    Mede a duração de um bloco e registra no histograma da etapa.
+
+    Exemplo:
+        with cronometrar('pdf'):
+            doc.build(...)
+    """
+    inicio = time.perf_counter()
+    resultado = 'ok'
+    try:
+        yield
+    except BaseException:
+        resultado = 'erro'
+        raise
+    finally:
+        registro.observar('sad_pipeline_etapa_segundos', time.perf_counter() - inicio, etapa=etapa)
+        registro.incrementar('sad_pipeline_etapa_total', etapa=etapa, resultado=resultado)
@@ -0,0 +1,61 @@
+"""
+Middlewares do núcleo.
+"""
+
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .consultas import registrar_consultas
+
+logger = logging.getLogger(__name__)
+
+
+class MedicaoConsultasMiddleware:
+    """
+    Mede as consultas SQL de cada requisição e devolve nos cabeçalhos:
+        X-Consultas            total de consultas
+        X-Consultas-Tempo-Ms   tempo somado no banco
+        X-Consultas-Repetidas  execuções repetidas do mesmo comando (N+1)
+
+    Opcional: só é carregado com MEDIR_CONSULTAS=True. Com DEBUG, também
+    registra no log (e avisa quando há comandos repetidos). Consultas feitas
+    durante o envio de uma StreamingHttpResponse não entram na contagem.
+
+    Sob ASGI só repassa a requisição: as consultas rodam nas threads do
+    sync_to_async, fora do alcance do execute_wrapper desta. Ser assíncrono
+    evita que o Django rode a cadeia inteira numa thread (views_async).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'MEDIR_CONSULTAS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with registrar_consultas() as registro:
+            response = self.get_response(request)
+
+        response['X-Consultas'] = str(registro.total)
+        response['X-Consultas-Tempo-Ms'] = f"{registro.tempo * 1000:.1f}"
+        response['X-Consultas-Repetidas'] = str(registro.repetidas)
+
+        if settings.DEBUG:
+            logger.debug("%s %s: %d consultas em %.1f ms", request.method, request.path,
+                         registro.total, registro.tempo * 1000)
+            for sql, vezes in registro.mais_repetidas():
+                logger.warning("%s %s: comando executado %d vezes (possível N+1): %s",
+                               request.method, request.path, vezes, sql[:300])
+        return response
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
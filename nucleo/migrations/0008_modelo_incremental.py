@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0007_alter_laudo_codigo_verificacao_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laudo',
+            name='classificacao_corrigida',
+            field=models.CharField(blank=True, choices=[('Maligno', 'Maligno'), ('Benigno', 'Benigno'), ('Cisto', 'Cisto'), ('Saudavel', 'Saudável')], max_length=25, null=True, verbose_name='Classificação Corrigida pelo Médico'),
+        ),
+        migrations.CreateModel(
+            name='CaracteristicasImagem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash_imagem', models.CharField(blank=True, default='', max_length=100)),
+                ('extrator_versao', models.CharField(max_length=50)),
+                ('valores', models.JSONField()),
+                ('data_calculo', models.DateTimeField(auto_now=True)),
+                ('imagem', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='caracteristicas', to='nucleo.imagemexame')),
+            ],
+            options={
+                'verbose_name_plural': 'Características de Imagem',
+            },
+        ),
+        migrations.CreateModel(
+            name='VersaoModelo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('versao', models.CharField(max_length=50, unique=True, verbose_name='Versão do Modelo IA')),
+                ('algoritmo', models.CharField(default='NaiveBayesIncremental', max_length=50)),
+                ('checksum', models.CharField(max_length=100, verbose_name='Checksum do Modelo')),
+                ('parametros', models.JSONField(verbose_name='Estatísticas do Modelo')),
+                ('instancias_treino', models.PositiveIntegerField(default=0)),
+                ('ultimo_laudo_id', models.BigIntegerField(default=0, verbose_name='Último Laudo Incorporado')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('ativo', models.BooleanField(default=False)),
+                ('versao_anterior', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='nucleo.versaomodelo')),
+            ],
+            options={
+                'verbose_name_plural': 'Versões de Modelo',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+    ]
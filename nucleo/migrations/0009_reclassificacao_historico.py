@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0008_modelo_incremental'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticaoReclassificacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo_versao', models.CharField(max_length=50)),
+                ('id_inicio', models.BigIntegerField()),
+                ('id_fim', models.BigIntegerField()),
+                ('processadas', models.PositiveIntegerField(default=0)),
+                ('concluida_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Partições de Reclassificação',
+                'constraints': [models.UniqueConstraint(fields=('modelo_versao', 'id_inicio'), name='particao_unica_por_versao')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReclassificacaoAnalise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo_versao', models.CharField(max_length=50, verbose_name='Versão do Modelo IA')),
+                ('resultado_classificacao', models.CharField(choices=[('AGUARDANDO', 'Aguardando Processamento (IA)'), ('Maligno', 'Maligno'), ('Benigno', 'Benigno'), ('Cisto', 'Cisto'), ('Saudavel', 'Saudável'), ('ERRO', 'Erro no Processamento')], max_length=25)),
+                ('score_confianca', models.DecimalField(blank=True, decimal_places=3, max_digits=5, null=True)),
+                ('data_processamento', models.DateTimeField(auto_now_add=True)),
+                ('analise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reclassificacoes', to='nucleo.analiseimagem')),
+            ],
+            options={
+                'verbose_name_plural': 'Reclassificações de Análise',
+                'constraints': [models.UniqueConstraint(fields=('analise', 'modelo_versao'), name='reclassificacao_unica_por_versao')],
+            },
+        ),
+    ]
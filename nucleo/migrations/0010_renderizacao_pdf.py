@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0009_reclassificacao_historico'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderizacaoPDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Na fila'), ('RENDERIZANDO', 'Renderizando'), ('PRONTO', 'Pronto'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=15)),
+                ('ip_origem', models.CharField(default='0.0.0.0', max_length=45, verbose_name='IP de Origem')),
+                ('erro', models.TextField(blank=True, default='')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_inicio', models.DateTimeField(blank=True, null=True)),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True)),
+                ('laudo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renderizacoes', to='nucleo.laudo')),
+                ('usuario_solicitante', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Renderizações de PDF',
+                'ordering': ['-data_criacao'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['PENDENTE', 'RENDERIZANDO'])), fields=('laudo',), name='renderizacao_ativa_unica_por_laudo')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0010_renderizacao_pdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laudo',
+            name='pdf_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Fingerprint do PDF'),
+        ),
+        migrations.AddField(
+            model_name='laudo',
+            name='pdf_gerado_em',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='PDF Gerado em'),
+        ),
+    ]
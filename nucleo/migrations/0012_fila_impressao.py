@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0011_laudo_pdf_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilaImpressao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('local_impressao', models.CharField(max_length=100, verbose_name='Local de Impressão')),
+                ('ip_origem', models.CharField(default='0.0.0.0', max_length=45, verbose_name='IP de Origem')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Na fila'), ('IMPRESSO', 'Impresso'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=10)),
+                ('arquivo_lote', models.CharField(blank=True, default='', max_length=255, verbose_name='Arquivo do Lote')),
+                ('erro', models.TextField(blank=True, default='')),
+                ('data_solicitacao', models.DateTimeField(auto_now_add=True)),
+                ('data_impressao', models.DateTimeField(blank=True, null=True)),
+                ('laudo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fila_impressao', to='nucleo.laudo')),
+                ('usuario_solicitante', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Fila de Impressão',
+                'ordering': ['data_solicitacao'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'PENDENTE')), fields=('laudo', 'local_impressao'), name='impressao_pendente_unica_por_local')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0012_fila_impressao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgregadoDiarioLaudos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('resultado_classificacao', models.CharField(choices=[('AGUARDANDO', 'Aguardando Processamento (IA)'), ('Maligno', 'Maligno'), ('Benigno', 'Benigno'), ('Cisto', 'Cisto'), ('Saudavel', 'Saudável'), ('ERRO', 'Erro no Processamento')], max_length=25)),
+                ('total_analises', models.IntegerField(default=0)),
+                ('total_laudos', models.IntegerField(default=0)),
+                ('instituicao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='agregados_diarios', to='nucleo.instituicao')),
+            ],
+            options={
+                'verbose_name_plural': 'Agregados Diários de Laudos',
+                'ordering': ['-dia'],
+                'constraints': [models.UniqueConstraint(fields=('dia', 'instituicao', 'resultado_classificacao'), name='agregado_unico_por_dia_instituicao_resultado')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0013_agregado_diario_laudos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='laudo',
+            index=models.Index(fields=['data_hora_emissao', 'id'], name='laudo_emissao_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paciente',
+            index=models.Index(fields=['data_cadastro', 'id'], name='paciente_cadastro_id_idx'),
+        ),
+    ]
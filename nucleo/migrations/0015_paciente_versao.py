@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0014_indices_paginacao_keyset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorVersao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=50, unique=True)),
+                ('versao', models.PositiveBigIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Contadores de Versão',
+            },
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='paciente',
+            name='versao',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
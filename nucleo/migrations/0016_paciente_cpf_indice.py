@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:19
+
+from django.db import migrations, models
+
+
+def preencher_indices(apps, schema_editor):
+    """Calcula o índice cego dos CPFs já cadastrados (o primeiro de cada CPF repetido fica com ele)."""
+    from nucleo.models import formatar_cpf
+    from nucleo.seguranca.crypto_utils import blind_index
+
+    Paciente = apps.get_model('nucleo', 'Paciente')
+    vistos = set()
+    for paciente in Paciente.objects.exclude(cpf__isnull=True).only('id', 'cpf').order_by('id').iterator():
+        if not paciente.cpf:
+            continue
+        indice = blind_index(formatar_cpf(paciente.cpf)[1])
+        if indice in vistos:
+            continue
+        vistos.add(indice)
+        Paciente.objects.filter(pk=paciente.pk).update(cpf_indice=indice)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0015_paciente_versao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paciente',
+            name='cpf_indice',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(preencher_indices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def indexar_existentes(apps, schema_editor):
+    """Tokens do nome dos pacientes já cadastrados (linhas que não decifram com a chave atual são puladas)."""
+    from django.db.models.functions import Cast
+    from nucleo.busca_nome import tokens_nome
+    from nucleo.seguranca.crypto_utils import decrypt_value
+
+    Paciente = apps.get_model('nucleo', 'Paciente')
+    TokenNomePaciente = apps.get_model('nucleo', 'TokenNomePaciente')
+    # Cast: lê o texto cifrado sem o conversor do campo, para decifrar linha a linha
+    linhas = Paciente.objects.annotate(bruto=Cast('nome_completo', models.TextField())).values_list('id', 'bruto')
+    tokens = []
+    for paciente_id, bruto in linhas.iterator():
+        try:
+            nome = decrypt_value(bruto)
+        except ValueError:
+            continue
+        tokens += [TokenNomePaciente(paciente_id=paciente_id, token=t) for t in tokens_nome(nome)]
+    TokenNomePaciente.objects.bulk_create(tokens, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0016_paciente_cpf_indice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenNomePaciente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=64)),
+                ('paciente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens_nome', to='nucleo.paciente')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('paciente', 'token'), name='token_nome_paciente_unico')],
+            },
+        ),
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
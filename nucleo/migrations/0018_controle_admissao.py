@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0017_token_nome_paciente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BaldeTokens',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=150, unique=True)),
+                ('tat', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Baldes de Tokens',
+            },
+        ),
+        migrations.CreateModel(
+            name='VagaProcessamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveSmallIntegerField(unique=True)),
+                ('ocupada_ate', models.FloatField(default=0)),
+                ('dono', models.CharField(blank=True, default='', max_length=32)),
+            ],
+            options={
+                'verbose_name_plural': 'Vagas de Processamento',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0018_controle_admissao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logauditoria',
+            name='id_evento',
+            field=models.UUIDField(editable=False, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='logauditoria',
+            name='data_hora',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0019_auditoria_escrita_tardia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laudo',
+            name='revisado_em',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Revisado pelo Médico em'),
+        ),
+        migrations.AddField(
+            model_name='laudo',
+            name='revisado_por',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='laudos_revisados', to='nucleo.perfilusuario', verbose_name='Médico Revisor'),
+        ),
+        migrations.AddField(
+            model_name='laudo',
+            name='revisao_incorporada_em',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Revisão Incorporada ao Modelo'),
+        ),
+        migrations.AddField(
+            model_name='laudo',
+            name='rotulo_incorporado',
+            field=models.CharField(blank=True, max_length=25, null=True, verbose_name='Classe Incorporada ao Modelo'),
+        ),
+    ]
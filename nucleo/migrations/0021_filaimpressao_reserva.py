@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0020_laudo_revisao_medico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filaimpressao',
+            name='reserva',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='filaimpressao',
+            name='status',
+            field=models.CharField(choices=[('PENDENTE', 'Na fila'), ('IMPRIMINDO', 'Imprimindo'), ('IMPRESSO', 'Impresso'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 20:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nucleo', '0021_filaimpressao_reserva'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logauditoria',
+            name='acao',
+            field=models.CharField(choices=[('LOGIN_SUCESSO', 'Login Bem-Sucedido'), ('LOGIN_FALHA', 'Tentativa de Login Falha'), ('LOGOUT', 'Logout'), ('UPLOAD_IMAGEM', 'Upload de Imagem de Exame'), ('ANALISE_SOLICITADA', 'Solicitação de Análise IA'), ('ANALISE_CONCLUIDA', 'Análise IA Concluída'), ('LAUDO_GERADO', 'Geração de Laudo'), ('LAUDO_IMPRESSO', 'Laudo Impresso'), ('LAUDO_ALTERADO', 'Laudo Alterado'), ('ERRO_SISTEMA', 'Erro Crítico do Sistema'), ('ACESSO_RELATORIO', 'Acesso a Relatório/Auditoria'), ('IMPORTACAO_PACIENTES', 'Importação de Pacientes em Lote')], max_length=50),
+        ),
+    ]
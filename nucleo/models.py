@@ -1,10 +1,12 @@
 import uuid
 import hashlib
 import re  # Importação para sanitizar o CPF
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 from .seguranca import EncryptedCharField, EncryptedTextField, EncryptedFileField
+from .seguranca.crypto_utils import blind_index
+from .metricas import cronometrar
 
 # ============================================
 # ALUNO 1 e 3: INFRAESTRUTURA E INSTITUIÇÃO
@@ -48,6 +50,17 @@ class PerfilUsuario(models.Model):
 # ============================================
 # ALUNO 4 e 5: PACIENTES E DADOS SENSÍVEIS
 # ============================================
+def formatar_cpf(valor):
+    """
+    Remove tudo que não é dígito e, se sobrarem 11, aplica 000.000.000-00.
+    Devolve (cpf_formatado, apenas_numeros).
+    """
+    apenas_numeros = re.sub(r'\D', '', str(valor))
+    if len(apenas_numeros) == 11:
+        return f"{apenas_numeros[:3]}.{apenas_numeros[3:6]}.{apenas_numeros[6:9]}-{apenas_numeros[9:]}", apenas_numeros
+    return valor, apenas_numeros
+
+
 class Paciente(models.Model):
     uuid_paciente = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name="ID Único do Paciente")
     cpf = EncryptedCharField(max_length=14, unique=True, null=True, blank=True, verbose_name="CPF")
@@ -56,6 +69,18 @@ class Paciente(models.Model):
     data_cadastro = models.DateTimeField(auto_now_add=True)
     sintomas = EncryptedCharField(null=True, blank=True)
     possivel_diagnostico = EncryptedCharField(null=True, blank=True)
+
+    # Índice cego do CPF (HMAC dos dígitos): o CPF cifrado muda a cada save,
+    # então a unicidade e a busca de duplicados são feitas por aqui
+    cpf_indice = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+
+    # Versão do registro (ETag/304 nas views de paciente): sobe a cada save
+    versao = models.PositiveIntegerField(default=1, editable=False)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Listagem paginada por chave (nucleo/paginacao.py)
+        indexes = [models.Index(fields=['data_cadastro', 'id'], name='paciente_cadastro_id_idx')]
     
     # --- [MANTIDO] Lógica de Sanitização de CPF ---
     def save(self, *args, **kwargs):
@@ -63,20 +88,43 @@ class Paciente(models.Model):
         Formata CPF para 000.000.000-00 automaticamente.
         """
         if self.cpf:
-            # 1. Remove tudo que NÃO for número
-            apenas_numeros = re.sub(r'\D', '', str(self.cpf))
-            
-            # 2. Se tiver 11 dígitos, aplica a máscara padrão
-            if len(apenas_numeros) == 11:
-                self.cpf = f"{apenas_numeros[:3]}.{apenas_numeros[3:6]}.{apenas_numeros[6:9]}-{apenas_numeros[9:]}"
+            self.cpf, apenas_numeros = formatar_cpf(self.cpf)
+            self.cpf_indice = blind_index(apenas_numeros)
+        else:
+            self.cpf_indice = None
+
+        # Incremento no banco (F): dois saves simultâneos nunca ficam com a mesma versão
+        atualizando = not self._state.adding
+        if atualizando:
+            self.versao = models.F('versao') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'versao', 'data_atualizacao'}
+                if 'cpf' in kwargs['update_fields']:
+                    kwargs['update_fields'].add('cpf_indice')
         
         super().save(*args, **kwargs)
+
+        if atualizando:
+            self.refresh_from_db(fields=['versao'])
     # -------------------------------------------
     
     def __str__(self):
       return self.nome_completo
 
 
+class TokenNomePaciente(models.Model):
+    """
+    Índice cego do nome (nucleo/busca_nome.py): um HMAC por prefixo de cada
+    palavra normalizada. A busca por nome cruza os tokens no SQL e só decifra
+    os pacientes encontrados. Mantido pelos signals do Paciente.
+    """
+    paciente = models.ForeignKey(Paciente, on_delete=models.CASCADE, related_name='tokens_nome')
+    token = models.CharField(max_length=64, db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['paciente', 'token'], name='token_nome_paciente_unico')]
+
+
 # ============================================
 # ALUNO 5: IMAGENS REAIS DE EXAME
 # ============================================
@@ -132,24 +180,32 @@ class AnaliseImagem(models.Model):
     def save(self, *args, **kwargs):
         """
         MÁGICA DA AUTOMAÇÃO (INTEGRAÇÃO RESTAURADA)
+
+        simular_ia=False mantém a análise como AGUARDANDO (ex.: classificador
+        indisponível; será processada depois por processar_analises_pendentes).
         """
+        simular_ia = kwargs.pop('simular_ia', True)
+
         # 1. Calcular Hash SHA-256
         if (not self.hash_imagem or self.hash_imagem == "Aguardando processamento...") and self.imagem:
             try:
-                sha256_hash = hashlib.sha256()
-                if hasattr(self.imagem.caminho_arquivo, 'open'): self.imagem.caminho_arquivo.open('rb')
-                for chunk in self.imagem.caminho_arquivo.chunks(): sha256_hash.update(chunk)
-                self.hash_imagem = sha256_hash.hexdigest()
+                with cronometrar('hash'):
+                    sha256_hash = hashlib.sha256()
+                    if hasattr(self.imagem.caminho_arquivo, 'open'): self.imagem.caminho_arquivo.open('rb')
+                    for chunk in self.imagem.caminho_arquivo.chunks(): sha256_hash.update(chunk)
+                    self.hash_imagem = sha256_hash.hexdigest()
             except Exception:
                 self.hash_imagem = "ERRO_LEITURA_ARQUIVO"
 
         # 2. SIMULADOR DE INTEGRAÇÃO
-        if self.resultado_classificacao == 'AGUARDANDO':
+        if self.resultado_classificacao == 'AGUARDANDO' and simular_ia:
             if self.hash_imagem and "ERRO" not in self.hash_imagem and "Aguardando" not in self.hash_imagem:
                 self.resultado_classificacao = 'Benigno'
                 self.score_confianca = 0.985
                 self.data_hora_conclusao = timezone.now()
-        super(AnaliseImagem, self).save(*args, **kwargs)
+
+        with cronometrar('analise'):
+            super(AnaliseImagem, self).save(*args, **kwargs)
 
 
 # ============================================
@@ -164,11 +220,35 @@ class Laudo(models.Model):
     caminho_pdf = models.FileField(upload_to='laudos/', null=True, blank=True)
     
     confirmou_concordancia = models.BooleanField(default=True, verbose_name="Confirma Concordância com IA") 
+    # Preenchido pelo médico quando discorda da IA (usado no aprendizado incremental)
+    classificacao_corrigida = models.CharField(
+        max_length=25, null=True, blank=True,
+        choices=[r for r in AnaliseImagem.RESULTADOS if r[0] not in ('AGUARDANDO', 'ERRO')],
+        verbose_name="Classificação Corrigida pelo Médico",
+    )
+    # Revisão explícita do médico (POST laudos/<id>/revisao/): só laudos revisados
+    # servem de exemplo ao aprendizado; os padrões acima não contam como opinião
+    revisado_em = models.DateTimeField(null=True, blank=True, verbose_name="Revisado pelo Médico em")
+    revisado_por = models.ForeignKey(
+        PerfilUsuario, on_delete=models.SET_NULL, null=True, blank=True, related_name='laudos_revisados',
+        verbose_name="Médico Revisor",
+    )
+    # O que o modelo incremental já aprendeu deste laudo (para desfazer numa nova revisão)
+    rotulo_incorporado = models.CharField(max_length=25, null=True, blank=True, verbose_name="Classe Incorporada ao Modelo")
+    revisao_incorporada_em = models.DateTimeField(null=True, blank=True, verbose_name="Revisão Incorporada ao Modelo")
     
     ip_emissao = models.CharField(max_length=45, default="127.0.0.1 (Registro Interno)", verbose_name="IP de Emissão")
     laudo_finalizado = models.BooleanField(default=False, verbose_name="Finalizado/Bloqueado")
     codigo_verificacao = models.CharField(max_length=50, unique=True, default="Será gerado ao Salvar", verbose_name="Código de Verificação") 
 
+    # Impressão digital do conteúdo usado no último PDF gerado (evita re-renderizar sem mudança)
+    pdf_fingerprint = models.CharField(max_length=64, blank=True, default="", verbose_name="Fingerprint do PDF")
+    pdf_gerado_em = models.DateTimeField(null=True, blank=True, verbose_name="PDF Gerado em")
+
+    class Meta:
+        # Histórico/relatório paginados por chave (nucleo/paginacao.py)
+        indexes = [models.Index(fields=['data_hora_emissao', 'id'], name='laudo_emissao_id_idx')]
+
     def __str__(self):
         try:
             nome = self.analise.imagem.paciente.nome_completo
@@ -225,14 +305,292 @@ class LogAuditoria(models.Model):
         ('LAUDO_ALTERADO', 'Laudo Alterado'),
         ('ERRO_SISTEMA', 'Erro Crítico do Sistema'),
         ('ACESSO_RELATORIO', 'Acesso a Relatório/Auditoria'),
+        ('IMPORTACAO_PACIENTES', 'Importação de Pacientes em Lote'),
     )
     usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name="Usuário Responsável")
-    data_hora = models.DateTimeField(auto_now_add=True)
+    # Momento do evento (e não da gravação): a escrita é tardia (nucleo/auditoria.py)
+    data_hora = models.DateTimeField(default=timezone.now, editable=False)
     acao = models.CharField(max_length=50, choices=ACOES) 
     recurso = models.CharField(max_length=100, null=True, blank=True, verbose_name="Recurso Acessado")
     detalhe = models.TextField(null=True, blank=True) 
     ip_origem = models.CharField(max_length=45, verbose_name="IP de Origem")
     protegido = models.BooleanField(default=True) 
+    # Id do evento no diário: regravar um segmento após uma queda não duplica linhas
+    id_evento = models.UUIDField(null=True, unique=True, editable=False)
+
+    class Meta:
+        verbose_name_plural = "Logs de Auditoria"
+
+
+# ============================================
+# MOTOR DE IA: REGISTRO DE MODELOS E CARACTERÍSTICAS
+# ============================================
+class VersaoModelo(models.Model):
+    """
+    Registro de versões do modelo de classificação.
+    Cada atualização incremental gera uma nova linha; apenas uma fica ativa.
+    """
+    versao = models.CharField(max_length=50, unique=True, verbose_name="Versão do Modelo IA")
+    algoritmo = models.CharField(max_length=50, default="NaiveBayesIncremental")
+    checksum = models.CharField(max_length=100, verbose_name="Checksum do Modelo")
+    parametros = models.JSONField(verbose_name="Estatísticas do Modelo")
+    versao_anterior = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True)
+    instancias_treino = models.PositiveIntegerField(default=0)
+    ultimo_laudo_id = models.BigIntegerField(default=0, verbose_name="Último Laudo Incorporado")
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    ativo = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name_plural = "Versões de Modelo"
+        ordering = ['-data_criacao']
+
+    def __str__(self):
+        return f"{self.versao} ({'ativo' if self.ativo else 'inativo'})"
+
+
+class CaracteristicasImagem(models.Model):
+    """Cache das características extraídas de cada imagem (evita re-decodificar)."""
+    imagem = models.OneToOneField(ImagemExame, on_delete=models.CASCADE, related_name="caracteristicas")
+    hash_imagem = models.CharField(max_length=100, blank=True, default="")
+    extrator_versao = models.CharField(max_length=50)
+    valores = models.JSONField()
+    data_calculo = models.DateTimeField(auto_now=True)
 
     class Meta:
-        verbose_name_plural = "Logs de Auditoria"
\ No newline at end of file
+        verbose_name_plural = "Características de Imagem"
+
+    def __str__(self):
+        return f"Características da imagem {self.imagem_id} ({self.extrator_versao})"
+
+
+class ReclassificacaoAnalise(models.Model):
+    """
+    Tabela lateral do backfill: resultado de uma análise histórica sob outra
+    versão do modelo, sem alterar a AnaliseImagem original.
+    """
+    analise = models.ForeignKey(AnaliseImagem, on_delete=models.CASCADE, related_name="reclassificacoes")
+    modelo_versao = models.CharField(max_length=50, verbose_name="Versão do Modelo IA")
+    resultado_classificacao = models.CharField(max_length=25, choices=AnaliseImagem.RESULTADOS)
+    score_confianca = models.DecimalField(max_digits=5, decimal_places=3, null=True, blank=True)
+    data_processamento = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Reclassificações de Análise"
+        constraints = [
+            models.UniqueConstraint(fields=['analise', 'modelo_versao'], name='reclassificacao_unica_por_versao'),
+        ]
+
+    def __str__(self):
+        return f"Análise {self.analise_id} sob {self.modelo_versao}: {self.resultado_classificacao}"
+
+
+class ParticaoReclassificacao(models.Model):
+    """Ponto de retomada do backfill: partições (faixas de id) já concluídas."""
+    modelo_versao = models.CharField(max_length=50)
+    id_inicio = models.BigIntegerField()
+    id_fim = models.BigIntegerField()
+    processadas = models.PositiveIntegerField(default=0)
+    concluida_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Partições de Reclassificação"
+        constraints = [
+            models.UniqueConstraint(fields=['modelo_versao', 'id_inicio'], name='particao_unica_por_versao'),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo_versao} [{self.id_inicio}, {self.id_fim})"
+
+
+# ============================================
+# PDF DE LAUDOS: RENDERIZAÇÃO EM SEGUNDO PLANO
+# ============================================
+class RenderizacaoPDF(models.Model):
+    """
+    Job de renderização do PDF de um laudo (executado fora da requisição).
+    Só pode existir um job ativo (pendente/renderizando) por laudo: pedidos
+    simultâneos para o mesmo laudo reaproveitam o job existente.
+    """
+    PENDENTE = 'PENDENTE'
+    RENDERIZANDO = 'RENDERIZANDO'
+    PRONTO = 'PRONTO'
+    FALHOU = 'FALHOU'
+    STATUS = (
+        (PENDENTE, 'Na fila'),
+        (RENDERIZANDO, 'Renderizando'),
+        (PRONTO, 'Pronto'),
+        (FALHOU, 'Falhou'),
+    )
+    ATIVOS = (PENDENTE, RENDERIZANDO)
+
+    laudo = models.ForeignKey(Laudo, on_delete=models.CASCADE, related_name="renderizacoes")
+    status = models.CharField(max_length=15, choices=STATUS, default=PENDENTE)
+    usuario_solicitante = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    ip_origem = models.CharField(max_length=45, default="0.0.0.0", verbose_name="IP de Origem")
+    erro = models.TextField(blank=True, default="")
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_inicio = models.DateTimeField(null=True, blank=True)
+    data_conclusao = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Renderizações de PDF"
+        ordering = ['-data_criacao']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['laudo'],
+                condition=models.Q(status__in=['PENDENTE', 'RENDERIZANDO']),
+                name='renderizacao_ativa_unica_por_laudo',
+            ),
+        ]
+
+    def __str__(self):
+        return f"PDF do Laudo {self.laudo_id}: {self.get_status_display()}"
+
+
+class FilaImpressao(models.Model):
+    """
+    Fila de impressão por local (impressora). O spooler junta os laudos
+    pendentes de cada local em um único PDF e registra uma LaudoImpressao
+    por laudo impresso.
+    """
+    PENDENTE = 'PENDENTE'
+    IMPRIMINDO = 'IMPRIMINDO'
+    IMPRESSO = 'IMPRESSO'
+    FALHOU = 'FALHOU'
+    STATUS = (
+        (PENDENTE, 'Na fila'),
+        (IMPRIMINDO, 'Imprimindo'),
+        (IMPRESSO, 'Impresso'),
+        (FALHOU, 'Falhou'),
+    )
+
+    laudo = models.ForeignKey(Laudo, on_delete=models.CASCADE, related_name="fila_impressao")
+    local_impressao = models.CharField(max_length=100, verbose_name="Local de Impressão")
+    usuario_solicitante = models.ForeignKey(User, on_delete=models.PROTECT)
+    ip_origem = models.CharField(max_length=45, default="0.0.0.0", verbose_name="IP de Origem")
+    status = models.CharField(max_length=10, choices=STATUS, default=PENDENTE)
+    arquivo_lote = models.CharField(max_length=255, blank=True, default="", verbose_name="Arquivo do Lote")
+    erro = models.TextField(blank=True, default="")
+    # Rodada do spooler que assumiu o pedido (ao passar para IMPRIMINDO)
+    reserva = models.UUIDField(null=True, blank=True, editable=False)
+    data_solicitacao = models.DateTimeField(auto_now_add=True)
+    data_impressao = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Fila de Impressão"
+        ordering = ['data_solicitacao']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['laudo', 'local_impressao'],
+                condition=models.Q(status='PENDENTE'),
+                name='impressao_pendente_unica_por_local',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Laudo {self.laudo_id} -> {self.local_impressao} ({self.get_status_display()})"
+
+
+# ============================================
+# RELATÓRIOS: AGREGADOS DIÁRIOS
+# ============================================
+class AgregadoDiarioLaudos(models.Model):
+    """
+    Contagens de análises e laudos por dia, instituição e resultado da
+    classificação, mantidas incrementalmente pelos signals de AnaliseImagem
+    e Laudo (ver nucleo/agregados.py). O resumo gerencial é lido só daqui.
+
+    - Análises contam no dia da solicitação; laudos, no dia da emissão.
+    - Reconstrução completa: `python manage.py reconstruir_agregados_laudos`.
+    """
+    dia = models.DateField()
+    instituicao = models.ForeignKey(Instituicao, on_delete=models.CASCADE, related_name="agregados_diarios")
+    resultado_classificacao = models.CharField(max_length=25, choices=AnaliseImagem.RESULTADOS)
+    total_analises = models.IntegerField(default=0)
+    total_laudos = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Agregados Diários de Laudos"
+        ordering = ['-dia']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dia', 'instituicao', 'resultado_classificacao'],
+                name='agregado_unico_por_dia_instituicao_resultado',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} / {self.instituicao_id} / {self.resultado_classificacao}"
+
+
+# ============================================
+# VERSÕES DE COLEÇÕES (ETag de listagens)
+# ============================================
+class ContadorVersao(models.Model):
+    """
+    Contador por coleção (ex.: 'pacientes'), incrementado pelos signals a
+    cada inclusão/alteração/remoção. A ETag da listagem sai daqui com uma
+    única consulta, sem ler nem decifrar as linhas.
+    """
+    chave = models.CharField(max_length=50, unique=True)
+    versao = models.PositiveBigIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Contadores de Versão"
+
+    def __str__(self):
+        return f"{self.chave} v{self.versao}"
+
+    @classmethod
+    def incrementar(cls, chave):
+        agora = timezone.now()
+        if cls.objects.filter(chave=chave).update(versao=models.F('versao') + 1, atualizado_em=agora):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(chave=chave, versao=1)
+        except IntegrityError:
+            cls.objects.filter(chave=chave).update(versao=models.F('versao') + 1, atualizado_em=agora)
+
+    @classmethod
+    def atual(cls, chave):
+        """(versao, atualizado_em); (0, None) se a coleção nunca mudou."""
+        registro = cls.objects.filter(chave=chave).values_list('versao', 'atualizado_em').first()
+        return registro or (0, None)
+
+
+# ============================================
+# CONTROLE DE ADMISSÃO (nucleo/limites.py)
+# ============================================
+class BaldeTokens(models.Model):
+    """
+    Balde de tokens de uma chave (ex.: 'upload_imagem:usuario:7'), no banco
+    para valer entre todos os processos do servidor. Guarda só o "horário
+    teórico de chegada" (GCRA): o balde está cheio quando tat <= agora.
+    """
+    chave = models.CharField(max_length=150, unique=True)
+    tat = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Baldes de Tokens"
+
+    def __str__(self):
+        return self.chave
+
+
+class VagaProcessamento(models.Model):
+    """
+    Vaga para trabalho pesado de CPU (classificação, lote de simulações).
+    Ocupada até `ocupada_ate` (epoch, s): se o processo morrer sem liberar,
+    a vaga volta sozinha quando o prazo vence.
+    """
+    numero = models.PositiveSmallIntegerField(unique=True)
+    ocupada_ate = models.FloatField(default=0)
+    dono = models.CharField(max_length=32, blank=True, default="")
+
+    class Meta:
+        verbose_name_plural = "Vagas de Processamento"
+
+    def __str__(self):
+        return f"Vaga {self.numero}"
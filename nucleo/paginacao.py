@@ -0,0 +1,101 @@
+"""
+Paginação por chave (keyset) para as listagens do núcleo.
+
+Em vez de OFFSET (que relê e descarta as linhas anteriores, e decifra
+pacientes à toa), cada página continua a partir da última chave vista:
+
+    WHERE (campo, id) < (ultimo_campo, ultimo_id) ORDER BY campo DESC, id DESC LIMIT n+1
+
+O custo de cada página é o mesmo da primeira, não importa o tamanho da
+tabela. O cursor devolvido ao cliente é opaco (base64 da última chave).
+
+Uso numa APIView:
+    paginacao = PaginacaoKeyset('data_cadastro')
+    pagina = paginacao.paginate_queryset(queryset, request, self)
+    return paginacao.get_paginated_response(Serializer(pagina, many=True).data)
+"""
+
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class PaginacaoKeyset(BasePagination):
+    """Cursor opaco sobre (campo de data, id)."""
+    parametro_cursor = 'cursor'
+    parametro_tamanho = 'tamanho'
+    tamanho_padrao = 50
+    tamanho_maximo = 200
+
+    def __init__(self, campo, descendente=True):
+        self.campo = campo
+        self.descendente = descendente
+        self.proximo_cursor = None
+        self.request = None
+
+    # --- cursor ---
+
+    @staticmethod
+    def _codificar(valor, pk):
+        texto = json.dumps([valor.isoformat(), pk])
+        return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def _decodificar(cursor):
+        try:
+            preenchido = cursor + '=' * (-len(cursor) % 4)
+            valor, pk = json.loads(base64.urlsafe_b64decode(preenchido.encode()))
+            momento = parse_datetime(valor)
+            if momento is None or not isinstance(pk, int):
+                raise ValueError
+            return momento, pk
+        except (ValueError, TypeError):
+            raise NotFound("Cursor inválido.")
+
+    def _tamanho(self, request):
+        try:
+            tamanho = int(request.query_params.get(self.parametro_tamanho, self.tamanho_padrao))
+        except (TypeError, ValueError):
+            tamanho = self.tamanho_padrao
+        return max(1, min(tamanho, self.tamanho_maximo))
+
+    # --- interface de paginação do DRF ---
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        tamanho = self._tamanho(request)
+        sufixo = 'lt' if self.descendente else 'gt'
+        sinal = '-' if self.descendente else ''
+
+        cursor = request.query_params.get(self.parametro_cursor)
+        if cursor:
+            valor, pk = self._decodificar(cursor)
+            queryset = queryset.filter(
+                Q(**{f'{self.campo}__{sufixo}': valor}) | Q(**{self.campo: valor, f'pk__{sufixo}': pk})
+            )
+
+        pagina = list(queryset.order_by(f'{sinal}{self.campo}', f'{sinal}pk')[:tamanho + 1])
+        if len(pagina) > tamanho:
+            pagina = pagina[:tamanho]
+            ultimo = pagina[-1]
+            self.proximo_cursor = self._codificar(getattr(ultimo, self.campo), ultimo.pk)
+        return pagina
+
+    def get_next_link(self):
+        if not self.proximo_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.parametro_cursor, self.proximo_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "proximo": self.get_next_link(),
+            "cursor_proximo": self.proximo_cursor,
+            "resultados": data,
+        })
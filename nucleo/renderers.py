@@ -0,0 +1,142 @@
+"""
+Renderers de exportação em streaming (CSV, NDJSON e array JSON).
+
+Nas listagens grandes (histórico e relatório de laudos) o cliente pede
+`?format=csv`, `?format=ndjson` ou `?format=json-array`: a view itera o
+queryset em lotes e devolve uma StreamingHttpResponse com
+`resposta_streaming`, sem montar a lista inteira em memória. O método
+render() cobre respostas comuns (ex.: erros 400) nesses formatos.
+
+O `json-array` é um único array JSON (como o JSONRenderer produziria),
+mas cada registro é codificado assim que sai do banco e enviado em blocos:
+a memória fica limitada a um lote do queryset e o primeiro byte sai antes
+da última linha ser lida.
+
+JSON é codificado com orjson quando instalado (opcional, `pip install
+orjson`); sem ele, com a json da biblioteca padrão. Datas, Decimal e UUID
+saem no mesmo formato nos dois casos (DjangoJSONEncoder).
+"""
+
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_CODIFICADOR = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def codificar_json(valor):
+    """Bytes UTF-8 do valor em JSON compacto."""
+    if orjson is not None:
+        # Datas passam pelo DjangoJSONEncoder: mesmo formato sem o orjson
+        return orjson.dumps(
+            valor,
+            default=_CODIFICADOR.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+    return _CODIFICADOR.encode(valor).encode('utf-8')
+
+
+class _Eco:
+    """'Arquivo' do csv.writer que devolve a linha em vez de guardá-la."""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ""
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return valor
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def linhas(self, registros, campos):
+        """Gera o cabeçalho e uma linha (bytes) por registro."""
+        escritor = csv.writer(_Eco())
+        yield escritor.writerow(campos).encode(self.charset)
+        for registro in registros:
+            yield escritor.writerow([_valor_csv(registro.get(c)) for c in campos]).encode(self.charset)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        registros = data if isinstance(data, list) else [data]
+        campos = list(registros[0]) if registros else []
+        return b''.join(self.linhas(registros, campos))
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def linhas(self, registros, campos=None):
+        """Um objeto JSON por linha."""
+        for registro in registros:
+            yield codificar_json(registro) + b"\n"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(self.linhas(data if isinstance(data, list) else [data]))
+
+
+class JSONArrayRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json-array'
+    extensao = 'json'
+    charset = 'utf-8'
+    # Registros acumulados até este tamanho antes de cada envio (menos escritas no socket)
+    tamanho_bloco = 64 * 1024
+
+    def linhas(self, registros, campos=None):
+        """'[', os registros separados por vírgula e ']', em blocos de ~64 KB."""
+        bloco = bytearray(b'[')
+        separador = b''
+        for registro in registros:
+            bloco += separador
+            bloco += codificar_json(registro)
+            separador = b','
+            if len(bloco) >= self.tamanho_bloco:
+                yield bytes(bloco)
+                bloco.clear()
+        bloco += b']'
+        yield bytes(bloco)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return codificar_json(data)
+
+
+RENDERERS_STREAMING = (CSVRenderer, NDJSONRenderer, JSONArrayRenderer)
+
+
+def formato_streaming(request):
+    """True se o renderer negociado é um dos formatos linha a linha."""
+    return isinstance(getattr(request, 'accepted_renderer', None), RENDERERS_STREAMING)
+
+
+def resposta_streaming(request, registros, campos, nome_arquivo):
+    """StreamingHttpResponse no formato negociado (registros: iterável de dicts)."""
+    renderer = request.accepted_renderer
+    resposta = StreamingHttpResponse(
+        renderer.linhas(registros, campos),
+        content_type=f'{renderer.media_type}; charset={renderer.charset}',
+    )
+    extensao = getattr(renderer, 'extensao', renderer.format)
+    resposta['Content-Disposition'] = f'attachment; filename="{nome_arquivo}.{extensao}"'
+    return resposta
@@ -5,10 +5,13 @@ Responsabilidades:
 - Converter valores em bytes
 - Criptografar (encrypt_value)
 - Descriptografar (decrypt_value)
+- Gerar índice cego determinístico para busca/unicidade (blind_index)
 - Retornar valores como strings base64 para armazenamento seguro no SQLite
 """
 
 import base64
+import hashlib
+import hmac
 from django.conf import settings
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
@@ -74,3 +77,17 @@ def decrypt_value(value: str) -> str:
     data = cipher.decrypt_and_verify(ciphertext, tag)
 
     return data.decode()
+
+
+def blind_index(value: str) -> str:
+    """
+    HMAC-SHA256 do valor, com chave derivada de AES_KEY.
+
+    Como encrypt_value usa nonce aleatório, o texto cifrado nunca se repete
+    e não serve para WHERE/UNIQUE. O índice cego é determinístico: permite
+    achar duplicados sem decifrar nada e sem expor o valor original.
+    """
+    if value is None:
+        return None
+    chave = hmac.new(settings.AES_KEY, b"indice-cego", hashlib.sha256).digest()
+    return hmac.new(chave, value.encode(), hashlib.sha256).hexdigest()
@@ -11,6 +11,8 @@ from django.conf import settings
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
 
+from ..metricas import cronometrar
+
 NONCE_SIZE = 12
 TAG_SIZE = 16
 
@@ -37,15 +39,16 @@ class EncryptedStorage(FileSystemStorage):
         return super()._save(name, encrypted_file)
 
     def _open(self, name, mode='rb'):
-        f = super()._open(name, mode)
-        payload = f.read()
+        with cronometrar('descriptografia'):
+            f = super()._open(name, mode)
+            payload = f.read()
 
-        nonce = payload[:NONCE_SIZE]
-        tag = payload[-TAG_SIZE:]
-        ciphertext = payload[NONCE_SIZE:-TAG_SIZE]
+            nonce = payload[:NONCE_SIZE]
+            tag = payload[-TAG_SIZE:]
+            ciphertext = payload[NONCE_SIZE:-TAG_SIZE]
 
-        cipher = AES.new(settings.AES_KEY, AES.MODE_GCM, nonce=nonce)
-        data = cipher.decrypt_and_verify(ciphertext, tag)
+            cipher = AES.new(settings.AES_KEY, AES.MODE_GCM, nonce=nonce)
+            data = cipher.decrypt_and_verify(ciphertext, tag)
 
         from django.core.files.base import ContentFile
         return ContentFile(data)
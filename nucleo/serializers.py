@@ -1,13 +1,24 @@
 from rest_framework import serializers
-from .models import Paciente, ImagemExame
+from .models import Paciente, ImagemExame, formatar_cpf
+from .seguranca.crypto_utils import blind_index
 
 
 class PacienteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Paciente
         fields = ['uuid_paciente', 'nome_completo', 'cpf', 'data_nascimento', 'data_cadastro','sintomas',
-            'possivel_diagnostico']
-        read_only_fields = ['uuid_paciente', 'data_cadastro']
+            'possivel_diagnostico', 'versao', 'data_atualizacao']
+        read_only_fields = ['uuid_paciente', 'data_cadastro', 'versao', 'data_atualizacao']
+
+    def validate_cpf(self, valor):
+        # O CPF é cifrado com nonce aleatório: a unicidade é conferida pelo índice cego
+        if valor:
+            existentes = Paciente.objects.filter(cpf_indice=blind_index(formatar_cpf(valor)[1]))
+            if self.instance is not None:
+                existentes = existentes.exclude(pk=self.instance.pk)
+            if existentes.exists():
+                raise serializers.ValidationError("Já existe paciente com este CPF.")
+        return valor
 
     def validate(self, attrs):
         # Validação simples ANVISA (nome obrigatório)
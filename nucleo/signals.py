@@ -0,0 +1,150 @@
+"""
+Signals do núcleo (conectados em NucleoConfig.ready):
+- mantêm AgregadoDiarioLaudos em dia a cada save/delete de AnaliseImagem e Laudo;
+- sobem a versão da coleção de pacientes (ETag da listagem);
+- invalidam as respostas em cache que dependem do registro (cache_respostas);
+- mantêm o índice cego do nome do paciente (busca_nome).
+
+O pre_save guarda a chave (dia, instituição, resultado) em que o registro
+estava contado; o post_save move a contagem se a chave mudou.
+"""
+
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import agregados, busca_nome, cache_respostas
+from .models import AnaliseImagem, ContadorVersao, Laudo, Paciente
+
+# Campos que mudam a chave do agregado (saves com update_fields sem eles são ignorados)
+_CAMPOS_ANALISE = {'data_hora_solicitacao', 'imagem', 'resultado_classificacao'}
+_CAMPOS_LAUDO = {'data_hora_emissao', 'analise'}
+
+_IGNORAR = object()
+
+
+def _afeta(update_fields, campos):
+    return update_fields is None or bool(campos.intersection(update_fields))
+
+
+# --- Análises ---
+
+@receiver(pre_save, sender=AnaliseImagem)
+def guardar_chave_analise(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _afeta(update_fields, _CAMPOS_ANALISE):
+        instance._chave_agregado = _IGNORAR
+        return
+    anterior = None
+    if not instance._state.adding:
+        anterior = AnaliseImagem.objects.filter(pk=instance.pk).values_list(
+            'data_hora_solicitacao', 'imagem__instituicao_id', 'resultado_classificacao'
+        ).first()
+        if anterior:
+            anterior = (agregados.dia_local(anterior[0]), anterior[1], anterior[2])
+    instance._chave_agregado = anterior
+
+
+@receiver(post_save, sender=AnaliseImagem)
+def atualizar_agregado_analise(sender, instance, created=False, **kwargs):
+    anterior = instance.__dict__.pop('_chave_agregado', _IGNORAR)
+    if anterior is _IGNORAR:
+        return
+    atual = agregados.chave_analise(instance)
+    agregados.mover(anterior, atual, analises=1)
+
+    # O laudo é contado com o resultado da análise: acompanha a mudança
+    if anterior is not None and anterior[1:] != atual[1:]:
+        emissao = Laudo.objects.filter(analise_id=instance.pk).values_list('data_hora_emissao', flat=True).first()
+        if emissao:
+            dia = agregados.dia_local(emissao)
+            agregados.mover((dia,) + anterior[1:], (dia,) + atual[1:], laudos=1)
+
+
+@receiver(pre_delete, sender=AnaliseImagem)
+def guardar_chave_analise_removida(sender, instance, **kwargs):
+    instance._chave_agregado = agregados.chave_analise(instance)
+
+
+@receiver(post_delete, sender=AnaliseImagem)
+def descontar_analise_removida(sender, instance, **kwargs):
+    chave = instance.__dict__.pop('_chave_agregado', None)
+    if chave:
+        agregados.ajustar(chave, analises=-1)
+
+
+# --- Laudos ---
+
+@receiver(pre_save, sender=Laudo)
+def guardar_chave_laudo(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _afeta(update_fields, _CAMPOS_LAUDO):
+        instance._chave_agregado = _IGNORAR
+        return
+    anterior = None
+    if not instance._state.adding:
+        anterior = Laudo.objects.filter(pk=instance.pk).values_list(
+            'data_hora_emissao', 'analise__imagem__instituicao_id', 'analise__resultado_classificacao'
+        ).first()
+        if anterior:
+            anterior = (agregados.dia_local(anterior[0]), anterior[1], anterior[2])
+    instance._chave_agregado = anterior
+
+
+@receiver(post_save, sender=Laudo)
+def atualizar_agregado_laudo(sender, instance, **kwargs):
+    anterior = instance.__dict__.pop('_chave_agregado', _IGNORAR)
+    if anterior is _IGNORAR:
+        return
+    agregados.mover(anterior, agregados.chave_laudo(instance), laudos=1)
+
+
+@receiver(pre_delete, sender=Laudo)
+def guardar_chave_laudo_removido(sender, instance, **kwargs):
+    instance._chave_agregado = agregados.chave_laudo(instance)
+
+
+@receiver(post_delete, sender=Laudo)
+def descontar_laudo_removido(sender, instance, **kwargs):
+    chave = instance.__dict__.pop('_chave_agregado', None)
+    if chave:
+        agregados.ajustar(chave, laudos=-1)
+
+
+# --- Pacientes (versão da coleção) ---
+
+@receiver(post_save, sender=Paciente)
+@receiver(post_delete, sender=Paciente)
+def versionar_pacientes(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ContadorVersao.incrementar('pacientes')
+
+
+@receiver(post_init, sender=Paciente)
+def guardar_nome_paciente(sender, instance, **kwargs):
+    # Nome decifrado como foi carregado (o cifrado muda a cada save: nonce aleatório)
+    instance._nome_indexado = instance.__dict__.get('nome_completo', _IGNORAR)
+
+
+@receiver(post_save, sender=Paciente)
+def indexar_nome_paciente(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or not _afeta(update_fields, {'nome_completo'}):
+        return
+    # Um PUT que não mexe no nome não reescreve os tokens
+    if created or instance.__dict__.get('_nome_indexado', _IGNORAR) != instance.nome_completo:
+        busca_nome.indexar(instance)
+        instance._nome_indexado = instance.nome_completo
+
+
+# --- Cache de respostas ---
+
+@receiver(post_save, sender=Paciente)
+@receiver(post_delete, sender=Paciente)
+def invalidar_cache_paciente(sender, instance, **kwargs):
+    # O detalhe é chaveado por Paciente.versao; 'pacientes': o histórico de laudos mostra o nome
+    cache_respostas.invalidar('pacientes')
+
+
+@receiver(post_save, sender=Laudo)
+@receiver(post_delete, sender=Laudo)
+@receiver(post_save, sender=AnaliseImagem)
+@receiver(post_delete, sender=AnaliseImagem)
+def invalidar_cache_laudos(sender, instance, **kwargs):
+    cache_respostas.invalidar('laudos')
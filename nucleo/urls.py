@@ -1,12 +1,38 @@
 from django.urls import path
-from .views import PacienteListCreateView, PacienteDetailView, UploadImagemExameView
+from .views import PacienteListCreateView, PacienteDetailView, PacienteImportacaoView, PacienteBuscaView, PacienteLinhaDoTempoView, UploadImagemExameView
+from .views_pdf import LaudoPdfView, status_renderizacao_pdf, enfileirar_impressao_laudo
+from .views_laudos import HistoricoLaudosView, RevisaoLaudoView
+from . import views_async
+from .views_relatorios import ExportacaoLaudosZipView, RelatorioLaudosView, RelatorioLaudosResumoView
 
 urlpatterns = [
     # --- ROTAS DE PACIENTES (ESSENCIAIS PARA O ALUNO 5) ---
     path('pacientes/', PacienteListCreateView.as_view(), name='paciente-list-create'),
+    path('pacientes/busca/', PacienteBuscaView.as_view(), name='paciente-busca'),
+    path('pacientes/importar/', PacienteImportacaoView.as_view(), name='paciente-importar'),
     path('pacientes/<uuid:uuid_paciente>/', PacienteDetailView.as_view(), name='paciente-detail'),
+    path('pacientes/<uuid:uuid_paciente>/linha-do-tempo/', PacienteLinhaDoTempoView.as_view(),
+         name='paciente-linha-do-tempo'),
     
     path('pacientes/<uuid:uuid_paciente>/upload-imagem/', 
          UploadImagemExameView.as_view(), 
          name='upload-imagem-exame'),
-]
\ No newline at end of file
+
+    # --- PDF DE LAUDOS (renderização em segundo plano) ---
+    path('laudos/<int:laudo_id>/pdf/', LaudoPdfView.as_view(), name='laudo-pdf'),
+    path('laudos/pdf/jobs/<int:job_id>/', status_renderizacao_pdf, name='laudo-pdf-status'),
+    path('laudos/<int:laudo_id>/imprimir/', enfileirar_impressao_laudo, name='laudo-imprimir'),
+    path('laudos/exportar/', ExportacaoLaudosZipView.as_view(), name='laudos-exportar-zip'),
+    path('laudos/historico/', HistoricoLaudosView.as_view(), name='laudos-historico'),
+    path('laudos/<int:laudo_id>/revisao/', RevisaoLaudoView.as_view(), name='laudo-revisao'),
+
+    # --- VARIANTES ASSÍNCRONAS (servidor ASGI; ver nucleo/views_async.py) ---
+    path('async/pacientes/<uuid:uuid_paciente>/upload-imagem/', views_async.upload_imagem_exame,
+         name='upload-imagem-exame-async'),
+    path('async/analises/<int:analise_id>/', views_async.status_analise, name='analise-status-async'),
+    path('async/laudos/<int:laudo_id>/pdf/', views_async.laudo_pdf, name='laudo-pdf-async'),
+
+    # --- RELATÓRIOS ---
+    path('relatorios/laudos/', RelatorioLaudosView.as_view(), name='relatorio-laudos'),
+    path('relatorios/laudos/resumo/', RelatorioLaudosResumoView.as_view(), name='relatorio-laudos-resumo'),
+]
@@ -2,37 +2,61 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from django.http import Http404
+import hashlib
 import logging # Importar logging para usar no log provisório
 
 # SERIALIZERS E MODELS DO PACIENTE
-from .models import Paciente, ImagemExame
+from .models import Paciente, ImagemExame, ContadorVersao, HistoricoLaudo
+from django.db.models import Prefetch
+from django.urls import reverse
 from .serializers import PacienteSerializer, ImagemExameSerializer
+from .metricas import cronometrar
+from .paginacao import PaginacaoKeyset
+from .condicional import aplicar_validadores, nao_modificado, resposta_304
+from .cache_respostas import marcar, obter_ou_calcular
+from django.utils.dateparse import parse_datetime
+from .importacao_pacientes import formato_do_arquivo, importar_pacientes, ler_registros
+from .busca_nome import buscar, termos_busca
+from .limites import UploadImagemThrottle, vaga_processamento
 
 # PARA UPLOAD DE ARQUIVOS
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import IsAuthenticated
 
 # ---  IMPORTAÇÕES PARA INTEGRAÇÃO E AUDITORIA ---
-# from nucleo.auditoria import audit_log  <-- COMENTADO POIS O ARQUIVO NÃO EXISTE AINDA
+from nucleo.auditoria import audit_log
 from weka_adapter.integration import processar_analise_automatica 
 # ------------------------------------------------------
 
-# --- FUNÇÃO DE AUDITORIA PROVISÓRIA (Para corrigir o erro) ---
-def audit_log(request, acao, recurso, detalhe):
-    """
-    Função temporária para o código não quebrar enquanto
-    o arquivo nucleo/auditoria.py não é criado.
-    """
-    print(f"\n[AUDITORIA] Usuário: {request.user} | Ação: {acao} | Recurso: {recurso}")
-    print(f"[DETALHE] {detalhe}\n")
-# -------------------------------------------------------------
+
+def _etag_paciente(uuid_paciente, versao):
+    return f'"{uuid_paciente}-v{versao}"'
+
+
+def _sem_cache_compartilhado(resposta):
+    # Dados de paciente: só o cliente guarda, e sempre revalida (ETag)
+    resposta['Cache-Control'] = 'private, no-cache'
+    return resposta
 
 
 # LISTAR + CRIAR
 class PacienteListCreateView(APIView):
     def get(self, request):
-        pacientes = Paciente.objects.all().order_by('-data_cadastro')
+        # ETag da página = versão da coleção + parâmetros (cursor, tamanho).
+        # Uma consulta de uma linha; nenhum paciente é lido se nada mudou.
+        versao, atualizado_em = ContadorVersao.atual('pacientes')
+        parametros = hashlib.md5(request.META.get('QUERY_STRING', '').encode()).hexdigest()[:12]
+        etag = f'"pacientes-v{versao}-{parametros}"'
+        if nao_modificado(request, etag, atualizado_em):
+            return resposta_304(etag, atualizado_em)
+
+        # Paginação por chave (data_cadastro, id): ?cursor=...&tamanho=50
+        paginacao = PaginacaoKeyset('data_cadastro')
+        pacientes = paginacao.paginate_queryset(Paciente.objects.all(), request, self)
         serializer = PacienteSerializer(pacientes, many=True)
-        return Response(serializer.data, status=200)
+        resposta = paginacao.get_paginated_response(serializer.data)
+        return _sem_cache_compartilhado(aplicar_validadores(resposta, etag, atualizado_em))
 
     def post(self, request):
         serializer = PacienteSerializer(data=request.data)
@@ -42,19 +66,83 @@ class PacienteListCreateView(APIView):
         return Response(serializer.errors, status=400)
 
 
+# BUSCA POR NOME (índice cego: só os pacientes encontrados são decifrados)
+class PacienteBuscaView(APIView):
+    """GET ?nome=jos silv[&limite=20] -> pacientes com palavras que começam pelos termos."""
+    permission_classes = [IsAuthenticated]
+    LIMITE_MAXIMO = 100
+
+    def get(self, request):
+        texto = request.query_params.get('nome', '')
+        if not termos_busca(texto):
+            return Response({"erro": "Informe em 'nome' ao menos um termo com 3 letras ou mais."}, status=400)
+        try:
+            limite = max(1, min(int(request.query_params.get('limite', 20)), self.LIMITE_MAXIMO))
+        except ValueError:
+            return Response({"erro": "'limite' deve ser um número inteiro."}, status=400)
+
+        pacientes = buscar(texto, limite=limite)
+        audit_log(request, 'ACESSO_RELATORIO', 'Paciente', f"BUSCA por nome: {len(pacientes)} resultado(s)")
+        return Response({"resultados": PacienteSerializer(pacientes, many=True).data})
+
+
+# IMPORTAÇÃO EM LOTE (CSV / NDJSON)
+class PacienteImportacaoView(APIView):
+    """
+    POST multipart com `arquivo` (.csv ou .ndjson; ou informe `formato`).
+    Responde com o total criado e, por linha, duplicados e erros.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        arquivo = request.FILES.get('arquivo')
+        if not arquivo:
+            return Response({"erro": "Envie o arquivo no campo 'arquivo'."}, status=400)
+        try:
+            formato = formato_do_arquivo(arquivo.name, request.data.get('formato'))
+        except ValueError as exc:
+            return Response({"erro": str(exc)}, status=400)
+
+        resultado = importar_pacientes(ler_registros(arquivo, formato))
+        audit_log(request, 'IMPORTACAO_PACIENTES', 'Paciente', f"{resultado.criados} criados, "
+                  f"{len(resultado.duplicados)} duplicados, {len(resultado.erros)} com erro")
+        return Response(resultado.como_dict(), status=200)
+
+
 # DETALHE + UPDATE + DELETE
 class PacienteDetailView(APIView):
     def get(self, request, uuid_paciente):
-        paciente = get_object_or_404(Paciente, uuid_paciente=uuid_paciente)
-        serializer = PacienteSerializer(paciente)
-        return Response(serializer.data, status=200)
+        # Versão no banco (sem carregar/decifrar o paciente): responde 304 e é a chave do cache
+        atual = Paciente.objects.filter(uuid_paciente=uuid_paciente).values_list(
+            'versao', 'data_atualizacao'
+        ).first()
+        if atual is None:
+            raise Http404
+        etag = _etag_paciente(uuid_paciente, atual[0])
+        if nao_modificado(request, etag, atual[1]):
+            return resposta_304(etag, atual[1])
+
+        # Cache de leitura (cifrado) da versão atual: outra versão é outra chave, então
+        # uma edição feita por outro processo nunca devolve o conteúdo antigo
+        dados, acerto = obter_ou_calcular(
+            request, 'paciente_detalhe', tags=[], versao=atual[0],
+            calcular=lambda: PacienteSerializer(get_object_or_404(Paciente, uuid_paciente=uuid_paciente)).data,
+        )
+        # Validadores do corpo devolvido (uma edição concorrente pode ter entrado no meio)
+        resposta = Response(dados, status=200)
+        aplicar_validadores(resposta, _etag_paciente(uuid_paciente, dados['versao']),
+                            parse_datetime(dados['data_atualizacao']))
+        return marcar(_sem_cache_compartilhado(resposta), acerto)
 
     def put(self, request, uuid_paciente):
         paciente = get_object_or_404(Paciente, uuid_paciente=uuid_paciente)
         serializer = PacienteSerializer(paciente, data=request.data, partial=True)
         if serializer.is_valid():
             paciente = serializer.save()
-            return Response(PacienteSerializer(paciente).data, status=200)
+            resposta = Response(PacienteSerializer(paciente).data, status=200)
+            aplicar_validadores(resposta, _etag_paciente(paciente.uuid_paciente, paciente.versao), paciente.data_atualizacao)
+            return _sem_cache_compartilhado(resposta)
         return Response(serializer.errors, status=400)
 
     def delete(self, request, uuid_paciente):
@@ -63,69 +151,168 @@ class PacienteDetailView(APIView):
         return Response({"mensagem": "Paciente deletado com sucesso."}, status=204)
 
 
-# --- [AQUI ESTÁ A GRANDE MUDANÇA] ---
-# Substituímos a classe antiga por essa versão "Turbinada"
+# LINHA DO TEMPO (paciente -> imagens -> análise -> laudo -> versões)
+def _laudo_linha_do_tempo(request, laudo):
+    responsavel = laudo.usuario_responsavel
+    return {
+        "id": laudo.id,
+        "codigo_verificacao": laudo.codigo_verificacao,
+        "data_emissao": laudo.data_hora_emissao,
+        "responsavel": responsavel.usuario.username if responsavel else None,
+        "confirmou_concordancia": laudo.confirmou_concordancia,
+        "classificacao_corrigida": laudo.classificacao_corrigida,
+        "revisado_em": laudo.revisado_em,
+        "texto": laudo.texto_laudo_completo,
+        "pdf": request.build_absolute_uri(reverse('laudo-pdf', args=[laudo.id])),
+        "pdf_gerado_em": laudo.pdf_gerado_em,
+        "versoes_anteriores": [
+            {
+                "data_alteracao": versao.data_hora_alteracao,
+                "usuario": versao.usuario_responsavel.usuario.username,
+                "texto_anterior": versao.texto_anterior,
+            }
+            for versao in laudo.historicolaudo_set.all()
+        ],
+    }
 
-class UploadImagemExameView(APIView):
-    parser_classes = [MultiPartParser, FormParser]
 
-    def post(self, request, uuid_paciente):
-        # 1. Pega o paciente
+def _item_linha_do_tempo(request, imagem):
+    # Sem análise/laudo o select_related guarda None: getattr não consulta o banco
+    analise = getattr(imagem, 'analiseimagem', None)
+    laudo = getattr(analise, 'laudo', None) if analise else None
+    return {
+        "imagem": {
+            "id": imagem.id,
+            "data_upload": imagem.data_upload,
+            "tipo_imagem": imagem.tipo_imagem,
+            "descricao_opcional": imagem.descricao_opcional,
+            "instituicao": imagem.instituicao.nome_instituicao,
+        },
+        "analise": {
+            "id": analise.id,
+            "resultado_classificacao": analise.resultado_classificacao,
+            "score_confianca": analise.score_confianca,
+            "data_hora_solicitacao": analise.data_hora_solicitacao,
+            "data_hora_conclusao": analise.data_hora_conclusao,
+            "modelo_versao": analise.modelo_versao,
+        } if analise else None,
+        "laudo": _laudo_linha_do_tempo(request, laudo) if laudo else None,
+    }
+
+
+class PacienteLinhaDoTempoView(APIView):
+    """
+    GET /api/pacientes/<uuid>/linha-do-tempo/?cursor=...&tamanho=20
+
+    Paciente e, paginadas por chave (mais recentes primeiro), as imagens com
+    análise, laudo, link do PDF e versões anteriores do laudo. Três consultas
+    por página, não importa o tamanho do histórico: paciente, imagens com
+    análise/laudo/responsável (JOINs) e versões dos laudos da página.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, uuid_paciente):
         paciente = get_object_or_404(Paciente, uuid_paciente=uuid_paciente)
+        imagens = ImagemExame.objects.filter(paciente=paciente).select_related(
+            'instituicao',
+            'analiseimagem__laudo__usuario_responsavel__usuario',
+        ).prefetch_related(
+            Prefetch(
+                'analiseimagem__laudo__historicolaudo_set',
+                queryset=HistoricoLaudo.objects.select_related('usuario_responsavel__usuario')
+                .order_by('-data_hora_alteracao', '-id'),
+            )
+        )
 
-        # 2. Prepara os dados
-        dados = request.data.copy()
-        dados['paciente'] = paciente.id
+        paginacao = PaginacaoKeyset('data_upload')
+        paginacao.tamanho_padrao = 20
+        pagina = paginacao.paginate_queryset(imagens, request, self)
+        audit_log(request, 'ACESSO_RELATORIO', 'Paciente', f"LINHA DO TEMPO paciente_uuid={uuid_paciente}")
 
-        # Tenta pegar a instituição do médico logado (se não vier na requisição)
-        if 'instituicao' not in dados and hasattr(request.user, 'perfilusuario'):
-             dados['instituicao'] = request.user.perfilusuario.instituicao.id
+        itens = paginacao.get_paginated_response([_item_linha_do_tempo(request, imagem) for imagem in pagina]).data
+        return _sem_cache_compartilhado(Response({"paciente": PacienteSerializer(paciente).data, **itens}))
 
-        serializer = ImagemExameSerializer(data=dados)
 
-        if serializer.is_valid():
-            # 3. SALVA A IMAGEM REAL (Aluno 5)
-            # Adicionamos 'usuario_upload' para saber quem mandou
+# --- [AQUI ESTÁ A GRANDE MUDANÇA] ---
+# Substituímos a classe antiga por essa versão "Turbinada"
+
+def processar_upload(request, paciente):
+    """
+    Salva a imagem enviada e dispara a análise automática.
+    Retorna (dados, status). Usado pela view síncrona e pela assíncrona
+    (nucleo/views_async.py), que a chama via sync_to_async.
+    """
+    # 2. Prepara os dados
+    dados = request.data.copy()
+    dados['paciente'] = paciente.id
+
+    # Tenta pegar a instituição do médico logado (se não vier na requisição)
+    if 'instituicao' not in dados and hasattr(request.user, 'perfilusuario'):
+         dados['instituicao'] = request.user.perfilusuario.instituicao_id
+
+    serializer = ImagemExameSerializer(data=dados)
+
+    if serializer.is_valid():
+        # 3. SALVA A IMAGEM REAL (Aluno 5)
+        # Adicionamos 'usuario_upload' para saber quem mandou
+        with cronometrar('upload'):
             imagem = serializer.save(usuario_upload=request.user)
-            
-            # 4. AUDITORIA (Segurança)
-            # Agora chama a função definida neste arquivo acima
-            audit_log(
-                request=request,
-                acao="UPLOAD_IMAGEM",
-                recurso="ImagemExame",
-                detalhe=f"imagem_id={imagem.id} paciente_uuid={paciente.uuid_paciente}",
-            )
+        
+        # 4. AUDITORIA (Segurança)
+        # Vai para o diário da auditoria (nucleo/auditoria.py), sem INSERT aqui
+        audit_log(
+            request=request,
+            acao="UPLOAD_IMAGEM",
+            recurso="ImagemExame",
+            detalhe=f"imagem_id={imagem.id} paciente_uuid={paciente.uuid_paciente}",
+        )
 
-            # 5. GATILHO DA IA (A mágica da Integração)
-            # Aqui chamamos o arquivo que você criou no weka_adapter
-            print(f"--- Iniciando análise automática para imagem {imagem.id} ---")
-            
-            try:
+        # 5. GATILHO DA IA (A mágica da Integração)
+        # Aqui chamamos o arquivo que você criou no weka_adapter
+        print(f"--- Iniciando análise automática para imagem {imagem.id} ---")
+        
+        try:
+            with cronometrar('integracao_ia'):
                 laudo = processar_analise_automatica(
                     imagem_id=imagem.id,
                     usuario_solicitante=request.user,
                     ip_cliente=request.META.get('REMOTE_ADDR')
                 )
 
-                # 6. RESPOSTA TURBINADA
-                # Devolvemos os dados da imagem + o resultado da IA na hora!
-                resposta = ImagemExameSerializer(imagem).data
-                
-                if laudo:
-                    resposta['status_analise'] = "Concluída com Sucesso"
-                    resposta['resultado_ia'] = laudo.analise.resultado_classificacao
-                    resposta['confianca_ia'] = laudo.analise.score_confianca
-                    resposta['download_laudo'] = laudo.caminho_pdf.url if laudo.caminho_pdf else None
-                else:
-                    resposta['status_analise'] = "Erro na Análise Automática (Verifique logs)"
+            # 6. RESPOSTA TURBINADA
+            # Devolvemos os dados da imagem + o resultado da IA na hora!
+            resposta = ImagemExameSerializer(imagem).data
             
-            except Exception as e:
-                # Tratamento de erro caso a integração falhe, para não travar o upload
-                print(f"ERRO NA INTEGRAÇÃO: {e}")
-                resposta = ImagemExameSerializer(imagem).data
-                resposta['status_analise'] = "Falha na integração IA"
+            if laudo:
+                resposta['status_analise'] = "Concluída com Sucesso"
+                resposta['resultado_ia'] = laudo.analise.resultado_classificacao
+                resposta['confianca_ia'] = laudo.analise.score_confianca
+                resposta['download_laudo'] = laudo.caminho_pdf.url if laudo.caminho_pdf else None
+            elif getattr(getattr(imagem, 'analiseimagem', None), 'resultado_classificacao', None) == 'AGUARDANDO':
+                # Classificador lento/indisponível: análise fica na fila para processamento posterior
+                resposta['status_analise'] = "Aguardando Processamento (IA)"
+            else:
+                resposta['status_analise'] = "Erro na Análise Automática (Verifique logs)"
+        
+        except Exception as e:
+            # Tratamento de erro caso a integração falhe, para não travar o upload
+            print(f"ERRO NA INTEGRAÇÃO: {e}")
+            resposta = ImagemExameSerializer(imagem).data
+            resposta['status_analise'] = "Falha na integração IA"
+
+        return resposta, status.HTTP_201_CREATED
+
+    return serializer.errors, 400
 
-            return Response(resposta, status=status.HTTP_201_CREATED)
 
-        return Response(serializer.errors, status=400)
\ No newline at end of file
+class UploadImagemExameView(APIView):
+    parser_classes = [MultiPartParser, FormParser]
+    # Balde por usuário/instituição (429) e vaga de CPU para a classificação (503)
+    throttle_classes = [UploadImagemThrottle]
+
+    def post(self, request, uuid_paciente):
+        # 1. Pega o paciente
+        paciente = get_object_or_404(Paciente, uuid_paciente=uuid_paciente)
+        with vaga_processamento():
+            dados, codigo = processar_upload(request, paciente)
+        return Response(dados, status=codigo)
\ No newline at end of file
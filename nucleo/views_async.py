@@ -0,0 +1,247 @@
+"""
+Variantes assíncronas (ASGI) do upload de imagem, do status da análise e
+do download do PDF do laudo, em /api/async/...
+
+Servidas por um servidor ASGI (uvicorn/daphne com projeto_sad.asgi), o
+corpo do upload é recebido e o PDF é enviado pelo loop de eventos: um
+cliente lento ocupa uma corrotina, não uma thread do servidor.
+
+- consultas simples usam o ORM assíncrono (afirst/acreate);
+- o que é síncrono por natureza (gravação cifrada da imagem seguida da
+  classificação, várias escritas no banco) roda em sync_to_async, na
+  thread das conexões do banco;
+- trabalho só de CPU/disco (fingerprint do laudo, leitura do PDF) vai para
+  threads avulsas (thread_sensitive=False).
+
+Mesmas regras e mesmo formato de resposta das views síncronas.
+Benchmark WSGI x ASGI com clientes lentos: `python manage.py benchmark_asgi`.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from weka_adapter.services.fila_pdf import solicitar_renderizacao
+from weka_adapter.services.report_generator import ReportService
+
+from .auditoria import registrar
+from .condicional import aplicar_validadores, if_range_confere, nao_modificado, resposta_304
+from .limites import exigir_token, vaga_processamento
+from .models import AnaliseImagem, Laudo, LaudoImpressao, Paciente, RenderizacaoPDF
+from .views import processar_upload
+from .views_pdf import TAMANHO_BLOCO, _etag_pdf, _intervalo, _job_para_dict
+
+
+# ============================================
+# APOIO
+# ============================================
+def _json(dados, codigo=status.HTTP_200_OK):
+    # Mesmo encoder das APIViews (Decimal, datetime, UUID)
+    return HttpResponse(JSONRenderer().render(dados), status=codigo, content_type='application/json')
+
+
+def _erro(excecao):
+    resposta = _json({"detail": str(excecao.detail)}, excecao.status_code)
+    # 429/503 do controle de admissão (mesmo cabeçalho do exception handler do DRF)
+    if getattr(excecao, 'wait', None):
+        resposta['Retry-After'] = '%d' % excecao.wait
+    return resposta
+
+
+def _autenticar_sync(request):
+    """
+    Autentica com as classes padrão do DRF (sessão/básica; force_authenticate
+    nos testes). Retorna (request do DRF, resposta de erro ou None), com o
+    mesmo 401/403 que uma APIView daria.
+    """
+    drf_request = Request(
+        request,
+        parsers=[MultiPartParser(), FormParser()],
+        authenticators=[classe() for classe in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        if drf_request.user.is_authenticated:
+            return drf_request, None
+        excecao = NotAuthenticated()
+    except APIException as exc:
+        excecao = exc
+
+    autenticadores = drf_request.authenticators
+    cabecalho = autenticadores[0].authenticate_header(drf_request) if autenticadores else None
+    if cabecalho:
+        resposta = _json({"detail": str(excecao.detail)}, status.HTTP_401_UNAUTHORIZED)
+        resposta['WWW-Authenticate'] = cabecalho
+    else:
+        resposta = _json({"detail": str(excecao.detail)}, status.HTTP_403_FORBIDDEN)
+    return drf_request, resposta
+
+
+_autenticar = sync_to_async(_autenticar_sync)
+
+
+def _laudos():
+    return Laudo.objects.select_related(
+        'analise__imagem__paciente', 'analise__imagem__instituicao', 'usuario_responsavel__usuario'
+    )
+
+
+async def _registrar_visualizacao(request, usuario, laudo, detalhe):
+    ip = request.META.get('REMOTE_ADDR')
+    await LaudoImpressao.objects.acreate(laudo=laudo, usuario=usuario, ip_origem=ip)
+    # Diário da auditoria (escrita + fsync): fora do loop de eventos
+    await sync_to_async(registrar)(
+        'LAUDO_IMPRESSO', 'PDF Laudo', f"{laudo.codigo_verificacao} ({detalhe})", usuario=usuario, ip_origem=ip
+    )
+
+
+def _abrir(storage, nome):
+    return storage.open(nome, 'rb'), storage.size(nome)
+
+
+async def _ler_trecho(arquivo, inicio, fim):
+    """Gerador assíncrono: cada leitura de bloco roda fora do loop de eventos."""
+    ler = sync_to_async(arquivo.read, thread_sensitive=False)
+    try:
+        await sync_to_async(arquivo.seek, thread_sensitive=False)(inicio)
+        restante = fim - inicio + 1
+        while restante > 0:
+            bloco = await ler(min(TAMANHO_BLOCO, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+    finally:
+        await sync_to_async(arquivo.close, thread_sensitive=False)()
+
+
+# ============================================
+# VIEWS
+# ============================================
+@csrf_exempt  # CSRF de sessão é conferido pela SessionAuthentication do DRF
+@require_POST
+async def upload_imagem_exame(request, uuid_paciente):
+    """POST /api/async/pacientes/<uuid>/upload-imagem/ (mesmo contrato de UploadImagemExameView)."""
+    drf_request, negado = await _autenticar(request)
+    if negado:
+        return negado
+    usuario = drf_request.user
+
+    # Só o id: nenhum campo cifrado do paciente é lido
+    paciente = await Paciente.objects.only('id', 'uuid_paciente').filter(uuid_paciente=uuid_paciente).afirst()
+    if paciente is None:
+        return _erro(NotFound())
+
+    def processar():
+        exigir_token(drf_request, 'upload_imagem')
+        with vaga_processamento():
+            return processar_upload(drf_request, paciente)
+
+    try:
+        dados, codigo = await sync_to_async(processar)()
+    except APIException as exc:
+        return _erro(exc)
+    return _json(dados, codigo)
+
+
+@require_GET
+async def status_analise(request, analise_id):
+    """GET /api/async/analises/<id>/ -> situação da análise, do laudo e do PDF."""
+    _drf_request, negado = await _autenticar(request)
+    if negado:
+        return negado
+
+    analise = await AnaliseImagem.objects.filter(id=analise_id).values(
+        'id', 'imagem_id', 'resultado_classificacao', 'score_confianca',
+        'data_hora_solicitacao', 'data_hora_conclusao',
+    ).afirst()
+    if analise is None:
+        return _erro(NotFound())
+
+    analise['laudo'] = await Laudo.objects.filter(analise_id=analise_id).values(
+        'id', 'codigo_verificacao', 'pdf_gerado_em',
+    ).afirst()
+    if analise['laudo']:
+        analise['laudo']['renderizacao'] = await RenderizacaoPDF.objects.filter(
+            laudo_id=analise['laudo']['id']
+        ).order_by('-id').values('id', 'status', 'data_criacao', 'data_conclusao').afirst()
+    return _json(analise)
+
+
+@require_GET
+async def laudo_pdf(request, laudo_id):
+    """GET /api/async/laudos/<id>/pdf/ (mesmas regras de LaudoPdfView.get: 202, 304, Range/206)."""
+    drf_request, negado = await _autenticar(request)
+    if negado:
+        return negado
+    usuario = drf_request.user
+
+    laudo = await _laudos().filter(id=laudo_id).afirst()
+    if laudo is None:
+        return _erro(NotFound())
+
+    if not await sync_to_async(ReportService.pdf_atualizado, thread_sensitive=False)(laudo):
+        def enfileirar():
+            exigir_token(drf_request, 'laudo_pdf')
+            job, _criado = solicitar_renderizacao(
+                laudo, usuario_solicitante=usuario, ip_cliente=request.META.get('REMOTE_ADDR')
+            )
+            return _job_para_dict(drf_request, job)
+
+        try:
+            resposta = _json(await sync_to_async(enfileirar)(), status.HTTP_202_ACCEPTED)
+        except APIException as exc:
+            return _erro(exc)
+        resposta['Retry-After'] = '2'
+        return resposta
+
+    etag = _etag_pdf(laudo)
+    ultima_modificacao = laudo.pdf_gerado_em
+
+    if nao_modificado(request, etag, ultima_modificacao):
+        await _registrar_visualizacao(request, usuario, laudo, "cache do cliente")
+        return resposta_304(etag)
+
+    arquivo, tamanho = await sync_to_async(_abrir, thread_sensitive=False)(
+        laudo.caminho_pdf.storage, laudo.caminho_pdf.name
+    )
+
+    intervalo = None
+    cabecalho_range = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if cabecalho_range and (not if_range or if_range_confere(if_range, etag)):
+        intervalo = _intervalo(cabecalho_range, tamanho)
+
+    if intervalo is False:
+        await sync_to_async(arquivo.close, thread_sensitive=False)()
+        resposta = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        resposta['Content-Range'] = f'bytes */{tamanho}'
+        return resposta
+
+    if intervalo:
+        inicio, fim = intervalo
+        if inicio == 0:
+            await _registrar_visualizacao(request, usuario, laudo, "download parcial")
+        resposta = StreamingHttpResponse(
+            _ler_trecho(arquivo, inicio, fim),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type='application/pdf',
+        )
+        resposta['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+    else:
+        inicio, fim = 0, tamanho - 1
+        await _registrar_visualizacao(request, usuario, laudo, "download")
+        resposta = StreamingHttpResponse(_ler_trecho(arquivo, inicio, fim), content_type='application/pdf')
+
+    resposta['Content-Length'] = str(fim - inicio + 1)
+    resposta['Content-Disposition'] = f'inline; filename="laudo_{laudo.codigo_verificacao}.pdf"'
+    resposta['Accept-Ranges'] = 'bytes'
+    aplicar_validadores(resposta, etag, ultima_modificacao)
+    resposta['Cache-Control'] = 'private, no-cache'
+    return resposta
@@ -1,35 +1,109 @@
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
 from rest_framework.views import APIView
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import Laudo, LogAuditoria
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from .auditoria import audit_log
+from .cache_respostas import marcar, obter_ou_calcular
+from .models import Laudo, PerfilUsuario
+from .paginacao import PaginacaoKeyset
+from .renderers import CSVRenderer, JSONArrayRenderer, NDJSONRenderer, formato_streaming, resposta_streaming
+
+# Laudos lidos (e pacientes decifrados) por ida ao banco nas exportações
+TAMANHO_LOTE = 500
+
+CAMPOS_HISTORICO = ["id", "paciente", "resultado", "data_emissao", "codigo_verificacao", "pdf"]
 
 
+def _linha_historico(laudo):
+    return {
+        "id": laudo.id,
+        "paciente": str(laudo.analise.imagem.paciente.nome_completo),
+        "resultado": laudo.analise.resultado_classificacao,
+        "data_emissao": laudo.data_hora_emissao,
+        "codigo_verificacao": laudo.codigo_verificacao,
+        "pdf": laudo.caminho_pdf.name or None,
+    }
+
 
 class HistoricoLaudosView(APIView):
+    """
+    GET /api/laudos/historico/              -> JSON paginado (?cursor=...&tamanho=50)
+    GET /api/laudos/historico/?format=csv   -> CSV em streaming
+    GET /api/laudos/historico/?format=ndjson -> um JSON por linha, em streaming
+    GET /api/laudos/historico/?format=json-array -> todos os laudos num array JSON, em streaming
+    """
     permission_classes = [IsAuthenticated]
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + [CSVRenderer, NDJSONRenderer, JSONArrayRenderer]
 
     def get(self, request):
         laudos = Laudo.objects.select_related(
             'analise__imagem__paciente',
             'usuario_responsavel'
-        ).order_by('-data_hora_emissao')
-
-        resultado = []
-        for laudo in laudos:
-            resultado.append({
-                "id": laudo.id,
-                "paciente": str(laudo.analise.imagem.paciente.nome_completo),
-                "resultado": laudo.analise.resultado_classificacao,
-                "data_emissao": laudo.data_hora_emissao,
-                "codigo_verificacao": laudo.codigo_verificacao,
-                "pdf": laudo.caminho_pdf
-            })
-
-        LogAuditoria.objects.create(
-            usuario=request.user,
-            acao='ACESSO_RELATORIO',
-            recurso='Histórico de Laudos',
-            ip_origem=request.META.get('REMOTE_ADDR')
+        ).order_by('-data_hora_emissao', '-id')
+
+        audit_log(request, 'ACESSO_RELATORIO', 'Histórico de Laudos')
+
+        if formato_streaming(request):
+            linhas = (_linha_historico(laudo) for laudo in laudos.iterator(chunk_size=TAMANHO_LOTE))
+            return resposta_streaming(request, linhas, CAMPOS_HISTORICO, "historico_laudos")
+
+        def montar_pagina():
+            paginacao = PaginacaoKeyset('data_hora_emissao')
+            pagina = paginacao.paginate_queryset(laudos, request, self)
+            return paginacao.get_paginated_response([_linha_historico(laudo) for laudo in pagina]).data
+
+        # Cache de leitura (cifrado: nomes de pacientes); o acesso é auditado mesmo num acerto
+        dados, acerto = obter_ou_calcular(
+            request, 'historico_laudos', tags=['laudos', 'pacientes'], calcular=montar_pagina
         )
+        return marcar(Response(dados), acerto)
+
+
+class RevisaoLaudoView(APIView):
+    """
+    POST /api/laudos/<id>/revisao/
+        {"concorda": true}                                            -> médico confirma a IA
+        {"concorda": false, "classificacao_corrigida": "Maligno"}     -> médico corrige
+
+    Única origem de exemplos para o aprendizado incremental
+    (weka_adapter/registro_modelos.py): só médicos revisam, e uma nova
+    revisão substitui a anterior também no modelo.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, laudo_id):
+        laudo = get_object_or_404(Laudo.objects.select_related('analise'), id=laudo_id)
+        perfil = PerfilUsuario.objects.filter(usuario=request.user, papel='MEDICO', ativo=True).first()
+        if perfil is None:
+            return Response({"erro": "Apenas médicos podem revisar laudos."}, status=status.HTTP_403_FORBIDDEN)
+
+        concorda = request.data.get('concorda')
+        if not isinstance(concorda, bool):
+            return Response({"erro": "Informe 'concorda' (true/false)."}, status=status.HTTP_400_BAD_REQUEST)
+        corrigida = None
+        if not concorda:
+            corrigida = request.data.get('classificacao_corrigida')
+            validas = dict(Laudo._meta.get_field('classificacao_corrigida').choices)
+            if corrigida not in validas:
+                return Response(
+                    {"erro": f"'classificacao_corrigida' deve ser uma de: {', '.join(validas)}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        laudo.confirmou_concordancia = concorda
+        laudo.classificacao_corrigida = corrigida
+        laudo.revisado_em = timezone.now()
+        laudo.revisado_por = perfil
+        laudo.save(update_fields=['confirmou_concordancia', 'classificacao_corrigida', 'revisado_em', 'revisado_por'])
 
-        return Response(resultado)
+        audit_log(request, 'LAUDO_ALTERADO', 'Laudo',
+                  f"REVISAO {laudo.codigo_verificacao}: " + ("concorda" if concorda else f"corrigido para {corrigida}"))
+        return Response({
+            "laudo_id": laudo.id,
+            "confirmou_concordancia": laudo.confirmou_concordancia,
+            "classificacao_corrigida": laudo.classificacao_corrigida,
+            "revisado_em": laudo.revisado_em,
+        })
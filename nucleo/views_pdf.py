@@ -1,66 +1,229 @@
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from django.http import HttpResponse
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.conf import settings
-import os
+from django.urls import reverse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status
 
-from .models import Laudo, LogAuditoria, LaudoImpressao
+from weka_adapter.services.fila_pdf import solicitar_renderizacao
+from weka_adapter.services.report_generator import ReportService
+from weka_adapter.services.spooler import enfileirar_impressao
 
+from .auditoria import audit_log
+from .condicional import aplicar_validadores, if_range_confere, nao_modificado, resposta_304
+from .limites import LaudoPdfThrottle, exigir_token
+from .models import Laudo, LaudoImpressao, RenderizacaoPDF
 
-def gerar_laudo_pdf(request, laudo_id):
-    laudo = get_object_or_404(Laudo, id=laudo_id)
+TAMANHO_BLOCO = 64 * 1024
 
-    pasta = os.path.join(settings.MEDIA_ROOT, 'laudos')
-    os.makedirs(pasta, exist_ok=True)
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
 
-    nome = f"laudo_{laudo.codigo_verificacao}.pdf"
-    caminho = os.path.join(pasta, nome)
 
-    c = canvas.Canvas(caminho, pagesize=A4)
-    w, h = A4
-    y = h - 50
+def _job_para_dict(request, job):
+    dados = {
+        "job_id": job.id,
+        "laudo_id": job.laudo_id,
+        "status": job.status,
+        "status_descricao": job.get_status_display(),
+        "data_criacao": job.data_criacao,
+        "data_conclusao": job.data_conclusao,
+        "url_status": request.build_absolute_uri(reverse('laudo-pdf-status', args=[job.id])),
+    }
+    if job.status == RenderizacaoPDF.PRONTO and job.laudo.caminho_pdf:
+        dados["pdf"] = request.build_absolute_uri(job.laudo.caminho_pdf.url)
+    if job.status == RenderizacaoPDF.FALHOU:
+        dados["erro"] = job.erro
+    return dados
 
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(50, y, "LAUDO MÉDICO OFICIAL")
-    y -= 30
 
-    paciente = laudo.analise.imagem.paciente
-    analise = laudo.analise
+def _etag_pdf(laudo):
+    """
+    Conteúdo do laudo + geração do arquivo: o mesmo conteúdo pode ser
+    regravado com outros bytes (nova renderização, recomprimir_pdfs).
+    """
+    geracao = int(laudo.pdf_gerado_em.timestamp() * 1_000_000) if laudo.pdf_gerado_em else 0
+    return f'"{laudo.pdf_fingerprint}-{geracao}"'
 
-    c.setFont("Helvetica", 10)
-    c.drawString(50, y, f"Paciente: {paciente.nome_completo}")
-    y -= 15
-    c.drawString(50, y, f"Resultado: {analise.resultado_classificacao}")
-    y -= 15
-    c.drawString(50, y, f"Score IA: {analise.score_confianca}")
-    y -= 20
 
-    text = c.beginText(50, y)
-    for linha in laudo.texto_laudo_completo.split('\n'):
-        text.textLine(linha)
+def _intervalo(cabecalho, tamanho):
+    """
+    Interpreta um único intervalo `bytes=a-b`. Retorna (inicio, fim) inclusivo,
+    None se o cabeçalho deve ser ignorado, ou False se for insatisfatível.
+    """
+    casamento = _RANGE.match(cabecalho.strip())
+    if not casamento:
+        return None  # multi-intervalos ou formato desconhecido: envia o arquivo inteiro
+    inicio, fim = casamento.groups()
+    if not inicio and not fim:
+        return None
+    if not inicio:
+        # Sufixo: últimos N bytes
+        n = int(fim)
+        if n == 0:
+            return False
+        return max(tamanho - n, 0), tamanho - 1
+    inicio = int(inicio)
+    fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio >= tamanho or inicio > fim:
+        return False
+    return inicio, fim
 
-    c.drawText(text)
-    c.showPage()
-    c.save()
 
-    laudo.caminho_pdf = f"laudos/{nome}"
-    laudo.save(update_fields=['caminho_pdf'])
+def _ler_trecho(arquivo, inicio, fim):
+    try:
+        arquivo.seek(inicio)
+        restante = fim - inicio + 1
+        while restante > 0:
+            bloco = arquivo.read(min(TAMANHO_BLOCO, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+    finally:
+        arquivo.close()
 
-    LaudoImpressao.objects.create(
-        laudo=laudo,
-        usuario=request.user,
-        ip_origem=request.META.get('REMOTE_ADDR')
-    )
 
-    LogAuditoria.objects.create(
-        usuario=request.user,
-        acao='LAUDO_IMPRESSO',
-        recurso='PDF Laudo',
-        detalhe=laudo.codigo_verificacao,
-        ip_origem=request.META.get('REMOTE_ADDR')
-    )
+class LaudoPdfView(APIView):
+    """
+    GET  /api/laudos/<id>/pdf/  -> entrega o PDF salvo (ETag, Last-Modified, 304, Range/206).
+                                   Se o conteúdo do laudo mudou desde a última geração,
+                                   enfileira a renderização e responde 202 com o job.
+    POST /api/laudos/<id>/pdf/  -> força uma nova renderização em segundo plano (202).
+
+    Cada visualização (200, 304 ou o primeiro trecho de um Range) é registrada
+    em LaudoImpressao e no LogAuditoria.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_throttles(self):
+        # Baldes só para o que renderiza: o POST aqui e o GET que enfileira (em get)
+        return [LaudoPdfThrottle()] if self.request.method == 'POST' else []
+
+    def perform_content_negotiation(self, request, force=False):
+        # Leitores de PDF pedem `Accept: application/pdf`; as respostas que
+        # não são o arquivo (202, 404...) saem no renderer padrão (JSON).
+        return super().perform_content_negotiation(request, force=True)
+
+    def _laudo(self, laudo_id):
+        return get_object_or_404(
+            Laudo.objects.select_related(
+                'analise__imagem__paciente', 'analise__imagem__instituicao', 'usuario_responsavel__usuario'
+            ),
+            id=laudo_id,
+        )
+
+    def _registrar_visualizacao(self, request, laudo, detalhe):
+        LaudoImpressao.objects.create(laudo=laudo, usuario=request.user, ip_origem=request.META.get('REMOTE_ADDR'))
+        audit_log(request, 'LAUDO_IMPRESSO', 'PDF Laudo', f"{laudo.codigo_verificacao} ({detalhe})")
+
+    def _enfileirar(self, request, laudo):
+        job, _criado = solicitar_renderizacao(
+            laudo,
+            usuario_solicitante=request.user,
+            ip_cliente=request.META.get('REMOTE_ADDR')
+        )
+        return job
+
+    def get(self, request, laudo_id):
+        laudo = self._laudo(laudo_id)
+
+        if not ReportService.pdf_atualizado(laudo):
+            # O job registra a impressão quando terminar
+            exigir_token(request, 'laudo_pdf')
+            job = self._enfileirar(request, laudo)
+            resposta = Response(_job_para_dict(request, job), status=status.HTTP_202_ACCEPTED)
+            resposta['Retry-After'] = '2'
+            return resposta
+
+        etag = _etag_pdf(laudo)
+        ultima_modificacao = laudo.pdf_gerado_em
+
+        # Requisição condicional: o cliente já tem esta versão
+        if nao_modificado(request, etag, ultima_modificacao):
+            self._registrar_visualizacao(request, laudo, "cache do cliente")
+            return resposta_304(etag)
+
+        storage = laudo.caminho_pdf.storage
+        nome = laudo.caminho_pdf.name
+        tamanho = storage.size(nome)
 
-    response = HttpResponse(open(caminho, 'rb'), content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="{nome}"'
-    return response
+        intervalo = None
+        cabecalho_range = request.META.get('HTTP_RANGE')
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if cabecalho_range and (not if_range or if_range_confere(if_range, etag)):
+            intervalo = _intervalo(cabecalho_range, tamanho)
+
+        if intervalo is False:
+            resposta = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            resposta['Content-Range'] = f'bytes */{tamanho}'
+            return resposta
+
+        if intervalo:
+            inicio, fim = intervalo
+            if inicio == 0:
+                self._registrar_visualizacao(request, laudo, "download parcial")
+            resposta = StreamingHttpResponse(
+                _ler_trecho(storage.open(nome, 'rb'), inicio, fim),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type='application/pdf',
+            )
+            resposta['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+            resposta['Content-Length'] = str(fim - inicio + 1)
+        else:
+            self._registrar_visualizacao(request, laudo, "download")
+            resposta = FileResponse(storage.open(nome, 'rb'), content_type='application/pdf')
+            resposta['Content-Length'] = str(tamanho)
+
+        resposta['Content-Disposition'] = f'inline; filename="laudo_{laudo.codigo_verificacao}.pdf"'
+        resposta['Accept-Ranges'] = 'bytes'
+        aplicar_validadores(resposta, etag, ultima_modificacao)
+        # Documento com dados de paciente: só o navegador do usuário pode guardar
+        resposta['Cache-Control'] = 'private, no-cache'
+        return resposta
+
+    def post(self, request, laudo_id):
+        """Enfileira a renderização e responde na hora (202) com o id do job."""
+        laudo = self._laudo(laudo_id)
+        job = self._enfileirar(request, laudo)
+
+        audit_log(request, 'LAUDO_IMPRESSO', 'PDF Laudo', f"{laudo.codigo_verificacao} (job {job.id})")
+
+        return Response(_job_para_dict(request, job), status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def status_renderizacao_pdf(request, job_id):
+    job = get_object_or_404(RenderizacaoPDF.objects.select_related('laudo'), id=job_id)
+    return Response(_job_para_dict(request, job))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def enfileirar_impressao_laudo(request, laudo_id):
+    """
+    Coloca o laudo na fila de impressão do local informado
+    ({"local_impressao": "Recepção - Bloco B"}). O spooler imprime em lote.
+    """
+    laudo = get_object_or_404(Laudo, id=laudo_id)
+    local = (request.data.get('local_impressao') or '').strip()
+    if not local:
+        return Response({"erro": "Informe 'local_impressao'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    item, criado = enfileirar_impressao(
+        laudo, local, request.user, ip_cliente=request.META.get('REMOTE_ADDR')
+    )
+    return Response(
+        {
+            "fila_id": item.id,
+            "laudo_id": laudo.id,
+            "local_impressao": item.local_impressao,
+            "status": item.status,
+            "ja_estava_na_fila": not criado,
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
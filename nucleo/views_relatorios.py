@@ -1,36 +1,162 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from django.db.models import F, Sum
+from django.http import StreamingHttpResponse
 from django.utils.dateparse import parse_date
 
-from .models import Laudo, LogAuditoria
+from weka_adapter.services.exportacao_zip import selecionar_laudos, gerar_zip
+
+from .auditoria import audit_log
+from .models import AgregadoDiarioLaudos, Laudo, PerfilUsuario
+from .paginacao import PaginacaoKeyset
+from .renderers import CSVRenderer, JSONArrayRenderer, NDJSONRenderer, formato_streaming, resposta_streaming
+from .views_laudos import TAMANHO_LOTE
+
+CAMPOS_RELATORIO = ["paciente", "resultado", "data"]
+
+
+def _periodo(request):
+    """(inicio, fim) opcionais da querystring; ValueError se vierem em formato inválido."""
+    datas = []
+    for nome in ('inicio', 'fim'):
+        valor = request.GET.get(nome)
+        data = parse_date(valor) if valor else None
+        if valor and data is None:
+            raise ValueError(f"'{nome}' inválido.")
+        datas.append(data)
+    return tuple(datas)
+
+
+def _linha_relatorio(laudo):
+    return {
+        "paciente": str(laudo.analise.imagem.paciente.nome_completo),
+        "resultado": laudo.analise.resultado_classificacao,
+        "data": laudo.data_hora_emissao
+    }
 
 
 class RelatorioLaudosView(APIView):
+    """
+    GET /api/relatorios/laudos/?inicio=AAAA-MM-DD&fim=AAAA-MM-DD[&format=csv|ndjson|json-array]
+
+    Em JSON a resposta é paginada por chave (?cursor=...&tamanho=50).
+
+    Em CSV/NDJSON/array JSON os laudos são lidos em lotes e enviados em streaming.
+    Para contagens, prefira o resumo (RelatorioLaudosResumoView).
+    """
     permission_classes = [IsAuthenticated]
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + [CSVRenderer, NDJSONRenderer, JSONArrayRenderer]
 
     def get(self, request):
-        inicio = parse_date(request.GET.get('inicio'))
-        fim = parse_date(request.GET.get('fim'))
+        try:
+            inicio, fim = _periodo(request)
+        except ValueError:
+            return Response({"erro": "Informe 'inicio' e 'fim' no formato AAAA-MM-DD."}, status=400)
 
-        qs = Laudo.objects.all()
+        qs = Laudo.objects.select_related('analise__imagem__paciente').order_by('data_hora_emissao', 'id')
 
         if inicio and fim:
             qs = qs.filter(data_hora_emissao__date__range=[inicio, fim])
 
-        dados = []
-        for laudo in qs:
-            dados.append({
-                "paciente": str(laudo.analise.imagem.paciente.nome_completo),
-                "resultado": laudo.analise.resultado_classificacao,
-                "data": laudo.data_hora_emissao
-            })
-
-        LogAuditoria.objects.create(
-            usuario=request.user,
-            acao='ACESSO_RELATORIO',
-            recurso='Relatório de Laudos',
-            ip_origem=request.META.get('REMOTE_ADDR')
-        )
+        audit_log(request, 'ACESSO_RELATORIO', 'Relatório de Laudos')
+
+        if formato_streaming(request):
+            linhas = (_linha_relatorio(laudo) for laudo in qs.iterator(chunk_size=TAMANHO_LOTE))
+            return resposta_streaming(request, linhas, CAMPOS_RELATORIO, f"relatorio_laudos_{inicio or 'inicio'}_{fim or 'fim'}")
+
+        paginacao = PaginacaoKeyset('data_hora_emissao', descendente=False)
+        pagina = paginacao.paginate_queryset(qs, request, self)
+        return paginacao.get_paginated_response([_linha_relatorio(laudo) for laudo in pagina])
+
+
+class ExportacaoLaudosZipView(APIView):
+    """
+    Exportação para auditoria: todos os PDFs de laudo do período (e,
+    opcionalmente, de uma instituição) em um único ZIP, enviado em streaming.
+
+    GET /api/laudos/exportar/?inicio=2025-01-01&fim=2025-01-31&instituicao=3
+
+    ADMIN e AUDITOR exportam qualquer instituição (ou todas); os demais perfis
+    só exportam a própria instituição, mesmo sem informar 'instituicao'.
+    """
+    permission_classes = [IsAuthenticated]
+    PAPEIS_EXPORTACAO_GERAL = ('ADMIN', 'AUDITOR')
+
+    def get(self, request):
+        try:
+            inicio = parse_date(request.GET.get('inicio') or '')
+            fim = parse_date(request.GET.get('fim') or '')
+        except ValueError:
+            inicio = fim = None
+        if not inicio or not fim:
+            return Response({"erro": "Informe 'inicio' e 'fim' no formato AAAA-MM-DD."}, status=400)
+
+        instituicao = request.GET.get('instituicao')
+        if instituicao and not instituicao.isdigit():
+            return Response({"erro": "'instituicao' deve ser o id numérico da instituição."}, status=400)
+
+        perfil = PerfilUsuario.objects.filter(usuario=request.user, ativo=True).first()
+        if not perfil:
+            return Response({"erro": "Usuário sem perfil ativo."}, status=403)
+        if perfil.papel not in self.PAPEIS_EXPORTACAO_GERAL:
+            if instituicao and int(instituicao) != perfil.instituicao_id:
+                return Response({"erro": "Exportação permitida apenas para a sua instituição."}, status=403)
+            instituicao = str(perfil.instituicao_id)
+
+        laudos = selecionar_laudos(inicio, fim, instituicao)
+
+        audit_log(request, 'ACESSO_RELATORIO', 'Exportação de Laudos (ZIP)',
+                  f"{inicio} a {fim}, instituição {instituicao or 'todas'}")
+
+        resposta = StreamingHttpResponse(gerar_zip(laudos), content_type='application/zip')
+        resposta['Content-Disposition'] = f'attachment; filename="laudos_{inicio}_{fim}.zip"'
+        return resposta
+
+
+class RelatorioLaudosResumoView(APIView):
+    """
+    Resumo gerencial servido só da tabela de agregados diários (nenhum laudo
+    é carregado nem paciente decifrado).
+
+    GET /api/relatorios/laudos/resumo/?inicio=2025-01-01&fim=2025-01-31&instituicao=3
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            inicio, fim = _periodo(request)
+        except ValueError:
+            return Response({"erro": "Informe 'inicio' e 'fim' no formato AAAA-MM-DD."}, status=400)
+        instituicao = request.GET.get('instituicao')
+        if instituicao and not instituicao.isdigit():
+            return Response({"erro": "'instituicao' deve ser o id numérico da instituição."}, status=400)
+
+        linhas = AgregadoDiarioLaudos.objects.all()
+        if inicio:
+            linhas = linhas.filter(dia__gte=inicio)
+        if fim:
+            linhas = linhas.filter(dia__lte=fim)
+        if instituicao:
+            linhas = linhas.filter(instituicao_id=instituicao)
+
+        somas = dict(analises=Sum('total_analises'), laudos=Sum('total_laudos'))
+        totais = linhas.aggregate(**somas)
+        dados = {
+            "inicio": inicio,
+            "fim": fim,
+            "total_analises": totais['analises'] or 0,
+            "total_laudos": totais['laudos'] or 0,
+            "por_resultado": list(
+                linhas.values(resultado=F('resultado_classificacao')).annotate(**somas).order_by('resultado')
+            ),
+            "por_instituicao": list(
+                linhas.values('instituicao_id', instituicao_nome=F('instituicao__nome_instituicao')).annotate(**somas).order_by('instituicao_id')
+            ),
+            "por_dia": list(linhas.values('dia').annotate(**somas).order_by('dia')),
+        }
 
+        audit_log(request, 'ACESSO_RELATORIO', 'Resumo de Laudos',
+                  f"{inicio or 'início'} a {fim or 'hoje'}, instituição {instituicao or 'todas'}")
         return Response(dados)
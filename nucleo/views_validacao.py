@@ -0,0 +1,108 @@
+"""
+Validação pública dos laudos (destino do QR Code impresso no PDF).
+
+GET /validar/<codigo_verificacao>
+
+- Sem autenticação e somente leitura: confirma que o laudo existe e mostra
+  apenas dados não sensíveis (nada do paciente).
+- A busca usa o índice único de codigo_verificacao e lê só as colunas
+  necessárias (values(): nenhum campo criptografado é decifrado).
+- Resultados positivos e negativos ficam em cache por pouco tempo: rajadas
+  de leitura do mesmo QR e tentativas de enumeração não chegam ao banco.
+  Um laudo removido continua validando até o TTL positivo expirar.
+- Limite de requisições por IP (escopo 'validacao_laudo').
+"""
+
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework.views import APIView
+
+from .models import Laudo
+
+# Mesmo formato aceito pela rota; qualquer outra coisa nem consulta o cache
+_CODIGO = re.compile(r'^[\w-]{1,50}$')
+
+_PREFIXO_CACHE = "validacao_laudo"
+
+
+class ValidacaoLaudoThrottle(SimpleRateThrottle):
+    """Limite por IP para todos os clientes (autenticados ou não)."""
+    scope = 'validacao_laudo'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+def _chave_cache(codigo):
+    return f"{_PREFIXO_CACHE}:{codigo}"
+
+
+def _consultar(codigo):
+    """Dados públicos do laudo, ou None se o código não existe."""
+    registro = Laudo.objects.filter(codigo_verificacao=codigo).values(
+        'codigo_verificacao',
+        'data_hora_emissao',
+        'laudo_finalizado',
+        'analise__imagem__instituicao__nome_instituicao',
+        'usuario_responsavel__usuario__first_name',
+        'usuario_responsavel__usuario__last_name',
+        'usuario_responsavel__registro_profissional',
+    ).first()
+    if registro is None:
+        return None
+
+    medico = " ".join(filter(None, [
+        registro['usuario_responsavel__usuario__first_name'],
+        registro['usuario_responsavel__usuario__last_name'],
+    ]))
+    return {
+        "valido": True,
+        "codigo_verificacao": registro['codigo_verificacao'],
+        "data_emissao": timezone.localtime(registro['data_hora_emissao']).date().isoformat(),
+        "finalizado": registro['laudo_finalizado'],
+        "instituicao": registro['analise__imagem__instituicao__nome_instituicao'],
+        "medico_responsavel": medico or None,
+        "registro_profissional": registro['usuario_responsavel__registro_profissional'],
+    }
+
+
+def dados_validacao(codigo):
+    """Consulta com cache (positivo e negativo). Retorna o dicionário público ou None."""
+    chave = _chave_cache(codigo)
+    dados = cache.get(chave)
+    if dados is not None:
+        return dados or None  # False = "não existe" em cache
+
+    dados = _consultar(codigo)
+    if dados is None:
+        cache.set(chave, False, getattr(settings, 'VALIDACAO_CACHE_TTL_NEGATIVO', 60))
+    else:
+        cache.set(chave, dados, getattr(settings, 'VALIDACAO_CACHE_TTL_POSITIVO', 300))
+    return dados
+
+
+class ValidarLaudoView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = [ValidacaoLaudoThrottle]
+
+    def get(self, request, codigo):
+        dados = dados_validacao(codigo) if _CODIGO.match(codigo) else None
+        if dados is None:
+            resposta = Response(
+                {"valido": False, "detalhe": "Código de verificação não encontrado."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+            ttl = getattr(settings, 'VALIDACAO_CACHE_TTL_NEGATIVO', 60)
+        else:
+            resposta = Response(dados)
+            ttl = getattr(settings, 'VALIDACAO_CACHE_TTL_POSITIVO', 300)
+        resposta['Cache-Control'] = f'public, max-age={ttl}'
+        return resposta
@@ -55,6 +55,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primeiro da lista para contar também as consultas de sessão/autenticação
+    'nucleo.middleware.MedicaoConsultasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -170,5 +172,110 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
-    )
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        # Validação pública do QR Code (/validar/<codigo>), por IP
+        'validacao_laudo': '30/min',
+    },
+}
+
+# Cache em memória do processo (troque por Redis/Memcached com vários workers)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'projeto-sad',
+    }
 }
+
+# Cache de leitura de respostas (nucleo/cache_respostas.py): detalhe de paciente,
+# histórico de laudos e simulações. Invalidado pelos signals de save/delete.
+CACHE_RESPOSTAS_ATIVO = True
+CACHE_RESPOSTAS_TTL = 300  # segundos
+# O LocMemCache acima é de cada processo: a invalidação por tag de um worker não
+# chega aos outros. Com ele, só o detalhe de paciente (chaveado pela versão no
+# banco) fica em cache; True apenas com um único processo (runserver). Com um
+# backend compartilhado (Redis/Memcached) esta opção é irrelevante.
+CACHE_RESPOSTAS_PROCESSO_UNICO = False
+
+# =============================================================
+# MOTOR DE IA — ORÇAMENTO DE LATÊNCIA E CIRCUIT BREAKER
+# =============================================================
+
+# Tempo máximo (s) que o upload espera pela classificação antes de deixar a análise AGUARDANDO
+WEKA_PRAZO_CLASSIFICACAO = 2.0
+# Chamadas mais lentas que isso (s) contam como falha para o circuit breaker
+WEKA_LIMIAR_LENTIDAO = 1.5
+# Falhas/lentidões consecutivas para abrir o circuito
+WEKA_BREAKER_FALHAS = 5
+# Tempo (s) com o circuito aberto antes de permitir uma chamada de teste
+WEKA_BREAKER_REABERTURA = 30.0
+# Threads disponíveis para chamadas ao classificador
+WEKA_CLASSIFICACAO_WORKERS = 4
+
+# =============================================================
+# PDF DE LAUDOS
+# =============================================================
+
+# Reaproveita logotipo/cabeçalho/marca d'água preparados por instituição entre laudos
+PDF_CACHE_CAMADAS = True
+# Renderização em segundo plano: processos do pool (por processo web)
+PDF_RENDERIZACAO_WORKERS = 2
+# True executa o job no próprio processo, logo após o commit (testes/desenvolvimento)
+PDF_RENDERIZACAO_SINCRONA = False
+# Diretório onde o spooler grava os lotes de impressão (um subdiretório por local)
+SPOOL_IMPRESSAO_DIR = BASE_DIR / 'spool_impressao'
+# Máximo de laudos por arquivo de lote
+SPOOL_IMPRESSAO_LOTE = 500
+# Streams binários e logotipo sem recodificação (ver weka_adapter/utils/pdf_compacto.py)
+PDF_MODO_COMPACTO = True
+
+# =============================================================
+# VALIDAÇÃO PÚBLICA DE LAUDOS (QR CODE)
+# =============================================================
+
+# Tempo (s) em cache de um código encontrado / inexistente
+VALIDACAO_CACHE_TTL_POSITIVO = 300
+VALIDACAO_CACHE_TTL_NEGATIVO = 60
+
+# =============================================================
+# DIAGNÓSTICO DE CONSULTAS SQL
+# =============================================================
+
+# Cabeçalhos X-Consultas* em cada resposta (nucleo.middleware.MedicaoConsultasMiddleware)
+MEDIR_CONSULTAS = DEBUG
+
+# =============================================================
+# CONTROLE DE ADMISSÃO (nucleo/limites.py)
+# =============================================================
+
+# Baldes de tokens por escopo: por usuário (ou IP, se anônimo) e por instituição.
+# "n/periodo" = até n requisições de uma vez, repostas ao ritmo de n por período.
+# Guardados no banco: o limite vale para todos os processos do servidor.
+LIMITES_TAXA = {
+    'simulacao_lote': {'usuario': '5/min', 'instituicao': '20/min'},
+    'upload_imagem': {'usuario': '30/min', 'instituicao': '120/min'},
+    'laudo_pdf': {'usuario': '20/min', 'instituicao': '100/min'},
+}
+# Trabalhos pesados de CPU simultâneos (todos os processos); acima disso, 503
+PROCESSAMENTO_SIMULTANEO = 4
+# Prazo (s) de uma vaga não liberada (processo que morreu no meio)
+PROCESSAMENTO_PRAZO_VAGA = 300
+# Retry-After (s) sugerido no 503
+PROCESSAMENTO_RETRY_AFTER = 5
+
+# =============================================================
+# AUDITORIA (nucleo/auditoria.py)
+# =============================================================
+
+# Eventos vão para um diário local (fsync) e são gravados em LogAuditoria em lotes,
+# fora da requisição. Ligado só com AUDITORIA_ESCRITA_TARDIA=1 no ambiente do servidor;
+# sem a variável (testes, comandos avulsos) a gravação é imediata, sem thread.
+AUDITORIA_ESCRITA_TARDIA = os.getenv("AUDITORIA_ESCRITA_TARDIA") == "1"
+AUDITORIA_DIARIO_DIR = BASE_DIR / 'auditoria_diario'
+# Intervalo (s) entre gravações e eventos por lote (o lote cheio antecipa a gravação)
+AUDITORIA_INTERVALO = 1.0
+AUDITORIA_LOTE = 500
+# fsync a cada evento: sobrevive também a queda do sistema operacional, não só do processo
+AUDITORIA_FSYNC = True
+# Segmento aberto parado há mais que isso (s) é de processo morto e é regravado
+AUDITORIA_SEGMENTO_ORFAO = 120
@@ -3,10 +3,11 @@ URL configuração do projeto_sad.
 """
 from django.views.generic import RedirectView
 from django.contrib import admin
-from django.urls import path
+from django.urls import path, re_path
 from django.urls import include   #<< duda  :) 6
 from django.conf import settings    #<< duda  :)  6
 from django.conf.urls.static import static  #<< duda  :) 6
+from nucleo.views_validacao import ValidarLaudoView
 
 
 urlpatterns = [
@@ -20,6 +21,9 @@ urlpatterns = [
     # --- NOVAS ROTAS (ADICIONEI AQUI) ---
     path('weka/', include('weka.urls')),                # ALUNO 7 (Módulo Base)
     path('weka-adapter/', include('weka_adapter.urls')), # ALUNO 8 (Classificador)
+
+    # Validação pública do QR Code dos laudos (aceita com ou sem barra final)
+    re_path(r'^validar/(?P<codigo>[^/]+)/?$', ValidarLaudoView.as_view(), name='validar-laudo'),
 ]
 
 if settings.DEBUG:
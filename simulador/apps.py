@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SimuladorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'simulador'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (invalidação do cache de respostas)
@@ -0,0 +1,17 @@
+"""
+Signals do simulador: invalidam as respostas em cache das listagens e do
+detalhe a cada simulação salva ou removida (nucleo/cache_respostas.py).
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from nucleo import cache_respostas
+
+from .models import Simulacao
+
+
+@receiver(post_save, sender=Simulacao)
+@receiver(post_delete, sender=Simulacao)
+def invalidar_cache_simulacoes(sender, instance, **kwargs):
+    cache_respostas.invalidar("simulacoes", f"simulacao:{instance.pk}")
@@ -1,8 +1,10 @@
 from django.http import HttpResponse
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, throttle_classes
 from .services import gerar_simulacao_fake
 from .models import Simulacao
+from nucleo.cache_respostas import marcar, obter_ou_calcular
+from nucleo.limites import SimulacaoLoteThrottle, vaga_processamento
 from django.core.files.base import File
 from django.conf import settings
 import os
@@ -51,8 +53,16 @@ def gerar_simulacao_api(request):
 def listar_simulacoes(request):
     """
     Endpoint que lista todas as simulações existentes.
-    Retorna uma lista em JSON.
+    Retorna uma lista em JSON (em cache até a próxima simulação salva/removida).
     """
+    dados, acerto = obter_ou_calcular(
+        request, "simulacoes_lista", tags=["simulacoes"], calcular=_montar_lista,
+        por_usuario=False, cifrar=False,  # dados fictícios, iguais para todos
+    )
+    return marcar(Response(dados), acerto)
+
+
+def _montar_lista():
     dados = []
 
     for s in Simulacao.objects.all().order_by("-id"):
@@ -76,17 +86,28 @@ def listar_simulacoes(request):
             "data_criacao": s.data_criacao,
         })
 
-    return Response(dados)
+    return dados
 
 @api_view(["GET"])
 def detalhar_simulacao(request, id):
     """
     Endpoint que retorna uma simulação específica pelo ID.
     """
+    dados, acerto = obter_ou_calcular(
+        request, "simulacao_detalhe", tags=[f"simulacao:{id}"],
+        calcular=lambda: _montar_detalhe(request, id),
+        por_usuario=False, cifrar=False,
+    )
+    if dados is None:
+        return marcar(Response({"erro": "Simulação não encontrada."}, status=404), acerto)
+    return marcar(Response(dados), acerto)
+
+
+def _montar_detalhe(request, id):
     try:
         sim = Simulacao.objects.get(id=id)
     except Simulacao.DoesNotExist:
-        return Response({"erro": "Simulação não encontrada."}, status=404)
+        return None
 
     imagem_url = None
     if sim.imagem_escolhida:
@@ -105,13 +126,20 @@ def detalhar_simulacao(request, id):
         "data_criacao": sim.data_criacao,
     }
 
-    return Response(dados)
+    return dados
 
 @api_view(["GET", "POST"])
+@throttle_classes([SimulacaoLoteThrottle])
 def gerar_lote(request):
     """
     Gera 10 simulações e retorna uma lista JSON.
+    Limitado por usuário/instituição (429) e pelas vagas de CPU (503).
     """
+    with vaga_processamento():
+        return Response(_gerar_lote())
+
+
+def _gerar_lote():
     simulacoes = []
 
     for _ in range(10):
@@ -145,9 +173,10 @@ def gerar_lote(request):
             "imagem_url": nova.imagem_escolhida.url if nova.imagem_escolhida else None,
         })
 
-    return Response(simulacoes)
+    return simulacoes
 
 @api_view(["GET"])
+@throttle_classes([SimulacaoLoteThrottle])
 def gerar_lote_arff(request):
     """
     Gera 10 simulações e devolve um arquivo ARFF para download.
@@ -0,0 +1,29 @@
+"""
+Helper de orçamento de consultas SQL para os testes de API.
+
+Uso:
+    class MinhaViewTests(OrcamentoConsultasMixin, APITestCase):
+        def test_listagem(self):
+            with self.assertOrcamentoConsultas(4, "GET /api/pacientes/"):
+                self.client.get(...)
+
+Ao estourar o orçamento, a falha lista os comandos mais executados (um
+SELECT repetido uma vez por linha aponta direto para o N+1).
+"""
+
+from contextlib import contextmanager
+
+from nucleo.consultas import registrar_consultas
+
+
+class OrcamentoConsultasMixin:
+
+    @contextmanager
+    def assertOrcamentoConsultas(self, maximo, rotulo="Bloco"):
+        with registrar_consultas() as registro:
+            yield registro
+        if registro.total > maximo:
+            self.fail(
+                f"{rotulo} fez {registro.total} consultas (orçamento: {maximo}, "
+                f"{registro.repetidas} repetidas).\n{registro.resumo()}"
+            )
@@ -0,0 +1,105 @@
+"""
+tests/test_agregados.py
+
+Agregados diários de análises e laudos (AgregadoDiarioLaudos).
+
+Cobre:
+- criar análise/laudo soma nas linhas do dia/instituição/resultado
+- mudar o resultado da análise move a análise e o laudo para a nova linha
+- remover o laudo desconta a contagem
+- reconstrução completa chega aos mesmos números dos signals
+- resumo gerencial servido só da tabela de agregados
+
+Como rodar:
+    python manage.py test tests.test_agregados
+"""
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.agregados import reconstruir
+from nucleo.models import (
+    Instituicao,
+    PerfilUsuario,
+    Paciente,
+    ImagemExame,
+    AnaliseImagem,
+    Laudo,
+    AgregadoDiarioLaudos,
+)
+
+
+class AgregadoDiarioLaudosTests(APITestCase):
+
+    def setUp(self):
+        self.instituicao = Instituicao.objects.create(nome_instituicao="Clínica Agregados", cnpj="33.333.333/0001-33")
+        self.user = User.objects.create_user(username="medico_agregados", password="123")
+        self.perfil = PerfilUsuario.objects.create(usuario=self.user, papel="MEDICO", instituicao=self.instituicao)
+        self.paciente = Paciente.objects.create(nome_completo="Paciente Agregados", cpf="111.222.333-44")
+        self.hoje = timezone.localdate()
+        self.client.force_authenticate(self.user)
+
+    def _analise(self, resultado="Benigno"):
+        imagem = ImagemExame.objects.create(
+            paciente=self.paciente,
+            usuario_upload=self.user,
+            instituicao=self.instituicao,
+            caminho_arquivo=SimpleUploadedFile("exame.bin", b"bytes"),
+        )
+        return AnaliseImagem.objects.create(
+            imagem=imagem, usuario_solicitante=self.user, resultado_classificacao=resultado, hash_imagem="h"
+        )
+
+    def _laudo(self, analise):
+        return Laudo.objects.create(analise=analise, usuario_responsavel=self.perfil, texto_laudo_completo="Texto")
+
+    def _contagens(self):
+        return {
+            a.resultado_classificacao: (a.total_analises, a.total_laudos)
+            for a in AgregadoDiarioLaudos.objects.filter(dia=self.hoje, instituicao=self.instituicao)
+        }
+
+    def test_signals_mantem_contagens(self):
+        analise = self._analise("Benigno")
+        self._laudo(analise)
+        self._analise("Maligno")
+        self.assertEqual(self._contagens(), {"Benigno": (1, 1), "Maligno": (1, 0)})
+
+        analise.resultado_classificacao = "Cisto"
+        analise.save()
+        self.assertEqual(self._contagens(), {"Benigno": (0, 0), "Maligno": (1, 0), "Cisto": (1, 1)})
+
+        analise.laudo.delete()
+        self.assertEqual(self._contagens(), {"Benigno": (0, 0), "Maligno": (1, 0), "Cisto": (1, 0)})
+
+    def test_reconstrucao_confere_com_signals(self):
+        for resultado in ("Benigno", "Benigno", "Maligno"):
+            self._laudo(self._analise(resultado))
+        incremental = self._contagens()
+
+        AgregadoDiarioLaudos.objects.all().delete()
+        reconstruir()
+
+        self.assertEqual(self._contagens(), incremental)
+        self.assertEqual(incremental, {"Benigno": (2, 2), "Maligno": (1, 1)})
+
+    def test_resumo_servido_dos_agregados(self):
+        for resultado in ("Benigno", "Maligno", "Maligno"):
+            self._laudo(self._analise(resultado))
+
+        # 4 consultas nos agregados + log de auditoria (nenhum laudo carregado)
+        with self.assertNumQueries(5):
+            resp = self.client.get(reverse("relatorio-laudos-resumo"), {"inicio": str(self.hoje), "fim": str(self.hoje)})
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["total_laudos"], 3)
+        por_resultado = {r["resultado"]: r["laudos"] for r in resp.data["por_resultado"]}
+        self.assertEqual(por_resultado, {"Benigno": 1, "Maligno": 2})
+        self.assertEqual(resp.data["por_instituicao"][0]["instituicao_nome"], "Clínica Agregados")
+
+        resp = self.client.get(reverse("relatorio-laudos-resumo"), {"inicio": "ontem"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,269 @@
+"""
+tests/test_aprendizado.py
+
+Testes do aprendizado incremental (weka_adapter/aprendizado.py), do job que
+incorpora laudos revisados ao registro de modelos e da revisão do médico
+(POST /api/laudos/<id>/revisao/).
+
+Como rodar:
+    python manage.py test tests.test_aprendizado
+"""
+
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from nucleo.models import (
+    Instituicao, PerfilUsuario, Paciente, ImagemExame, AnaliseImagem, Laudo,
+    VersaoModelo, CaracteristicasImagem,
+)
+from weka_adapter.aprendizado import NaiveBayesIncremental
+from weka_adapter.avaliacao import CLASSES
+from weka_adapter.registro_modelos import atualizar_modelo_incremental, invalidar_cache_modelo
+from weka_adapter.adapters import WekaAdapter
+
+
+def imagem_png(nivel):
+    """PNG 32x32 em tom de cinza uniforme (nível 0-255)."""
+    buffer = BytesIO()
+    Image.new('L', (32, 32), color=nivel).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class NaiveBayesIncrementalTests(SimpleTestCase):
+
+    def test_incremental_equivale_ao_treino_em_lote(self):
+        instancias = [{'media': float(v), 'lado': 'E' if v < 50 else 'D'} for v in range(0, 100, 5)]
+        classes = ['Benigno' if v < 50 else 'Maligno' for v in range(0, 100, 5)]
+
+        lote = NaiveBayesIncremental()
+        lote.treinar(instancias, classes)
+
+        incremental = NaiveBayesIncremental.de_dict(NaiveBayesIncremental().para_dict())
+        incremental.treinar(instancias[:7], classes[:7])
+        incremental = NaiveBayesIncremental.de_dict(incremental.para_dict())
+        incremental.treinar(instancias[7:], classes[7:])
+
+        self.assertEqual(lote.checksum(), NaiveBayesIncremental.de_dict(incremental.para_dict()).checksum())
+        self.assertEqual(incremental.classificar({'media': 90.0, 'lado': 'D'})['classificacao'], 'Maligno')
+        self.assertEqual(incremental.classificar({'media': 10.0, 'lado': 'E'})['classificacao'], 'Benigno')
+
+    def test_remover_desfaz_atualizar(self):
+        instancias = [{'media': float(v), 'lado': 'E' if v < 50 else 'D'} for v in range(0, 100, 5)]
+        classes = ['Benigno' if v < 50 else 'Maligno' for v in range(0, 100, 5)]
+        base = NaiveBayesIncremental()
+        base.treinar(instancias, classes)
+
+        modelo = NaiveBayesIncremental.de_dict(base.para_dict())
+        modelo.atualizar({'media': 12.0, 'lado': 'E'}, 'Maligno')
+        modelo.remover({'media': 12.0, 'lado': 'E'}, 'Maligno')
+
+        esperado, obtido = base.para_dict(), modelo.para_dict()
+        self.assertEqual(obtido['contagem_classes'], esperado['contagem_classes'])
+        self.assertEqual(obtido['nominais'], esperado['nominais'])
+        for campo in ('n', 'media', 'm2'):
+            for a, b in zip(obtido['numericos']['media'][campo], esperado['numericos']['media'][campo]):
+                self.assertAlmostEqual(a, b, places=9)
+
+
+class LaudosComImagemMixin:
+    """Cria a cadeia Paciente -> ImagemExame (PNG real) -> AnaliseImagem -> Laudo."""
+
+    def setUp(self):
+        invalidar_cache_modelo()
+        self.inst = Instituicao.objects.create(nome_instituicao="Clínica IA")
+        self.user = User.objects.create_user(username="medico_ia", password="x")
+        self.perfil = PerfilUsuario.objects.create(usuario=self.user, instituicao=self.inst)
+        self.paciente = Paciente.objects.create(nome_completo="Paciente IA")
+
+    def tearDown(self):
+        invalidar_cache_modelo()
+
+    def criar_laudo(self, nivel, resultado, concorda=True, corrigida=None, revisado=True):
+        imagem = ImagemExame.objects.create(
+            paciente=self.paciente, usuario_upload=self.user, instituicao=self.inst,
+            caminho_arquivo=SimpleUploadedFile("termo.png", imagem_png(nivel)),
+        )
+        analise = AnaliseImagem.objects.create(
+            imagem=imagem, usuario_solicitante=self.user,
+            resultado_classificacao=resultado, hash_imagem=f"hash-{imagem.id}",
+        )
+        return Laudo.objects.create(
+            analise=analise, usuario_responsavel=self.perfil, texto_laudo_completo="x",
+            confirmou_concordancia=concorda, classificacao_corrigida=corrigida,
+            revisado_em=timezone.now() if revisado else None,
+        )
+
+    def revisar(self, laudo, concorda=True, corrigida=None):
+        laudo.confirmou_concordancia, laudo.classificacao_corrigida = concorda, corrigida
+        laudo.revisado_em = timezone.now()
+        laudo.save()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class AtualizacaoIncrementalTests(LaudosComImagemMixin, TestCase):
+
+    def test_publica_versoes_incorporando_apenas_laudos_novos(self):
+        self.criar_laudo(30, 'Benigno')
+        self.criar_laudo(40, 'Benigno')
+        self.criar_laudo(220, 'Maligno')
+        # Médico discordou, mas não informou a classe correta: não entra no treino
+        self.criar_laudo(100, 'Cisto', concorda=False)
+
+        resumo = atualizar_modelo_incremental()
+        self.assertEqual(resumo['incorporados'], 3)
+        self.assertEqual(resumo['ignorados'], 0)
+        v1 = VersaoModelo.objects.get(ativo=True)
+        self.assertEqual(v1.instancias_treino, 3)
+        self.assertEqual(CaracteristicasImagem.objects.count(), 3)
+
+        # Correção do médico: IA disse Benigno, o correto era Maligno
+        self.criar_laudo(230, 'Benigno', concorda=False, corrigida='Maligno')
+        resumo = atualizar_modelo_incremental()
+
+        self.assertEqual(resumo['incorporados'], 1)
+        v2 = VersaoModelo.objects.get(ativo=True)
+        self.assertEqual(v2.versao_anterior, v1)
+        self.assertEqual(v2.instancias_treino, 4)
+        self.assertEqual(VersaoModelo.objects.filter(ativo=True).count(), 1)
+
+        # Sem laudos novos, nenhuma versão é criada
+        self.assertIsNone(atualizar_modelo_incremental()['nova_versao'])
+
+        resultado = WekaAdapter().classificar({'media': 225.0, 'p95': 225.0})
+        self.assertEqual(resultado['modelo'], v2.versao)
+        self.assertEqual(resultado['classificacao'], 'Maligno')
+
+    def test_laudo_sem_revisao_do_medico_nao_treina(self):
+        # Emissão normal: concordância padrão (True), mas ninguém revisou
+        self.criar_laudo(30, 'Benigno', revisado=False)
+        resumo = atualizar_modelo_incremental()
+        self.assertEqual(resumo['incorporados'], 0)
+        self.assertFalse(VersaoModelo.objects.exists())
+
+    def test_revisao_tardia_e_correcao_de_laudo_ja_aprendido(self):
+        antigo = self.criar_laudo(30, 'Benigno', revisado=False)
+        self.criar_laudo(40, 'Benigno')
+        atualizar_modelo_incremental()
+        self.assertEqual(VersaoModelo.objects.get(ativo=True).instancias_treino, 1)
+
+        # Laudo com id menor que o já incorporado, revisado depois: ainda entra
+        self.revisar(antigo)
+        resumo = atualizar_modelo_incremental()
+        self.assertEqual((resumo['incorporados'], resumo['removidos']), (1, 0))
+        antigo.refresh_from_db()
+        self.assertEqual(antigo.rotulo_incorporado, 'Benigno')
+
+        # Médico muda de ideia: sai como Benigno, entra como Maligno
+        self.revisar(antigo, concorda=False, corrigida='Maligno')
+        resumo = atualizar_modelo_incremental()
+        self.assertEqual((resumo['incorporados'], resumo['removidos']), (1, 1))
+        ativa = VersaoModelo.objects.get(ativo=True)
+        self.assertEqual(ativa.instancias_treino, 2)
+        self.assertEqual(ativa.parametros['contagem_classes'][CLASSES.index('Maligno')], 1)
+        self.assertEqual(ativa.parametros['contagem_classes'][CLASSES.index('Benigno')], 1)
+
+        # Discordou sem informar a classe: o exemplo sai do modelo
+        self.revisar(antigo, concorda=False)
+        resumo = atualizar_modelo_incremental()
+        self.assertEqual((resumo['incorporados'], resumo['removidos']), (0, 1))
+        self.assertEqual(VersaoModelo.objects.get(ativo=True).instancias_treino, 1)
+        antigo.refresh_from_db()
+        self.assertIsNone(antigo.rotulo_incorporado)
+
+    def test_recomecar_e_numero_de_versao_apos_remocao(self):
+        self.criar_laudo(30, 'Benigno')
+        atualizar_modelo_incremental()
+        self.criar_laudo(220, 'Maligno')
+        atualizar_modelo_incremental()
+        # Versão antiga removida: o próximo número não pode repetir o da ativa
+        VersaoModelo.objects.filter(ativo=False).delete()
+
+        resumo = atualizar_modelo_incremental(recomecar=True)
+        self.assertEqual(resumo['incorporados'], 2)
+        self.assertEqual(VersaoModelo.objects.count(), 2)
+        self.assertEqual(VersaoModelo.objects.get(ativo=True).instancias_treino, 2)
+
+
+class RevisaoLaudoApiTests(LaudosComImagemMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media = override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+        self.media.enable()
+        self.addCleanup(self.media.disable)
+        self.laudo = self.criar_laudo(30, 'Benigno', revisado=False)
+        self.url = reverse('laudo-revisao', args=[self.laudo.id])
+
+    def test_medico_corrige_laudo(self):
+        self.client.force_authenticate(self.user)
+        resp = self.client.post(self.url, {"concorda": False, "classificacao_corrigida": "Maligno"}, format='json')
+
+        self.assertEqual(resp.status_code, 200)
+        self.laudo.refresh_from_db()
+        self.assertEqual((self.laudo.confirmou_concordancia, self.laudo.classificacao_corrigida), (False, "Maligno"))
+        self.assertIsNotNone(self.laudo.revisado_em)
+        self.assertEqual(self.laudo.revisado_por, self.perfil)
+
+    def test_validacao_e_apenas_medico(self):
+        self.client.force_authenticate(self.user)
+        resp = self.client.post(self.url, {"concorda": False, "classificacao_corrigida": "AGUARDANDO"}, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+        self.perfil.papel = 'TECNICO'
+        self.perfil.save()
+        resp = self.client.post(self.url, {"concorda": True}, format='json')
+        self.assertEqual(resp.status_code, 403)
+        self.laudo.refresh_from_db()
+        self.assertIsNone(self.laudo.revisado_em)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ReclassificacaoHistoricoTests(LaudosComImagemMixin, TestCase):
+    """Backfill (reclassificar_historico) executado no próprio processo."""
+
+    def test_backfill_grava_tabela_lateral_e_retoma_por_particao(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from nucleo.models import ReclassificacaoAnalise, ParticaoReclassificacao
+
+        for nivel, resultado in [(20, 'Benigno'), (30, 'Benigno'), (210, 'Maligno'), (240, 'Maligno')]:
+            self.criar_laudo(nivel, resultado)
+        atualizar_modelo_incremental()
+
+        call_command('reclassificar_historico', '--workers', '1', '--tamanho-particao', '2', stdout=StringIO())
+
+        self.assertEqual(ReclassificacaoAnalise.objects.count(), 4)
+        self.assertEqual(ParticaoReclassificacao.objects.count(), 2)
+
+        # Segunda execução: tudo concluído, nada é reprocessado
+        saida = StringIO()
+        call_command('reclassificar_historico', '--workers', '1', '--tamanho-particao', '2', stdout=saida)
+        self.assertIn("0 pendentes", saida.getvalue())
+        self.assertEqual(ReclassificacaoAnalise.objects.count(), 4)
+
+    def test_retomada_com_outro_tamanho_de_particao_nao_pula_ids(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from nucleo.models import ReclassificacaoAnalise, ParticaoReclassificacao
+
+        for nivel, resultado in [(20, 'Benigno'), (30, 'Benigno'), (210, 'Maligno'), (240, 'Maligno')]:
+            self.criar_laudo(nivel, resultado)
+        atualizar_modelo_incremental()
+
+        call_command('reclassificar_historico', '--workers', '1', '--tamanho-particao', '2', stdout=StringIO())
+        # Interrompida antes da segunda partição
+        segunda = ParticaoReclassificacao.objects.order_by('id_inicio').last()
+        ReclassificacaoAnalise.objects.filter(analise_id__gte=segunda.id_inicio).delete()
+        segunda.delete()
+
+        # Partição maior começa no mesmo id da primeira, mas cobre também a que faltou
+        call_command('reclassificar_historico', '--workers', '1', '--tamanho-particao', '4', stdout=StringIO())
+        self.assertEqual(ReclassificacaoAnalise.objects.count(), 4)
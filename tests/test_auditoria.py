@@ -0,0 +1,144 @@
+"""
+tests/test_auditoria.py
+
+Auditoria com escrita tardia (nucleo/auditoria.py).
+
+Cobre:
+- registrar() não faz consulta ao banco: o evento vai para o diário
+- descarregar() grava em lote, com o horário e o usuário originais
+- replay de segmento deixado por processo que morreu, sem duplicar
+  eventos já gravados; linha truncada é ignorada
+- segmento que falha não impede a gravação dos seguintes
+- usuário removido antes da gravação vira NULL (como o SET_NULL)
+- sem escrita tardia (padrão sem a variável de ambiente), o evento é
+  gravado na hora
+
+Como rodar:
+    python manage.py test tests.test_auditoria
+"""
+
+import glob
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from nucleo import auditoria
+from nucleo.models import LogAuditoria
+
+
+class EscritaTardiaTests(TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, ignore_errors=True)
+        configuracao = override_settings(AUDITORIA_ESCRITA_TARDIA=True, AUDITORIA_DIARIO_DIR=self.diretorio)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        # Sem thread em segundo plano: o teste chama descarregar() quando quer
+        flusher = patch("nucleo.auditoria._iniciar_flusher", return_value=object())
+        flusher.start()
+        self.addCleanup(flusher.stop)
+        auditoria._reiniciar_estado()
+        self.addCleanup(self._fechar_segmento)
+        self.usuario = User.objects.create_user(username="auditado", password="123")
+
+    def _fechar_segmento(self):
+        if auditoria._estado.get('arquivo') is not None:
+            auditoria._estado['arquivo'].close()
+        auditoria._reiniciar_estado()
+
+    def _simular_queda(self):
+        """O processo morre com o segmento aberto; o prazo de órfão já passou."""
+        self._fechar_segmento()
+        antigo = time.time() - 3600
+        for caminho in glob.glob(os.path.join(self.diretorio, "*")):
+            os.utime(caminho, (antigo, antigo))
+
+    def test_registrar_sem_consulta_e_descarregar_em_lote(self):
+        with self.assertNumQueries(0):
+            for n in range(3):
+                auditoria.registrar('LOGIN', 'Sistema', f"tentativa {n}", usuario=self.usuario, ip_origem="10.0.0.1")
+        self.assertEqual(LogAuditoria.objects.count(), 0)
+
+        self.assertEqual(auditoria.descarregar(), 3)
+        logs = list(LogAuditoria.objects.order_by('data_hora'))
+        self.assertEqual([log.detalhe for log in logs], ["tentativa 0", "tentativa 1", "tentativa 2"])
+        self.assertTrue(all(log.usuario_id == self.usuario.pk and log.ip_origem == "10.0.0.1" for log in logs))
+        self.assertEqual(os.listdir(self.diretorio), [])
+
+    def test_horario_original_preservado(self):
+        momento = timezone.now() - timedelta(minutes=5)
+        with patch("nucleo.auditoria.timezone.now", return_value=momento):
+            auditoria.registrar('LOGIN', 'Sistema', usuario=self.usuario)
+        auditoria.descarregar()
+        self.assertEqual(LogAuditoria.objects.get().data_hora, momento)
+
+    def test_replay_de_processo_que_morreu_sem_duplicar(self):
+        auditoria.registrar('LOGIN', 'Sistema', "antes da queda", usuario=self.usuario)
+        auditoria.registrar('LOGOUT', 'Sistema', "antes da queda", usuario=self.usuario)
+        caminho = auditoria._estado['caminho'] + '.aberto'
+        # Os mesmos eventos já tinham sido gravados (queda entre o commit e o remove)
+        auditoria._inserir(auditoria._ler_eventos(caminho))
+        with open(caminho, 'ab') as arquivo:
+            arquivo.write(b'{"id": "trunc')  # queda no meio de um append
+        self._simular_queda()
+
+        self.assertEqual(auditoria.descarregar(), 2)
+        self.assertEqual(LogAuditoria.objects.count(), 2)
+        self.assertEqual(os.listdir(self.diretorio), [])
+
+    def test_segmento_aberto_recente_de_outro_processo_nao_e_tocado(self):
+        auditoria.registrar('LOGIN', 'Sistema', usuario=self.usuario)
+        self._fechar_segmento()
+        os.utime(glob.glob(os.path.join(self.diretorio, "*.aberto"))[0])
+
+        self.assertEqual(auditoria.descarregar(), 0)
+        self.assertEqual(LogAuditoria.objects.count(), 0)
+
+    def test_segmento_com_falha_nao_trava_os_seguintes(self):
+        auditoria.registrar('LOGIN', 'Sistema', "primeiro segmento", usuario=self.usuario)
+        auditoria._selar()
+        auditoria.registrar('LOGOUT', 'Sistema', "segundo segmento", usuario=self.usuario)
+
+        inserir = auditoria._inserir
+        chamadas = []
+
+        def falhar_no_primeiro(eventos):
+            chamadas.append(eventos)
+            if len(chamadas) == 1:
+                raise RuntimeError("linha envenenada")
+            inserir(eventos)
+
+        with patch("nucleo.auditoria._inserir", side_effect=falhar_no_primeiro):
+            self.assertEqual(auditoria.descarregar(), 1)
+        self.assertEqual(list(LogAuditoria.objects.values_list('detalhe', flat=True)), ["segundo segmento"])
+        self.assertEqual(len(glob.glob(os.path.join(self.diretorio, "*.pronto"))), 1)
+
+        # Próximo ciclo: o que falhou é gravado
+        self.assertEqual(auditoria.descarregar(), 1)
+        self.assertEqual(LogAuditoria.objects.count(), 2)
+
+    def test_usuario_removido_vira_nulo(self):
+        auditoria.registrar('LOGIN', 'Sistema', usuario=self.usuario)
+        self.usuario.delete()
+
+        auditoria.descarregar()
+        log = LogAuditoria.objects.get()
+        self.assertIsNone(log.usuario_id)
+
+
+class EscritaImediataTests(TestCase):
+
+    @override_settings(AUDITORIA_ESCRITA_TARDIA=False)
+    def test_grava_na_hora(self):
+        with self.assertNumQueries(1):
+            auditoria.registrar('LOGIN', 'Sistema', "direto", ip_origem="10.0.0.2")
+        log = LogAuditoria.objects.get()
+        self.assertEqual((log.detalhe, log.ip_origem, log.usuario_id), ("direto", "10.0.0.2", None))
@@ -0,0 +1,99 @@
+"""
+tests/test_avaliacao.py
+
+Testes do harness de avaliação do classificador (weka_adapter/avaliacao.py).
+
+Como rodar:
+    python manage.py test tests.test_avaliacao
+"""
+
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from weka_adapter import avaliacao
+
+
+ARFF_EXEMPLO = """@RELATION simulacoes
+
+@ATTRIBUTE nome STRING
+@ATTRIBUTE cpf STRING
+@ATTRIBUTE idade NUMERIC
+@ATTRIBUTE sintomas STRING
+@ATTRIBUTE diagnostico STRING
+@ATTRIBUTE confianca NUMERIC
+
+@DATA
+'Ana','111',40,'dor localizada','CISTO',0.9
+'Bia','222',55,'aumento de temperatura, região rígida','MALIGNO',0.8
+'Caio','333',30,'sem sintomas aparentes','SAUDÁVEL',0.7
+'Davi','444',61,'formigamento leve','INCONCLUSIVO',0.75
+"""
+
+
+class ClassificadorPorSintoma:
+    """Classificador determinístico: acerta tudo que tiver 'dor localizada'."""
+
+    def classificar(self, dados):
+        classe = 'Cisto' if dados.get('sintomas:dor localizada') == '1' else 'Benigno'
+        return {"classificacao": classe, "confianca": 1.0, "modelo": "teste"}
+
+
+class CarregarArffTests(SimpleTestCase):
+
+    def setUp(self):
+        fd, self.caminho = tempfile.mkstemp(suffix='.arff')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(ARFF_EXEMPLO)
+
+    def tearDown(self):
+        os.remove(self.caminho)
+
+    def test_normaliza_classes_ignora_identificadores_e_expande_sintomas(self):
+        instancias, classes, descartadas = avaliacao.carregar_arff(self.caminho)
+
+        self.assertEqual(classes, ['Cisto', 'Maligno', 'Saudavel'])
+        self.assertEqual(descartadas, 1)  # INCONCLUSIVO
+
+        primeira = instancias[0]
+        self.assertNotIn('nome', primeira)
+        self.assertNotIn('cpf', primeira)
+        self.assertEqual(primeira['idade'], 40.0)
+        self.assertEqual(primeira['sintomas:dor localizada'], '1')
+        self.assertEqual(primeira['sintomas:região rígida'], '0')
+
+
+class ValidacaoCruzadaTests(SimpleTestCase):
+
+    def test_folds_estratificados_mantem_proporcao(self):
+        classes = ['Maligno'] * 10 + ['Benigno'] * 20
+        particoes = avaliacao.dividir_estratificado(classes, 5)
+
+        for particao in particoes:
+            rotulos = [classes[i] for i in particao]
+            self.assertEqual(rotulos.count('Maligno'), 2)
+            self.assertEqual(rotulos.count('Benigno'), 4)
+
+    def test_matriz_confusao_e_acuracia(self):
+        instancias = [{'sintomas:dor localizada': '1'}] * 6 + [{'sintomas:dor localizada': '0'}] * 6
+        classes = ['Cisto'] * 6 + ['Benigno'] * 3 + ['Maligno'] * 3
+
+        resultado = avaliacao.validacao_cruzada(ClassificadorPorSintoma, instancias, classes, folds=3)
+
+        self.assertEqual(resultado['acuracia'], 0.75)
+        linhas = dict(zip(avaliacao.CLASSES, resultado['matriz_confusao']['linhas']))
+        self.assertEqual(linhas['Maligno'], [0, 3, 0, 0])
+        self.assertEqual(resultado['por_classe']['Cisto']['revocacao'], 1.0)
+
+    def test_percentil_nearest_rank(self):
+        valores = list(range(1, 101))
+        self.assertEqual(avaliacao.percentil(valores, 50), 50)
+        self.assertEqual(avaliacao.percentil(valores, 99), 99)
+
+    def test_percentil_nearest_rank_com_n_impar(self):
+        valores = [1, 2, 3, 4, 5]
+        self.assertEqual(avaliacao.percentil(valores, 50), 3)
+        self.assertEqual(avaliacao.percentil(valores, 90), 5)
+        self.assertEqual(avaliacao.percentil(valores, 20), 1)
+        self.assertEqual(avaliacao.percentil(valores, 21), 2)
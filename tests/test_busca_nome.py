@@ -0,0 +1,119 @@
+"""
+tests/test_busca_nome.py
+
+Busca de pacientes por parte do nome pelo índice cego (nucleo/busca_nome.py).
+
+Cobre:
+- busca parcial sem acento/maiúsculas, partículas ignoradas
+- vários termos: só pacientes que têm todos
+- renomear atualiza os tokens; excluir apaga
+- importação em lote (bulk_create) também indexa
+- rota pacientes/busca/: autenticada, 400 sem termo de 3 letras, limite
+  (preenchido mesmo quando a conferência descarta candidatos)
+- salvar sem mudar o nome não reescreve o índice
+- o banco guarda só HMACs (nenhum prefixo em claro)
+
+Como rodar:
+    python manage.py test tests.test_busca_nome
+"""
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.busca_nome import buscar, tokens_nome
+from nucleo.models import Paciente, TokenNomePaciente
+
+
+class BuscaNomeTests(APITestCase):
+
+    def setUp(self):
+        self.jose = Paciente.objects.create(nome_completo="José da Conceição Silva")
+        self.joana = Paciente.objects.create(nome_completo="Joana Silveira")
+        self.maria = Paciente.objects.create(nome_completo="Maria Souza")
+
+    def _nomes(self, texto):
+        return sorted(p.nome_completo for p in buscar(texto))
+
+    def test_busca_parcial_sem_acento(self):
+        self.assertEqual(self._nomes("conceicao"), ["José da Conceição Silva"])
+        self.assertEqual(self._nomes("JOS"), ["José da Conceição Silva"])
+        self.assertEqual(self._nomes("silv"), ["Joana Silveira", "José da Conceição Silva"])
+        self.assertEqual(self._nomes("da"), [])
+
+    def test_varios_termos_exigem_todos(self):
+        self.assertEqual(self._nomes("jo silveira"), ["Joana Silveira"])  # "jo" é curto demais e é ignorado
+        self.assertEqual(self._nomes("joa silv"), ["Joana Silveira"])
+        self.assertEqual(self._nomes("mar silv"), [])
+
+    def test_renomear_e_excluir_atualizam_indice(self):
+        self.maria.nome_completo = "Maria Albuquerque"
+        self.maria.save()
+        self.assertEqual(self._nomes("souza"), [])
+        self.assertEqual(self._nomes("albuq"), ["Maria Albuquerque"])
+
+        self.maria.delete()
+        self.assertEqual(self._nomes("albuq"), [])
+        self.assertFalse(TokenNomePaciente.objects.filter(paciente_id=self.maria.pk).exists())
+
+    def test_indice_guarda_apenas_hmac(self):
+        tokens = set(TokenNomePaciente.objects.filter(paciente=self.jose).values_list('token', flat=True))
+        self.assertEqual(tokens, tokens_nome("Jose Conceicao Silva"))
+        self.assertTrue(all(len(t) == 64 and "jos" not in t for t in tokens))
+
+    def test_importacao_indexa_e_comando_reindexa(self):
+        user = User.objects.create_user(username="medico_busca", password="123")
+        self.client.force_authenticate(user)
+        arquivo = SimpleUploadedFile("p.csv", "nome_completo\nBeatriz Nogueira\n".encode("utf-8"))
+        self.client.post(reverse("paciente-importar"), {"arquivo": arquivo}, format="multipart")
+        self.assertEqual(self._nomes("noguei"), ["Beatriz Nogueira"])
+
+        TokenNomePaciente.objects.all().delete()
+        call_command("reindexar_nomes_pacientes", stdout=StringIO())
+        self.assertEqual(self._nomes("beat"), ["Beatriz Nogueira"])
+        self.assertEqual(self._nomes("silv"), ["Joana Silveira", "José da Conceição Silva"])
+
+    def test_rota_de_busca(self):
+        user = User.objects.create_user(username="medico_busca", password="123")
+        self.client.force_authenticate(user)
+        url = reverse("paciente-busca")
+
+        resp = self.client.get(url, {"nome": "jo"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        resp = self.client.get(url, {"nome": "silv", "limite": 1})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([p["nome_completo"] for p in resp.data["resultados"]], ["Joana Silveira"])
+
+        with self.assertNumQueries(1):
+            buscar("maria sou")
+
+        self.client.force_authenticate(None)
+        self.assertIn(self.client.get(url, {"nome": "silv"}).status_code,
+                      (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_limite_completado_apesar_de_candidatos_descartados(self):
+        longo = "a" * 20
+        # Mesmos 20 primeiros caracteres: o índice não distingue, a conferência sim
+        for n in range(3):
+            Paciente.objects.create(nome_completo=f"Paciente {longo}x{n}")
+        Paciente.objects.create(nome_completo=f"Paciente {longo}y")
+        Paciente.objects.create(nome_completo=f"Outro {longo}y")
+
+        resultado = buscar(f"{longo}y", limite=2)
+        self.assertEqual(sorted(p.nome_completo for p in resultado),
+                         [f"Outro {longo}y", f"Paciente {longo}y"])
+
+    def test_save_sem_mudar_nome_nao_reescreve_tokens(self):
+        paciente = Paciente.objects.get(pk=self.maria.pk)
+        paciente.sintomas = "Tosse"
+        with CaptureQueriesContext(connection) as consultas:
+            paciente.save()
+        self.assertFalse([c for c in consultas.captured_queries if "tokennomepaciente" in c["sql"]])
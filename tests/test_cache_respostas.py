@@ -0,0 +1,141 @@
+"""
+tests/test_cache_respostas.py
+
+Cache de leitura das respostas (nucleo/cache_respostas.py).
+
+Cobre:
+- detalhe de paciente: segunda leitura vem do cache (só a consulta da
+  versão) e o conteúdo guardado está cifrado
+- PUT no paciente troca a versão: a entrada antiga não é mais usada, mesmo
+  sem invalidação (caso de outro processo com cache local)
+- com cache local e vários processos, entradas só com tags não são guardadas
+- histórico de laudos: acerto continua auditando; novo laudo invalida
+- simulações: cache global, invalidado ao salvar uma simulação
+- estatísticas de acertos/faltas
+
+Como rodar:
+    python manage.py test tests.test_cache_respostas
+"""
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from nucleo import cache_respostas
+from nucleo.models import (
+    Instituicao,
+    PerfilUsuario,
+    Paciente,
+    ImagemExame,
+    AnaliseImagem,
+    Laudo,
+    LogAuditoria,
+)
+from simulador.models import Simulacao
+
+
+@override_settings(CACHE_RESPOSTAS_PROCESSO_UNICO=True)
+class CacheRespostasTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.instituicao = Instituicao.objects.create(nome_instituicao="Clínica Cache", cnpj="77.777.777/0001-77")
+        self.user = User.objects.create_user(username="medico_cache", password="123")
+        self.perfil = PerfilUsuario.objects.create(usuario=self.user, papel="MEDICO", instituicao=self.instituicao)
+        self.paciente = Paciente.objects.create(nome_completo="Ana Cache", cpf="111.444.777-35")
+        self.outro = Paciente.objects.create(nome_completo="Bruno Cache", cpf="529.982.247-25")
+        self.client.force_authenticate(self.user)
+
+    def _criar_laudo(self, paciente):
+        imagem = ImagemExame.objects.create(
+            paciente=paciente,
+            usuario_upload=self.user,
+            instituicao=self.instituicao,
+            caminho_arquivo=SimpleUploadedFile("exame.bin", b"bytes"),
+        )
+        analise = AnaliseImagem.objects.create(
+            imagem=imagem, usuario_solicitante=self.user, resultado_classificacao="Benigno", hash_imagem="h"
+        )
+        return Laudo.objects.create(analise=analise, usuario_responsavel=self.perfil, texto_laudo_completo="Texto")
+
+    def _detalhe(self, paciente):
+        return self.client.get(reverse("paciente-detail", args=[paciente.uuid_paciente]))
+
+    def test_detalhe_de_paciente_em_cache_cifrado(self):
+        primeira = self._detalhe(self.paciente)
+        self.assertEqual(primeira["X-Cache"], "MISS")
+
+        with self.assertNumQueries(1):
+            segunda = self._detalhe(self.paciente)
+        self.assertEqual(segunda["X-Cache"], "HIT")
+        self.assertEqual(segunda.data, primeira.data)
+        self.assertEqual(segunda["ETag"], primeira["ETag"])
+
+        # Nada de texto claro no backend de cache
+        guardados = [v for k, v in cache._cache.items() if ":paciente_detalhe:" in k]
+        self.assertTrue(guardados)
+        self.assertFalse(any(b"Ana Cache" in v for v in guardados))
+
+    def test_put_invalida_so_o_paciente_alterado(self):
+        self._detalhe(self.paciente)
+        self._detalhe(self.outro)
+
+        self.client.put(reverse("paciente-detail", args=[self.paciente.uuid_paciente]),
+                        {"nome_completo": "Ana Alterada"}, format="json")
+
+        resp = self._detalhe(self.paciente)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["nome_completo"], "Ana Alterada")
+        self.assertEqual(self._detalhe(self.outro)["X-Cache"], "HIT")
+
+    def test_edicao_em_outro_processo_nao_serve_versao_antiga(self):
+        primeira = self._detalhe(self.paciente)
+        # Outro worker grava sem passar pelos signals deste processo
+        Paciente.objects.filter(pk=self.paciente.pk).update(versao=primeira.data["versao"] + 1)
+
+        resp = self.client.get(reverse("paciente-detail", args=[self.paciente.uuid_paciente]),
+                               HTTP_IF_NONE_MATCH=primeira["ETag"])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertNotEqual(resp["ETag"], primeira["ETag"])
+
+    @override_settings(CACHE_RESPOSTAS_PROCESSO_UNICO=False)
+    def test_cache_local_com_varios_processos_nao_guarda_entradas_por_tag(self):
+        url = reverse("listar_simulacoes")
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        # Detalhe de paciente continua em cache: a chave tem a versão do banco
+        self._detalhe(self.paciente)
+        self.assertEqual(self._detalhe(self.paciente)["X-Cache"], "HIT")
+
+    def test_historico_audita_no_acerto_e_invalida_com_novo_laudo(self):
+        self._criar_laudo(self.paciente)
+        url = reverse("laudos-historico")
+
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        resp = self.client.get(url)
+        self.assertEqual(resp["X-Cache"], "HIT")
+        self.assertEqual(LogAuditoria.objects.filter(recurso="Histórico de Laudos").count(), 2)
+
+        self._criar_laudo(self.outro)
+        resp = self.client.get(url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(len(resp.data["resultados"]), 2)
+
+    def test_simulacoes_e_estatisticas(self):
+        cache_respostas.zerar_estatisticas()
+        url = reverse("listar_simulacoes")
+        self.assertEqual(self.client.get(url).data, [])
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        Simulacao.objects.create(nome="Sim", cpf_fake="000", idade=30, sintomas="-",
+                                 diagnostico_fake="Benigno", confianca=0.9)
+        resp = self.client.get(url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(len(resp.data), 1)
+
+        self.assertEqual(cache_respostas.estatisticas()["simulacoes_lista"],
+                         {"acertos": 1, "faltas": 2, "taxa_acerto": 0.333})
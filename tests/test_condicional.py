@@ -0,0 +1,78 @@
+"""
+tests/test_condicional.py
+
+GET condicional (ETag / If-None-Match) nas rotas de paciente.
+
+Cobre:
+- detalhe devolve ETag; repetido com If-None-Match responde 304 numa
+  consulta e sem decifrar nenhum campo
+- PUT sobe a versão e troca a ETag
+- listagem responde 304 enquanto a coleção não muda, e troca a ETag
+  depois de um cadastro
+
+Como rodar:
+    python manage.py test tests.test_condicional
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.models import Paciente
+
+
+class GetCondicionalPacienteTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="medico_etag", password="123")
+        self.client.force_authenticate(self.user)
+        self.paciente = Paciente.objects.create(nome_completo="Ana Souza", cpf="123.456.789-00")
+
+    def _url_detalhe(self):
+        return reverse("paciente-detail", args=[self.paciente.uuid_paciente])
+
+    def test_detalhe_304_sem_decifrar(self):
+        resp = self.client.get(self._url_detalhe())
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        etag = resp["ETag"]
+        self.assertIn("Last-Modified", resp)
+
+        with patch("nucleo.seguranca.encrypted_char_field.decrypt_value") as decifrar, \
+                self.assertNumQueries(1):
+            resp = self.client.get(self._url_detalhe(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp["ETag"], etag)
+        decifrar.assert_not_called()
+
+    def test_put_troca_a_etag(self):
+        etag = self.client.get(self._url_detalhe())["ETag"]
+
+        resp = self.client.put(
+            self._url_detalhe(), {"nome_completo": "Ana Souza", "sintomas": "Tosse"}, format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["versao"], 2)
+        self.assertNotEqual(resp["ETag"], etag)
+
+        resp = self.client.get(self._url_detalhe(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["sintomas"], "Tosse")
+
+    def test_listagem_304_ate_novo_cadastro(self):
+        url = reverse("paciente-list-create")
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Outra página (parâmetros diferentes) tem outra ETag
+        self.assertNotEqual(self.client.get(url, {"tamanho": 1})["ETag"], etag)
+
+        Paciente.objects.create(nome_completo="Bruno Lima", cpf="987.654.321-00")
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data["resultados"]), 2)
@@ -0,0 +1,99 @@
+"""
+tests/test_exportacao_streaming.py
+
+Exportações em streaming (CSV / NDJSON / array JSON) do histórico e do relatório de laudos.
+
+Cobre:
+- ?format=csv devolve StreamingHttpResponse com cabeçalho e uma linha por laudo
+- ?format=ndjson devolve um objeto JSON por linha
+- ?format=json-array devolve um array JSON válido, enviado em vários blocos,
+  com ou sem orjson e com os mesmos registros do NDJSON
+- sem format, a resposta JSON continua igual
+
+Como rodar:
+    python manage.py test tests.test_exportacao_streaming
+"""
+
+import csv
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.renderers import JSONArrayRenderer
+from nucleo.models import (
+    Instituicao,
+    PerfilUsuario,
+    Paciente,
+    ImagemExame,
+    AnaliseImagem,
+    Laudo,
+)
+
+
+class ExportacaoStreamingTests(APITestCase):
+
+    def setUp(self):
+        instituicao = Instituicao.objects.create(nome_instituicao="Clínica Export", cnpj="44.444.444/0001-44")
+        self.user = User.objects.create_user(username="medico_export", password="123")
+        perfil = PerfilUsuario.objects.create(usuario=self.user, papel="MEDICO", instituicao=instituicao)
+        for i in range(3):
+            paciente = Paciente.objects.create(nome_completo=f"Paciente {i}", cpf=f"000.000.000-0{i}")
+            imagem = ImagemExame.objects.create(
+                paciente=paciente,
+                usuario_upload=self.user,
+                instituicao=instituicao,
+                caminho_arquivo=SimpleUploadedFile("exame.bin", b"bytes"),
+            )
+            analise = AnaliseImagem.objects.create(
+                imagem=imagem, usuario_solicitante=self.user, resultado_classificacao="Benigno", hash_imagem="h"
+            )
+            Laudo.objects.create(analise=analise, usuario_responsavel=perfil, texto_laudo_completo="Texto")
+        self.client.force_authenticate(self.user)
+
+    @staticmethod
+    def _conteudo(resp):
+        return b"".join(resp.streaming_content).decode("utf-8")
+
+    def test_historico_csv_em_streaming(self):
+        resp = self.client.get(reverse("laudos-historico"), {"format": "csv"})
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        self.assertTrue(resp["Content-Type"].startswith("text/csv"))
+        linhas = list(csv.DictReader(io.StringIO(self._conteudo(resp))))
+        self.assertEqual(len(linhas), 3)
+        self.assertEqual({l["paciente"] for l in linhas}, {"Paciente 0", "Paciente 1", "Paciente 2"})
+
+    def test_relatorio_ndjson_e_json(self):
+        resp = self.client.get(reverse("relatorio-laudos"), {"format": "ndjson"})
+        self.assertTrue(resp.streaming)
+        registros = [json.loads(l) for l in self._conteudo(resp).splitlines()]
+        self.assertEqual([r["resultado"] for r in registros], ["Benigno"] * 3)
+
+        resp = self.client.get(reverse("relatorio-laudos"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data["resultados"]), 3)
+
+    @patch.object(JSONArrayRenderer, "tamanho_bloco", 1)  # um envio por registro
+    def test_array_json_em_blocos(self):
+        ndjson = self._conteudo(self.client.get(reverse("laudos-historico"), {"format": "ndjson"}))
+        esperado = [json.loads(l) for l in ndjson.splitlines()]
+
+        resp = self.client.get(reverse("laudos-historico"), {"format": "json-array"})
+        self.assertTrue(resp.streaming)
+        self.assertTrue(resp["Content-Type"].startswith("application/json"))
+        self.assertIn('.json"', resp["Content-Disposition"])
+        blocos = list(resp.streaming_content)
+        self.assertEqual(len(blocos), 4)  # 3 laudos + "]"
+        self.assertEqual(json.loads(b"".join(blocos)), esperado)
+
+        # Sem orjson instalado: mesma saída, byte a byte
+        with patch("nucleo.renderers.orjson", None):
+            resp = self.client.get(reverse("laudos-historico"), {"format": "json-array"})
+            self.assertEqual(b"".join(resp.streaming_content), b"".join(blocos))
@@ -0,0 +1,346 @@
+"""
+tests/test_fila_pdf.py
+
+Fila de renderização de PDFs de laudo (RenderizacaoPDF).
+
+Cobre:
+- pedido devolve o job na hora (202) e o status é consultável
+- pedidos repetidos para o mesmo laudo reaproveitam o job ativo
+- job executado marca PRONTO, salva o PDF e registra a impressão
+- falha na renderização marca FALHOU com a mensagem de erro
+- exportação em ZIP (streaming) do período, renderizando os PDFs que faltam
+- exportação em ZIP restrita à própria instituição (exceto ADMIN/AUDITOR)
+- entrega do PDF salvo com ETag/304/Range, re-renderizando só quando o conteúdo muda
+- spooler: laudos da fila de um local viram um único PDF, uma LaudoImpressao por laudo
+- spooler: pedido assumido por outra rodada não é impresso de novo
+
+Como rodar:
+    python manage.py test tests.test_fila_pdf
+"""
+
+import io
+import shutil
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.models import (
+    Instituicao,
+    PerfilUsuario,
+    Paciente,
+    ImagemExame,
+    AnaliseImagem,
+    Laudo,
+    LaudoImpressao,
+    LogAuditoria,
+    RenderizacaoPDF,
+    FilaImpressao,
+)
+from nucleo.views_pdf import _etag_pdf
+from weka_adapter.services.fila_pdf import solicitar_renderizacao, executar_renderizacao
+from weka_adapter.services.report_generator import ReportService
+from weka_adapter.services.spooler import enfileirar_impressao, processar_spool
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PDF_RENDERIZACAO_SINCRONA=True)
+class FilaRenderizacaoPdfTests(APITestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        instituicao = Instituicao.objects.create(nome_instituicao="Clínica Fila", cnpj="11.111.111/0001-11")
+        self.user = User.objects.create_user(username="medico_fila", password="123")
+        perfil = PerfilUsuario.objects.create(
+            usuario=self.user, papel="MEDICO", instituicao=instituicao, registro_profissional="CRM 1"
+        )
+        paciente = Paciente.objects.create(nome_completo="Paciente Fila", cpf="123.456.789-00", data_nascimento="1990-01-01")
+        imagem = ImagemExame.objects.create(
+            paciente=paciente,
+            usuario_upload=self.user,
+            instituicao=instituicao,
+            caminho_arquivo=SimpleUploadedFile("exame.bin", b"bytes"),
+        )
+        analise = AnaliseImagem.objects.create(
+            imagem=imagem, usuario_solicitante=self.user, resultado_classificacao="Benigno", hash_imagem="h"
+        )
+        self.laudo = Laudo.objects.create(
+            analise=analise, usuario_responsavel=perfil, texto_laudo_completo="Texto", codigo_verificacao="FILA0001"
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_pedidos_repetidos_reaproveitam_job_ativo(self):
+        # Sem executar os callbacks de commit: o job continua PENDENTE
+        job1, criado1 = solicitar_renderizacao(self.laudo, self.user, "10.0.0.1")
+        job2, criado2 = solicitar_renderizacao(self.laudo, self.user, "10.0.0.2")
+
+        self.assertTrue(criado1)
+        self.assertFalse(criado2)
+        self.assertEqual(job1.id, job2.id)
+        self.assertEqual(RenderizacaoPDF.objects.filter(laudo=self.laudo).count(), 1)
+
+    @patch("weka_adapter.services.report_generator.aplicar_estilo_laudo", autospec=True)
+    def test_api_enfileira_e_job_fica_pronto(self, _mock_estilo):
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(reverse("laudo-pdf", args=[self.laudo.id]))
+
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+        job_id = resp.data["job_id"]
+
+        resp = self.client.get(reverse("laudo-pdf-status", args=[job_id]))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["status"], RenderizacaoPDF.PRONTO)
+        self.assertIn("pdf", resp.data)
+
+        self.laudo.refresh_from_db()
+        self.assertTrue(self.laudo.caminho_pdf)
+        self.assertEqual(LaudoImpressao.objects.filter(laudo=self.laudo, usuario=self.user).count(), 1)
+
+        # Depois de pronto, um novo pedido cria outro job
+        _job, criado = solicitar_renderizacao(self.laudo, self.user)
+        self.assertTrue(criado)
+
+    @patch("weka_adapter.services.report_generator.aplicar_estilo_laudo", autospec=True)
+    def test_renderizacao_nao_desfaz_edicao_feita_durante_o_render(self, _mock_estilo):
+        job, _ = solicitar_renderizacao(self.laudo, self.user)
+        renderizar = ReportService.renderizar_pdf
+
+        def revisar_durante(laudo):
+            # Médico revisa e edita o texto enquanto o worker renderiza
+            Laudo.objects.filter(id=laudo.id).update(
+                texto_laudo_completo="Texto revisado", confirmou_concordancia=False,
+                classificacao_corrigida="Maligno", revisado_em=timezone.now(),
+            )
+            return renderizar(laudo)
+
+        with patch.object(ReportService, "renderizar_pdf", side_effect=revisar_durante):
+            self.assertEqual(executar_renderizacao(job.id), RenderizacaoPDF.PRONTO)
+
+        self.laudo.refresh_from_db()
+        self.assertEqual(self.laudo.texto_laudo_completo, "Texto revisado")
+        self.assertEqual(self.laudo.classificacao_corrigida, "Maligno")
+        self.assertIsNotNone(self.laudo.revisado_em)
+        self.assertTrue(self.laudo.caminho_pdf)
+        # O PDF foi feito com o texto antigo: continua desatualizado e será refeito
+        self.assertFalse(ReportService.pdf_atualizado(self.laudo))
+
+    def test_falha_na_renderizacao_marca_job_como_falhou(self):
+        job, _ = solicitar_renderizacao(self.laudo, self.user)
+        with patch(
+            "weka_adapter.services.fila_pdf.ReportService.gerar_pdf_para_laudo_existente",
+            side_effect=RuntimeError("fonte ausente"),
+        ):
+            resultado = executar_renderizacao(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(resultado, RenderizacaoPDF.FALHOU)
+        self.assertEqual(job.status, RenderizacaoPDF.FALHOU)
+        self.assertIn("fonte ausente", job.erro)
+
+        # Job já concluído não é executado de novo
+        self.assertIsNone(executar_renderizacao(job.id))
+
+    @patch("weka_adapter.services.report_generator.aplicar_estilo_laudo", autospec=True)
+    def test_exportacao_zip_renderiza_faltantes_e_envia_em_streaming(self, _mock_estilo):
+        hoje = timezone.localdate().isoformat()
+        resp = self.client.get(reverse("laudos-exportar-zip"), {"inicio": hoje, "fim": hoje})
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        conteudo = b"".join(resp.streaming_content)
+
+        with zipfile.ZipFile(io.BytesIO(conteudo)) as zf:
+            self.assertIsNone(zf.testzip())
+            nomes = zf.namelist()
+            manifesto = zf.read("manifesto.csv").decode()
+        self.assertIn(f"laudo_{self.laudo.id}_FILA0001.pdf", nomes[0])
+        self.assertIn("OK", manifesto)
+
+        # O PDF que faltava foi gerado e salvo no laudo
+        self.laudo.refresh_from_db()
+        self.assertTrue(self.laudo.caminho_pdf)
+
+    def test_exportacao_zip_restrita_a_propria_instituicao(self):
+        hoje = timezone.localdate().isoformat()
+        outra = Instituicao.objects.create(nome_instituicao="Outra Clínica", cnpj="22.222.222/0001-22")
+
+        # Médico não exporta laudos de outra instituição
+        resp = self.client.get(reverse("laudos-exportar-zip"), {"inicio": hoje, "fim": hoje, "instituicao": outra.id})
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+        # Usuário sem perfil não exporta nada
+        self.client.force_authenticate(User.objects.create_user(username="sem_perfil", password="123"))
+        resp = self.client.get(reverse("laudos-exportar-zip"), {"inicio": hoje, "fim": hoje})
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+        # Auditor exporta qualquer instituição
+        auditor = User.objects.create_user(username="auditor_fila", password="123")
+        PerfilUsuario.objects.create(usuario=auditor, papel="AUDITOR", instituicao=outra)
+        self.client.force_authenticate(auditor)
+        resp = self.client.get(reverse("laudos-exportar-zip"), {"inicio": hoje, "fim": hoje, "instituicao": outra.id})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        with zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content))) as zf:
+            self.assertEqual(zf.namelist(), ["manifesto.csv"])
+
+    def test_exportacao_zip_exige_periodo(self):
+        resp = self.client.get(reverse("laudos-exportar-zip"), {"inicio": "2025-02-30", "fim": "2025-03-01"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    # --- Entrega do PDF salvo (ETag / 304 / Range) ---
+    def _gerar_pdf(self):
+        with patch("weka_adapter.services.report_generator.aplicar_estilo_laudo", autospec=True):
+            ReportService.gerar_pdf_para_laudo_existente(self.laudo)
+        self.laudo.refresh_from_db()
+
+    def test_get_entrega_pdf_salvo_com_validadores_e_registra_impressao(self):
+        self._gerar_pdf()
+
+        with patch.object(ReportService, "renderizar_pdf") as renderizar:
+            resp = self.client.get(reverse("laudo-pdf", args=[self.laudo.id]), HTTP_ACCEPT="application/pdf")
+            conteudo = b"".join(resp.streaming_content)
+
+        renderizar.assert_not_called()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(conteudo.startswith(b"%PDF"))
+        self.assertEqual(resp["ETag"], _etag_pdf(self.laudo))
+        self.assertIn("Last-Modified", resp)
+        self.assertEqual(LaudoImpressao.objects.filter(laudo=self.laudo).count(), 1)
+        self.assertTrue(LogAuditoria.objects.filter(acao="LAUDO_IMPRESSO").exists())
+
+        # Cliente com a mesma versão em cache: 304, mas a visualização é auditada
+        resp = self.client.get(reverse("laudo-pdf", args=[self.laudo.id]), HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(LaudoImpressao.objects.filter(laudo=self.laudo).count(), 2)
+
+    def test_get_com_range_devolve_206(self):
+        self._gerar_pdf()
+        tamanho = self.laudo.caminho_pdf.size
+
+        resp = self.client.get(reverse("laudo-pdf", args=[self.laudo.id]), HTTP_RANGE="bytes=0-9")
+        self.assertEqual(resp.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        with self.laudo.caminho_pdf.open("rb") as f:
+            self.assertEqual(b"".join(resp.streaming_content), f.read(10))
+        self.assertEqual(resp["Content-Range"], f"bytes 0-9/{tamanho}")
+
+        resp = self.client.get(reverse("laudo-pdf", args=[self.laudo.id]), HTTP_RANGE=f"bytes={tamanho + 10}-")
+        self.assertEqual(resp.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_if_range_exige_etag_forte_identica(self):
+        self._gerar_pdf()
+        url = reverse("laudo-pdf", args=[self.laudo.id])
+        etag = self.client.get(url)["ETag"]
+
+        resp = self.client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+        self.assertEqual(resp.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        # Fraca, curinga ou data: o arquivo vem inteiro
+        for if_range in (f"W/{etag}", "*", f"{etag}, \"outra\"", "Wed, 21 Oct 2015 07:28:00 GMT"):
+            resp = self.client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=if_range)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK, if_range)
+
+    def test_get_com_conteudo_alterado_enfileira_nova_renderizacao(self):
+        self._gerar_pdf()
+        self.laudo.texto_laudo_completo = "Texto revisado"
+        self.laudo.save()
+
+        with self.captureOnCommitCallbacks(execute=True), \
+                patch("weka_adapter.services.report_generator.aplicar_estilo_laudo", autospec=True):
+            resp = self.client.get(reverse("laudo-pdf", args=[self.laudo.id]))
+
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+        self.laudo.refresh_from_db()
+        self.assertEqual(self.laudo.pdf_fingerprint, ReportService.calcular_fingerprint(self.laudo))
+
+    # --- Spooler de impressão em lote ---
+    def _novo_laudo(self, codigo):
+        imagem = ImagemExame.objects.create(
+            paciente=self.laudo.analise.imagem.paciente,
+            usuario_upload=self.user,
+            instituicao=self.laudo.analise.imagem.instituicao,
+            caminho_arquivo=SimpleUploadedFile("exame2.bin", b"bytes"),
+        )
+        analise = AnaliseImagem.objects.create(
+            imagem=imagem, usuario_solicitante=self.user, resultado_classificacao="Benigno", hash_imagem=codigo
+        )
+        return Laudo.objects.create(
+            analise=analise, usuario_responsavel=self.laudo.usuario_responsavel,
+            texto_laudo_completo="Outro texto", codigo_verificacao=codigo,
+        )
+
+    @patch("weka_adapter.services.report_generator.aplicar_estilo_laudo", autospec=True)
+    def test_spooler_junta_laudos_do_local_em_um_pdf(self, _mock_estilo):
+        outro = self._novo_laudo("FILA0002")
+        resp = self.client.post(reverse("laudo-imprimir", args=[self.laudo.id]), {"local_impressao": "Recepção"})
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+        enfileirar_impressao(outro, "Recepção", self.user)
+        _item, criado = enfileirar_impressao(outro, "Recepção", self.user)
+        self.assertFalse(criado)
+
+        resultados = processar_spool(diretorio=TEMP_MEDIA_ROOT)
+
+        self.assertEqual(len(resultados), 1)
+        self.assertEqual(resultados[0]["impressos"], 2)
+        with open(resultados[0]["arquivo"], "rb") as f:
+            pdf = f.read()
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertGreaterEqual(pdf.count(b"/Type /Page\n"), 2)
+
+        self.assertEqual(
+            LaudoImpressao.objects.filter(local_impressao="Recepção").count(), 2
+        )
+        self.assertFalse(FilaImpressao.objects.filter(status=FilaImpressao.PENDENTE).exists())
+
+    @patch("weka_adapter.services.report_generator.aplicar_estilo_laudo", autospec=True)
+    def test_spooler_isola_laudo_com_falha(self, _mock_estilo):
+        outro = self._novo_laudo("FILA0003")
+        enfileirar_impressao(self.laudo, "Sala 2", self.user)
+        enfileirar_impressao(outro, "Sala 2", self.user)
+
+        original = ReportService.montar_elementos
+
+        def montar(laudo_obj):
+            if laudo_obj.id == outro.id:
+                raise ValueError("texto inválido")
+            return original(laudo_obj)
+
+        with patch.object(ReportService, "montar_elementos", side_effect=montar):
+            resultados = processar_spool(diretorio=TEMP_MEDIA_ROOT)
+
+        self.assertEqual(resultados[0]["impressos"], 1)
+        self.assertEqual(resultados[0]["falhas"], 1)
+        falha = FilaImpressao.objects.get(laudo=outro)
+        self.assertEqual(falha.status, FilaImpressao.FALHOU)
+        self.assertIn("texto inválido", falha.erro)
+
+    @patch("weka_adapter.services.report_generator.aplicar_estilo_laudo", autospec=True)
+    def test_spooler_nao_imprime_pedido_assumido_por_outra_rodada(self, _mock_estilo):
+        from weka_adapter.services import spooler
+
+        outro = self._novo_laudo("FILA0004")
+        primeiro, _ = enfileirar_impressao(self.laudo, "Sala 3", self.user)
+        enfileirar_impressao(outro, "Sala 3", self.user)
+        assumir = spooler._assumir
+
+        def rodada_concorrente(ids):
+            # Outra rodada assume o primeiro pedido entre a leitura e a reserva
+            self.assertEqual(len(assumir([primeiro.id])), 1)
+            return assumir(ids)
+
+        with patch.object(spooler, "_assumir", side_effect=rodada_concorrente):
+            resultados = processar_spool(diretorio=TEMP_MEDIA_ROOT)
+
+        self.assertEqual(resultados[0]["impressos"], 1)
+        self.assertEqual(LaudoImpressao.objects.filter(local_impressao="Sala 3").get().laudo_id, outro.id)
+        primeiro.refresh_from_db()
+        self.assertEqual(primeiro.status, FilaImpressao.IMPRIMINDO)
@@ -0,0 +1,114 @@
+"""
+tests/test_importacao_pacientes.py
+
+Importação em lote de pacientes (rota pacientes/importar/ e comando importar_pacientes).
+
+Cobre:
+- CSV com linhas válidas, CPF inválido, nome vazio e CPF repetido no arquivo
+- NDJSON: CPF já cadastrado é reportado como duplicado, JSON inválido como erro
+- CPF normalizado e índice cego preenchido (busca sem decifrar)
+- cadastro individual com CPF repetido responde 400
+- importação recusada para usuário não autenticado
+- importação auditada com a ação IMPORTACAO_PACIENTES
+- comando de gerenciamento com lotes pequenos
+
+Como rodar:
+    python manage.py test tests.test_importacao_pacientes
+"""
+
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.models import LogAuditoria, Paciente
+from nucleo.seguranca.crypto_utils import blind_index
+
+CPF_A = "529.982.247-25"
+CPF_B = "11144477735"
+
+
+class ImportacaoPacientesTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="medico_importa", password="123")
+        self.client.force_authenticate(self.user)
+
+    def _enviar(self, nome, conteudo):
+        arquivo = SimpleUploadedFile(nome, conteudo.encode("utf-8"))
+        return self.client.post(reverse("paciente-importar"), {"arquivo": arquivo}, format="multipart")
+
+    def test_csv_valida_normaliza_e_reporta_por_linha(self):
+        conteudo = (
+            "nome_completo,cpf,sintomas\n"
+            f"Ana Souza,{CPF_B},Tosse\n"
+            "Bruno Lima,123.456.789-00,\n"
+            ",52998224725,\n"
+            f"Ana Repetida,{CPF_B},\n"
+            "Sem CPF,,\n"
+        )
+        resp = self._enviar("pacientes.csv", conteudo)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["criados"], 2)
+        self.assertEqual(resp.data["erros"], [
+            {"linha": 3, "erro": "CPF inválido."},
+            {"linha": 4, "erro": "O campo 'nome_completo' é obrigatório."},
+        ])
+        self.assertEqual(resp.data["duplicados"], [{"linha": 5, "motivo": "CPF repetido no arquivo."}])
+        log = LogAuditoria.objects.get(acao="IMPORTACAO_PACIENTES")
+        self.assertEqual(log.detalhe, "2 criados, 1 duplicados, 2 com erro")
+
+        ana = Paciente.objects.get(cpf_indice=blind_index("11144477735"))
+        self.assertEqual(ana.cpf, "111.444.777-35")
+        self.assertEqual(ana.sintomas, "Tosse")
+        self.assertIsNone(Paciente.objects.get(cpf_indice__isnull=True).sintomas)
+
+    def test_ndjson_detecta_cpf_ja_cadastrado(self):
+        Paciente.objects.create(nome_completo="Já Cadastrada", cpf="52998224725")
+        linhas = [
+            json.dumps({"nome_completo": "Outra", "cpf": CPF_A}),
+            "{nao e json",
+            json.dumps({"nome_completo": "Nova", "cpf": CPF_B}),
+        ]
+        resp = self._enviar("pacientes.ndjson", "\n".join(linhas))
+
+        self.assertEqual(resp.data["criados"], 1)
+        self.assertEqual(resp.data["duplicados"], [{"linha": 1, "motivo": "CPF já cadastrado."}])
+        self.assertEqual(resp.data["erros"], [{"linha": 2, "erro": "JSON inválido."}])
+        self.assertEqual(Paciente.objects.count(), 2)
+
+    def test_formato_desconhecido_e_cadastro_duplicado(self):
+        resp = self._enviar("pacientes.txt", "qualquer coisa")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Paciente.objects.create(nome_completo="Ana", cpf=CPF_A)
+        resp = self.client.post(reverse("paciente-list-create"),
+                                {"nome_completo": "Ana de novo", "cpf": "52998224725"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("cpf", resp.data)
+
+    def test_importacao_exige_autenticacao(self):
+        self.client.force_authenticate(None)
+        resp = self._enviar("pacientes.csv", f"nome_completo,cpf\nAna,{CPF_A}\n")
+
+        self.assertIn(resp.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        self.assertFalse(Paciente.objects.exists())
+
+    def test_comando_em_lotes(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as arquivo:
+            arquivo.write(f"nome_completo,cpf\nAna,{CPF_A}\nBruno,{CPF_B}\nCarla,\n")
+        self.addCleanup(os.remove, arquivo.name)
+
+        saida = StringIO()
+        call_command("importar_pacientes", arquivo.name, "--lote", "2", stdout=saida)
+
+        self.assertEqual(Paciente.objects.count(), 3)
+        self.assertIn("3 pacientes criados", saida.getvalue())
@@ -0,0 +1,107 @@
+"""
+tests/test_limites.py
+
+Controle de admissão dos endpoints pesados (nucleo/limites.py).
+
+Cobre:
+- balde de tokens: rajada até o limite, depois espera; reposição com o tempo
+- baldes por usuário são independentes; o da instituição é compartilhado
+- recusa por um balde devolve os tokens já tirados dos outros
+- 429 com Retry-After no endpoint (lote ARFF do simulador)
+- vagas de CPU: sem vaga, 503 com Retry-After; vaga liberada ao sair e
+  recuperada quando o prazo de um processo que morreu vence
+
+Como rodar:
+    python manage.py test tests.test_limites
+"""
+
+import time
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.limites import ServicoSobrecarregado, consumir, vaga_processamento
+from nucleo.models import BaldeTokens, Instituicao, PerfilUsuario, VagaProcessamento
+
+LIMITES = {'simulacao_lote': {'usuario': '2/min', 'instituicao': '3/min'}}
+
+
+class BaldeTokensTests(APITestCase):
+
+    def setUp(self):
+        instituicao = Instituicao.objects.create(nome_instituicao="Clínica Limites", cnpj="77.777.777/0001-77")
+        self.ana = User.objects.create_user(username="ana_limites", password="123")
+        self.bruno = User.objects.create_user(username="bruno_limites", password="123")
+        for usuario in (self.ana, self.bruno):
+            PerfilUsuario.objects.create(usuario=usuario, papel="MEDICO", instituicao=instituicao)
+
+    def test_rajada_e_reposicao(self):
+        agora = time.time()
+        with patch("nucleo.limites.time.time", return_value=agora):
+            self.assertEqual([consumir("teste", "3/min") for _ in range(3)], [None, None, None])
+            self.assertAlmostEqual(consumir("teste", "3/min"), 20, delta=0.01)
+        with patch("nucleo.limites.time.time", return_value=agora + 20):
+            self.assertIsNone(consumir("teste", "3/min"))
+            self.assertIsNotNone(consumir("teste", "3/min"))
+
+    @override_settings(LIMITES_TAXA=LIMITES)
+    def test_429_por_usuario_e_por_instituicao(self):
+        url = reverse("gerar_lote_arff")
+
+        self.client.force_authenticate(self.ana)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(int(resp["Retry-After"]), 30)
+
+        # Bruno tem o próprio balde, mas a instituição (3/min) já gastou 2
+        self.client.force_authenticate(self.bruno)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(int(resp["Retry-After"]), 20)
+
+    @override_settings(LIMITES_TAXA={'simulacao_lote': {'usuario': '2/min', 'instituicao': '1/min'}})
+    def test_recusa_da_instituicao_devolve_o_token_do_usuario(self):
+        url = reverse("gerar_lote_arff")
+        self.client.force_authenticate(self.bruno)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Instituição liberada: Bruno ainda tem 1 dos 2 tokens (a recusa não gastou o dele)
+        BaldeTokens.objects.filter(chave__contains=":instituicao:").delete()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+
+@override_settings(LIMITES_TAXA={}, PROCESSAMENTO_SIMULTANEO=1, PROCESSAMENTO_RETRY_AFTER=7)
+class VagasProcessamentoTests(APITestCase):
+
+    def test_503_sem_vaga_e_liberacao(self):
+        with vaga_processamento():
+            with self.assertRaises(ServicoSobrecarregado):
+                with vaga_processamento():
+                    pass
+            resp = self.client.post(reverse("gerar_lote"))
+            self.assertEqual(resp.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(resp["Retry-After"], "7")
+
+        with vaga_processamento():
+            pass
+        self.assertEqual(VagaProcessamento.objects.get().ocupada_ate, 0)
+
+    def test_vaga_de_processo_morto_volta_apos_o_prazo(self):
+        with vaga_processamento():
+            pass
+        VagaProcessamento.objects.update(ocupada_ate=time.time() + 300, dono="processo-morto")
+        with self.assertRaises(ServicoSobrecarregado):
+            with vaga_processamento():
+                pass
+
+        with patch("nucleo.limites.time.time", return_value=time.time() + 301):
+            with vaga_processamento():
+                self.assertNotEqual(VagaProcessamento.objects.get().dono, "processo-morto")
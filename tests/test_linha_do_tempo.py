@@ -0,0 +1,128 @@
+"""
+tests/test_linha_do_tempo.py
+
+Linha do tempo do paciente (GET /api/pacientes/<uuid>/linha-do-tempo/).
+
+Cobre:
+- imagens mais recentes primeiro, com análise, laudo, link do PDF e versões
+  anteriores do laudo (mais recentes primeiro)
+- imagem ainda sem análise/laudo vem com null
+- número fixo de consultas, não importa quantas imagens/versões existam
+- paginação por cursor e 404 para paciente inexistente
+- exige autenticação (histórico clínico com texto dos laudos)
+
+Como rodar:
+    python manage.py test tests.test_linha_do_tempo
+"""
+
+import shutil
+import tempfile
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.models import (
+    Instituicao,
+    PerfilUsuario,
+    Paciente,
+    ImagemExame,
+    AnaliseImagem,
+    Laudo,
+    HistoricoLaudo,
+)
+from tests.orcamento_consultas import OrcamentoConsultasMixin
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+# paciente + página de imagens (JOINs) + versões dos laudos da página
+# + log de auditoria (nos testes a gravação é imediata; em produção vai para o diário)
+CONSULTAS = 4
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class LinhaDoTempoTests(OrcamentoConsultasMixin, APITestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.instituicao = Instituicao.objects.create(nome_instituicao="Clínica Linha", cnpj="66.666.666/0001-66")
+        self.user = User.objects.create_user(username="medico_linha", password="123")
+        self.perfil = PerfilUsuario.objects.create(usuario=self.user, papel="MEDICO", instituicao=self.instituicao)
+        self.paciente = Paciente.objects.create(nome_completo="Paciente Linha", cpf="111.444.777-35")
+        self.url = reverse("paciente-linha-do-tempo", args=[self.paciente.uuid_paciente])
+        self.client.force_authenticate(self.user)
+
+    def _exame(self, com_laudo=True, versoes=0):
+        imagem = ImagemExame.objects.create(
+            paciente=self.paciente,
+            usuario_upload=self.user,
+            instituicao=self.instituicao,
+            caminho_arquivo=SimpleUploadedFile("exame.bin", b"bytes"),
+        )
+        if not com_laudo:
+            return imagem
+        analise = AnaliseImagem.objects.create(
+            imagem=imagem, usuario_solicitante=self.user, resultado_classificacao="Benigno", hash_imagem="h"
+        )
+        laudo = Laudo.objects.create(analise=analise, usuario_responsavel=self.perfil, texto_laudo_completo="Atual")
+        for i in range(versoes):
+            HistoricoLaudo.objects.create(
+                laudo=laudo, usuario_responsavel=self.perfil, texto_anterior=f"Versão {i}", ip_alteracao="127.0.0.1"
+            )
+        return imagem
+
+    def test_monta_historico_completo(self):
+        antiga = self._exame(versoes=2)
+        recente = self._exame(com_laudo=False)
+
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["paciente"]["nome_completo"], "Paciente Linha")
+        itens = resp.data["resultados"]
+        self.assertEqual([item["imagem"]["id"] for item in itens], [recente.id, antiga.id])
+        self.assertIsNone(itens[0]["analise"])
+        self.assertIsNone(itens[0]["laudo"])
+
+        laudo = itens[1]["laudo"]
+        self.assertEqual(itens[1]["analise"]["resultado_classificacao"], "Benigno")
+        self.assertEqual(laudo["responsavel"], "medico_linha")
+        self.assertTrue(laudo["pdf"].endswith(reverse("laudo-pdf", args=[laudo["id"]])))
+        self.assertEqual([v["texto_anterior"] for v in laudo["versoes_anteriores"]], ["Versão 1", "Versão 0"])
+
+    def test_consultas_nao_crescem_com_o_historico(self):
+        self._exame(versoes=1)
+        with self.assertOrcamentoConsultas(CONSULTAS, "linha do tempo (1 exame)"):
+            self.client.get(self.url)
+
+        for i in range(8):
+            self._exame(com_laudo=i % 3 != 0, versoes=i % 3)
+        with self.assertOrcamentoConsultas(CONSULTAS, "linha do tempo (9 exames)"):
+            resp = self.client.get(self.url)
+        self.assertEqual(len(resp.data["resultados"]), 9)
+
+    def test_paginacao_e_paciente_inexistente(self):
+        ids = [self._exame(com_laudo=False).id for _ in range(3)]
+
+        resp = self.client.get(self.url, {"tamanho": 2})
+        self.assertEqual([item["imagem"]["id"] for item in resp.data["resultados"]], ids[:0:-1])
+        resp = self.client.get(self.url, {"tamanho": 2, "cursor": resp.data["cursor_proximo"]})
+        self.assertEqual([item["imagem"]["id"] for item in resp.data["resultados"]], ids[:1])
+        self.assertIsNone(resp.data["proximo"])
+
+        resp = self.client.get(reverse("paciente-linha-do-tempo", args=[uuid.uuid4()]))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_anonimo_nao_le_o_historico(self):
+        self._exame()
+        self.client.force_authenticate(None)
+        resp = self.client.get(self.url)
+        self.assertIn(resp.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
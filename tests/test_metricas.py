@@ -0,0 +1,59 @@
+"""
+tests/test_metricas.py
+
+Testes das métricas do pipeline (nucleo/metricas.py) e do endpoint /weka/metrics/.
+
+Como rodar:
+    python manage.py test tests.test_metricas
+"""
+
+from django.test import SimpleTestCase
+
+from nucleo.metricas import RegistroMetricas, cronometrar, registro
+
+
+class RegistroMetricasTests(SimpleTestCase):
+
+    def test_histograma_acumula_buckets_soma_e_total(self):
+        reg = RegistroMetricas()
+        reg.histograma('latencia', 'Teste', buckets=(0.1, 1.0))
+
+        reg.observar('latencia', 0.05, etapa='pdf')
+        reg.observar('latencia', 0.5, etapa='pdf')
+        reg.observar('latencia', 3.0, etapa='pdf')
+
+        texto = reg.exportar_prometheus()
+        self.assertIn('# TYPE latencia histogram', texto)
+        self.assertIn('latencia_bucket{etapa="pdf",le="0.1"} 1', texto)
+        self.assertIn('latencia_bucket{etapa="pdf",le="1.0"} 2', texto)
+        self.assertIn('latencia_bucket{etapa="pdf",le="+Inf"} 3', texto)
+        self.assertIn('latencia_count{etapa="pdf"} 3', texto)
+        self.assertIn('latencia_sum{etapa="pdf"} 3.55', texto)
+
+    def test_cronometrar_registra_erro_e_repropaga(self):
+        registro.limpar()
+
+        with self.assertRaises(ValueError):
+            with cronometrar('classificacao'):
+                raise ValueError("falha simulada")
+
+        self.assertEqual(
+            registro.valor('sad_pipeline_etapa_total', etapa='classificacao', resultado='erro'), 1
+        )
+
+
+class EndpointMetricasTests(SimpleTestCase):
+
+    def test_endpoint_exporta_texto_prometheus(self):
+        registro.limpar()
+        with cronometrar('hash'):
+            pass
+
+        resp = self.client.get('/weka/metrics/')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            'sad_pipeline_etapa_total{etapa="hash",resultado="ok"} 1',
+            resp.content.decode(),
+        )
@@ -0,0 +1,106 @@
+"""
+tests/test_orcamento_consultas.py
+
+Orçamento de consultas SQL por endpoint (regressão de N+1).
+
+Cada endpoint roda com vários registros no banco; o número de consultas
+não pode passar do declarado em ORCAMENTOS (e não pode crescer com o
+número de linhas). Se uma mudança legítima precisar de mais consultas,
+ajuste o orçamento no mesmo commit, justificando.
+
+Também cobre os cabeçalhos X-Consultas* do MedicaoConsultasMiddleware.
+
+Como rodar:
+    python manage.py test tests.test_orcamento_consultas
+"""
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.models import (
+    Instituicao,
+    PerfilUsuario,
+    Paciente,
+    ImagemExame,
+    AnaliseImagem,
+    Laudo,
+)
+from tests.orcamento_consultas import OrcamentoConsultasMixin
+
+# Consultas máximas por requisição (com autenticação forçada, sem sessão)
+ORCAMENTOS = {
+    "paciente-list-create": 2,   # versão da coleção (ETag) + página
+    "laudos-historico": 2,       # listagem + log de auditoria (acerto no cache: só o log)
+    "relatorio-laudos": 2,       # listagem + log de auditoria
+    "relatorio-laudos-resumo": 5,
+    "admin-laudos": 6,           # changelist do admin (sessão, usuário, contagens, página)
+}
+
+LAUDOS = 6
+
+
+class OrcamentoConsultasTests(OrcamentoConsultasMixin, APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        instituicao = Instituicao.objects.create(nome_instituicao="Clínica Orçamento", cnpj="55.555.555/0001-55")
+        cls.user = User.objects.create_superuser(username="admin_orcamento", password="123")
+        perfil = PerfilUsuario.objects.create(usuario=cls.user, papel="MEDICO", instituicao=instituicao)
+        for i in range(LAUDOS):
+            paciente = Paciente.objects.create(nome_completo=f"Paciente {i}", cpf=f"200.000.000-0{i}")
+            imagem = ImagemExame.objects.create(
+                paciente=paciente,
+                usuario_upload=cls.user,
+                instituicao=instituicao,
+                caminho_arquivo=SimpleUploadedFile("exame.bin", b"bytes"),
+            )
+            analise = AnaliseImagem.objects.create(
+                imagem=imagem, usuario_solicitante=cls.user, resultado_classificacao="Benigno", hash_imagem="h"
+            )
+            Laudo.objects.create(analise=analise, usuario_responsavel=perfil, texto_laudo_completo="Texto")
+
+    def setUp(self):
+        # Orçamentos medem o caminho sem cache de respostas (nucleo/cache_respostas.py)
+        cache.clear()
+
+    def _get_api(self, nome, **params):
+        self.client.force_authenticate(self.user)
+        with self.assertOrcamentoConsultas(ORCAMENTOS[nome], f"GET {nome}"):
+            resp = self.client.get(reverse(nome), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp
+
+    def test_pacientes(self):
+        resp = self._get_api("paciente-list-create")
+        self.assertEqual(len(resp.data["resultados"]), LAUDOS)
+
+    def test_historico_de_laudos(self):
+        resp = self._get_api("laudos-historico")
+        self.assertEqual(len(resp.data["resultados"]), LAUDOS)
+
+    def test_relatorio_de_laudos(self):
+        resp = self._get_api("relatorio-laudos")
+        self.assertEqual(len(resp.data["resultados"]), LAUDOS)
+
+    def test_resumo_de_laudos(self):
+        self._get_api("relatorio-laudos-resumo")
+
+    def test_admin_laudos(self):
+        self.client.force_login(self.user)
+        with self.assertOrcamentoConsultas(ORCAMENTOS["admin-laudos"], "GET admin-laudos"):
+            resp = self.client.get(reverse("admin:nucleo_laudo_changelist"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    @override_settings(DEBUG=True)
+    def test_middleware_expoe_cabecalhos(self):
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(reverse("laudos-historico"))
+
+        self.assertEqual(int(resp["X-Consultas"]), ORCAMENTOS["laudos-historico"])
+        self.assertEqual(resp["X-Consultas-Repetidas"], "0")
+        self.assertIn("X-Consultas-Tempo-Ms", resp)
@@ -0,0 +1,61 @@
+"""
+tests/test_paginacao.py
+
+Paginação por chave (keyset) das listagens do núcleo.
+
+Cobre:
+- percorrer todas as páginas devolve cada registro uma única vez, mesmo com
+  datas empatadas (desempate pelo id)
+- tamanho de página limitado ao máximo
+- cursor adulterado responde 404
+
+Como rodar:
+    python manage.py test tests.test_paginacao
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.models import Paciente
+from nucleo.paginacao import PaginacaoKeyset
+
+
+class PaginacaoKeysetTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="medico_paginas", password="123")
+        self.client.force_authenticate(self.user)
+        for i in range(7):
+            Paciente.objects.create(nome_completo=f"Paciente {i}", cpf=f"100.000.000-0{i}")
+        # Mesma data de cadastro para todos: só o id desempata
+        Paciente.objects.update(data_cadastro=timezone.now())
+
+    def test_percorre_todas_as_paginas_sem_repetir(self):
+        vistos = []
+        url = reverse("paciente-list-create") + "?tamanho=3"
+        paginas = 0
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(resp.data["resultados"]), 3)
+            vistos += [p["uuid_paciente"] for p in resp.data["resultados"]]
+            url = resp.data["proximo"]
+            paginas += 1
+
+        self.assertEqual(paginas, 3)
+        self.assertEqual(len(vistos), 7)
+        self.assertEqual(len(set(vistos)), 7)
+
+    def test_tamanho_maximo_e_cursor_invalido(self):
+        with patch.object(PaginacaoKeyset, "tamanho_maximo", 5):
+            resp = self.client.get(reverse("paciente-list-create"), {"tamanho": 1000})
+        self.assertEqual(len(resp.data["resultados"]), 5)
+        self.assertIsNotNone(resp.data["cursor_proximo"])
+
+        resp = self.client.get(reverse("paciente-list-create"), {"cursor": "nao-e-um-cursor"})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
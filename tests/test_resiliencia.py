@@ -0,0 +1,111 @@
+"""
+tests/test_resiliencia.py
+
+Testes do orçamento de latência e do circuit breaker em torno do classificador
+(weka_adapter/resiliencia.py e weka_adapter/integration.py).
+
+Como rodar:
+    python manage.py test tests.test_resiliencia
+"""
+
+import tempfile
+import time
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from nucleo.models import Instituicao, Paciente, ImagemExame, AnaliseImagem
+from weka_adapter.integration import processar_analise_automatica
+from weka_adapter.resiliencia import (
+    ABERTO, FECHADO, MEIO_ABERTO, CircuitBreaker, ClassificadorIndisponivel,
+    breaker_classificador, executar_com_prazo,
+)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def test_abre_apos_falhas_e_fecha_apos_teste_bem_sucedido(self):
+        breaker = CircuitBreaker('teste', limite_falhas=2, tempo_reabertura=0.05)
+
+        breaker.registrar_falha()
+        self.assertEqual(breaker.estado, FECHADO)
+        breaker.registrar_falha()
+        self.assertEqual(breaker.estado, ABERTO)
+        self.assertFalse(breaker.permitir())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.permitir())       # chamada de teste
+        self.assertEqual(breaker.estado, MEIO_ABERTO)
+        self.assertFalse(breaker.permitir())      # só uma por vez
+
+        breaker.registrar_sucesso()
+        self.assertEqual(breaker.estado, FECHADO)
+        self.assertEqual(breaker.aberturas, 1)
+
+    def test_chamada_lenta_conta_como_falha(self):
+        breaker = CircuitBreaker('lento', limite_falhas=1, limiar_lentidao=0.01)
+        breaker.registrar_sucesso(duracao=0.5)
+        self.assertEqual(breaker.estado, ABERTO)
+
+    def test_timeout_libera_o_chamador(self):
+        breaker = CircuitBreaker('prazo', limite_falhas=5)
+        inicio = time.monotonic()
+        with self.assertRaises(ClassificadorIndisponivel) as ctx:
+            executar_com_prazo(time.sleep, 0.5, prazo=0.05, breaker=breaker)
+        self.assertEqual(ctx.exception.motivo, 'timeout')
+        self.assertLess(time.monotonic() - inicio, 0.4)
+        self.assertEqual(breaker.falhas_consecutivas, 1)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), WEKA_PRAZO_CLASSIFICACAO=0.05)
+class FallbackAguardandoTests(TestCase):
+
+    def setUp(self):
+        breaker_classificador.resetar()
+        self.user = User.objects.create_user(username="tecnico", password="x")
+        inst = Instituicao.objects.create(nome_instituicao="Clínica")
+        buffer = BytesIO()
+        Image.new('L', (16, 16), color=120).save(buffer, format='PNG')
+        self.imagem = ImagemExame.objects.create(
+            paciente=Paciente.objects.create(nome_completo="Paciente"),
+            usuario_upload=self.user, instituicao=inst,
+            caminho_arquivo=SimpleUploadedFile("termo.png", buffer.getvalue()),
+        )
+
+    def tearDown(self):
+        breaker_classificador.resetar()
+
+    @patch("weka_adapter.integration.WekaAdapter.classificar", side_effect=lambda dados: time.sleep(0.3))
+    def test_classificador_travado_deixa_analise_aguardando(self, _mock):
+        laudo = processar_analise_automatica(self.imagem.id, self.user, "127.0.0.1")
+
+        self.assertIsNone(laudo)
+        analise = AnaliseImagem.objects.get(imagem=self.imagem)
+        self.assertEqual(analise.resultado_classificacao, 'AGUARDANDO')
+        self.assertIsNone(analise.data_hora_conclusao)
+
+    def test_circuito_aberto_nao_chama_o_classificador(self):
+        for _ in range(breaker_classificador.limite_falhas):
+            breaker_classificador.registrar_falha()
+
+        with patch("weka_adapter.integration.WekaAdapter.classificar") as mock:
+            processar_analise_automatica(self.imagem.id, self.user, "127.0.0.1")
+
+        mock.assert_not_called()
+        self.assertEqual(AnaliseImagem.objects.get(imagem=self.imagem).resultado_classificacao, 'AGUARDANDO')
+
+        resp = self.client.get('/weka/status/')
+        self.assertEqual(resp.data['classificador']['estado'], ABERTO)
+        self.assertEqual(resp.data['status'], 'Degradado')
+
+    def test_sucesso_sem_perfil_conclui_analise_sem_laudo(self):
+        laudo = processar_analise_automatica(self.imagem.id, self.user, "127.0.0.1")
+
+        self.assertIsNone(laudo)
+        analise = AnaliseImagem.objects.get(imagem=self.imagem)
+        self.assertIn(analise.resultado_classificacao, ['Maligno', 'Benigno', 'Cisto', 'Saudavel'])
+        self.assertIsNotNone(analise.data_hora_conclusao)
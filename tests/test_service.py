@@ -15,9 +15,12 @@ Observação:
 
 import os
 import tempfile
-from unittest.mock import patch
+from io import BytesIO
+from unittest.mock import Mock, patch
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, override_settings
 
@@ -31,7 +34,12 @@ from nucleo.models import (
     LaudoImpressao,
 )
 
+from PIL import Image
+from reportlab.pdfgen import canvas
+
+from weka_adapter.services import camadas_pdf
 from weka_adapter.services.report_generator import ReportService
+from weka_adapter.utils.pdf_compacto import aplicar_modo_compacto, recomprimir_pdf
 
 
 # Cria um MEDIA_ROOT temporário só para o runtime dos testes
@@ -223,3 +231,149 @@ class ReportServiceTests(TestCase):
         #     usuario_solicitante=medico_perfil.usuario,
         #     ip_cliente=ip_cliente
         # )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PDF_CACHE_CAMADAS=True)
+class CamadasPdfTests(TestCase):
+    """
+    Cache das camadas estáticas (logo, cabeçalho, marca d'água) por instituição.
+    """
+
+    def setUp(self):
+        camadas_pdf.limpar_cache()
+        self.instituicao = Instituicao.objects.create(
+            nome_instituicao="Clínica Camadas",
+            cnpj="98.765.432/0001-11",
+        )
+        self.instituicao.logo.save("logo.png", ContentFile(self._png(1200, 600)))
+
+    def tearDown(self):
+        camadas_pdf.limpar_cache()
+
+    @staticmethod
+    def _png(largura, altura):
+        buffer = BytesIO()
+        Image.new("RGBA", (largura, altura), (200, 30, 30, 255)).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def test_logo_preparado_uma_vez_e_reduzido(self):
+        with patch.object(camadas_pdf.CamadasInstituicao, "_preparar_logo",
+                          autospec=True, side_effect=camadas_pdf.CamadasInstituicao._preparar_logo) as preparar:
+            primeira = camadas_pdf.camadas_da_instituicao(self.instituicao)
+            segunda = camadas_pdf.camadas_da_instituicao(self.instituicao)
+
+        self.assertIs(primeira, segunda)
+        self.assertEqual(preparar.call_count, 1)
+        largura, _ = primeira.logo.getSize()
+        self.assertLessEqual(largura, 473)
+
+    def test_troca_do_logo_invalida_cache(self):
+        antes = camadas_pdf.camadas_da_instituicao(self.instituicao)
+        self.instituicao.logo.save("logo_novo.png", ContentFile(self._png(300, 300)))
+        depois = camadas_pdf.camadas_da_instituicao(self.instituicao)
+
+        self.assertIsNot(antes, depois)
+        self.assertEqual(depois.logo.getSize(), (300, 300))
+
+    def test_camadas_desenhadas_uma_vez_por_documento(self):
+        camadas = camadas_pdf.camadas_da_instituicao(self.instituicao)
+        desenhar_fundo = Mock()
+        c = canvas.Canvas(BytesIO())
+        for _ in range(3):
+            camadas.desenhar(c, desenhar_fundo)
+            c.showPage()
+        c.save()
+
+        desenhar_fundo.assert_called_once_with(c, "Clínica Camadas")
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PDF_CACHE_CAMADAS=False)
+class PdfCompactoTests(TestCase):
+    """
+    Modo compacto: streams binários, logo sem recodificação e recompressão
+    de PDFs já gerados.
+    """
+
+    def setUp(self):
+        self.instituicao = Instituicao.objects.create(
+            nome_instituicao="Clínica Compacta",
+            cnpj="11.222.333/0001-44",
+        )
+
+    def _pdf(self, compacto):
+        camadas = camadas_pdf.camadas_da_instituicao(self.instituicao, compacto)
+        buffer = BytesIO()
+        aplicar_modo_compacto(compacto)
+        self.addCleanup(aplicar_modo_compacto, settings.PDF_MODO_COMPACTO)
+        c = canvas.Canvas(buffer)
+        camadas.desenhar(c, lambda canvas_obj, nome: canvas_obj.drawString(50, 800, nome))
+        c.showPage()
+        c.save()
+        return buffer.getvalue()
+
+    def test_modo_compacto_embute_jpeg_sem_recodificar(self):
+        jpeg = BytesIO()
+        # Foto (ruído): o JPEG original é bem menor que os pixels em Flate
+        Image.frombytes("RGB", (300, 200), os.urandom(300 * 200 * 3)).save(jpeg, format="JPEG")
+        self.instituicao.logo.save("logo.jpg", ContentFile(jpeg.getvalue()))
+
+        padrao = self._pdf(compacto=False)
+        compacto = self._pdf(compacto=True)
+
+        self.assertIn(b"ASCII85Decode", padrao)
+        self.assertNotIn(b"ASCII85Decode", compacto)
+        self.assertIn(b"/DCTDecode", compacto)
+        self.assertLess(len(compacto), len(padrao))
+
+    def test_recomprimir_pdf_existente(self):
+        buffer = BytesIO()
+        Image.new("RGB", (200, 200), (90, 90, 90)).save(buffer, format="PNG")
+        self.instituicao.logo.save("logo.png", ContentFile(buffer.getvalue()))
+        original = self._pdf(compacto=False)
+
+        compacto = recomprimir_pdf(original)
+
+        self.assertLess(len(compacto), len(original))
+        self.assertNotIn(b"ASCII85Decode", compacto)
+        self.assertIn(b"/DeviceGray", compacto)
+        # A tabela xref aponta para o início de cada objeto
+        inicio_xref = int(compacto.rsplit(b"startxref", 1)[1].split()[0])
+        entradas = compacto[inicio_xref:].split(b"trailer")[0].splitlines()[3:]
+        for numero, entrada in enumerate(entradas, start=1):
+            posicao = int(entrada.split()[0])
+            self.assertTrue(compacto[posicao:].startswith(b"%d 0 obj" % numero))
+
+    def test_recomprimir_pdfs_troca_arquivo_e_geracao_do_laudo(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+        from nucleo.views_pdf import _etag_pdf
+
+        buffer = BytesIO()
+        Image.new("RGB", (200, 200), (90, 90, 90)).save(buffer, format="PNG")
+        self.instituicao.logo.save("logo.png", ContentFile(buffer.getvalue()))
+        original = self._pdf(compacto=False)
+
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+            user = User.objects.create_user(username="medico_compacto", password="x")
+            paciente = Paciente.objects.create(nome_completo="Paciente Compacto")
+            imagem = ImagemExame.objects.create(
+                paciente=paciente, usuario_upload=user, instituicao=self.instituicao,
+                caminho_arquivo=SimpleUploadedFile("exame.bin", b"fake-bytes"),
+            )
+            analise = AnaliseImagem.objects.create(imagem=imagem, usuario_solicitante=user, hash_imagem="h")
+            laudo = Laudo(analise=analise, texto_laudo_completo="x", pdf_fingerprint="f" * 64,
+                          pdf_gerado_em=timezone.now())
+            laudo.caminho_pdf.save("laudo_compacto.pdf", ContentFile(original))
+            antigo, etag_antiga = laudo.caminho_pdf.name, _etag_pdf(laudo)
+
+            call_command("recomprimir_pdfs", stdout=StringIO())
+
+            laudo.refresh_from_db()
+            self.assertNotEqual(laudo.caminho_pdf.name, antigo)
+            self.assertFalse(laudo.caminho_pdf.storage.exists(antigo))
+            with laudo.caminho_pdf.open("rb") as f:
+                self.assertLess(len(f.read()), len(original))
+            # Conteúdo do laudo igual (não re-renderiza), mas o validador do arquivo muda
+            self.assertEqual(laudo.pdf_fingerprint, "f" * 64)
+            self.assertNotEqual(_etag_pdf(laudo), etag_antiga)
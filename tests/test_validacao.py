@@ -0,0 +1,89 @@
+"""
+tests/test_validacao.py
+
+Validação pública dos laudos pelo QR Code (/validar/<codigo>).
+
+Cobre:
+- código existente devolve apenas dados não sensíveis, sem autenticação
+- resultados positivos e negativos ficam em cache (nenhuma consulta na repetição)
+- limite de requisições por IP
+
+Como rodar:
+    python manage.py test tests.test_validacao
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from nucleo.models import (
+    Instituicao,
+    PerfilUsuario,
+    Paciente,
+    ImagemExame,
+    AnaliseImagem,
+    Laudo,
+)
+from nucleo.views_validacao import ValidacaoLaudoThrottle
+
+
+class ValidacaoLaudoTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        instituicao = Instituicao.objects.create(nome_instituicao="Clínica QR", cnpj="22.222.222/0001-22")
+        user = User.objects.create_user(username="medico_qr", password="123", first_name="Ana", last_name="Lima")
+        perfil = PerfilUsuario.objects.create(
+            usuario=user, papel="MEDICO", instituicao=instituicao, registro_profissional="CRM 2"
+        )
+        paciente = Paciente.objects.create(nome_completo="Paciente Sigiloso", cpf="987.654.321-00")
+        imagem = ImagemExame.objects.create(
+            paciente=paciente,
+            usuario_upload=user,
+            instituicao=instituicao,
+            caminho_arquivo=SimpleUploadedFile("exame.bin", b"bytes"),
+        )
+        analise = AnaliseImagem.objects.create(
+            imagem=imagem, usuario_solicitante=user, resultado_classificacao="Benigno", hash_imagem="h"
+        )
+        Laudo.objects.create(
+            analise=analise, usuario_responsavel=perfil, texto_laudo_completo="Texto", codigo_verificacao="QR000001"
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_codigo_valido_retorna_dados_minimos(self):
+        resp = self.client.get("/validar/QR000001")
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.data["valido"])
+        self.assertEqual(resp.data["instituicao"], "Clínica QR")
+        self.assertEqual(resp.data["medico_responsavel"], "Ana Lima")
+        self.assertNotIn("Paciente Sigiloso", resp.content.decode())
+        self.assertIn("public", resp["Cache-Control"])
+
+    def test_resultados_positivo_e_negativo_ficam_em_cache(self):
+        self.client.get(reverse("validar-laudo", args=["QR000001"]))
+        self.client.get("/validar/NAOEXISTE")
+
+        with self.assertNumQueries(0):
+            positivo = self.client.get("/validar/QR000001/")
+            negativo = self.client.get("/validar/NAOEXISTE")
+
+        self.assertEqual(positivo.status_code, status.HTTP_200_OK)
+        self.assertEqual(negativo.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(negativo.data["valido"])
+
+    def test_limite_por_ip(self):
+        with patch.object(ValidacaoLaudoThrottle, "THROTTLE_RATES", {"validacao_laudo": "2/min"}):
+            codigos = [self.client.get(f"/validar/TESTE{i}").status_code for i in range(3)]
+            outro_ip = self.client.get("/validar/TESTE9", REMOTE_ADDR="10.9.9.9")
+
+        self.assertEqual(codigos, [404, 404, status.HTTP_429_TOO_MANY_REQUESTS])
+        self.assertEqual(outro_ip.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,122 @@
+"""
+tests/test_views_async.py
+
+Variantes assíncronas (ASGI) do upload, do status da análise e do PDF do laudo.
+
+Cobre:
+- sem login: 403, como nas APIViews
+- upload assíncrono cria a imagem e responde no mesmo formato da view síncrona
+- status da análise traz laudo e último job de renderização
+- PDF: 200 em streaming com ETag, 304 com If-None-Match, 206 com Range,
+  visualizações registradas em LaudoImpressao
+
+Como rodar:
+    python manage.py test tests.test_views_async
+"""
+
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from nucleo.models import (
+    Instituicao,
+    PerfilUsuario,
+    Paciente,
+    ImagemExame,
+    AnaliseImagem,
+    Laudo,
+    LaudoImpressao,
+)
+from nucleo.views_pdf import _etag_pdf
+from weka_adapter.services.report_generator import ReportService
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ViewsAssincronasTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.instituicao = Instituicao.objects.create(nome_instituicao="Clínica Async", cnpj="55.555.555/0001-55")
+        self.user = User.objects.create_user(username="medico_async", password="123")
+        perfil = PerfilUsuario.objects.create(usuario=self.user, papel="MEDICO", instituicao=self.instituicao)
+        self.paciente = Paciente.objects.create(nome_completo="Paciente Async", cpf="111.444.777-35")
+        imagem = ImagemExame.objects.create(
+            paciente=self.paciente,
+            usuario_upload=self.user,
+            instituicao=self.instituicao,
+            caminho_arquivo=SimpleUploadedFile("exame.bin", b"bytes"),
+        )
+        self.analise = AnaliseImagem.objects.create(
+            imagem=imagem, usuario_solicitante=self.user, resultado_classificacao="Benigno", hash_imagem="h"
+        )
+        self.laudo = Laudo.objects.create(analise=self.analise, usuario_responsavel=perfil, texto_laudo_completo="Texto")
+        with patch("weka_adapter.services.report_generator.aplicar_estilo_laudo", autospec=True):
+            ReportService.gerar_pdf_para_laudo_existente(self.laudo)
+        self.laudo.refresh_from_db()
+
+    @staticmethod
+    async def _conteudo(resp):
+        return b"".join([parte async for parte in resp.streaming_content])
+
+    async def test_exige_autenticacao(self):
+        resp = await self.async_client.get(reverse("analise-status-async", args=[self.analise.id]))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_upload_assincrono(self):
+        await self.async_client.aforce_login(self.user)
+        arquivo = SimpleUploadedFile("exame.jpg", b"conteudo-falso", content_type="image/jpeg")
+
+        with patch("nucleo.views.processar_analise_automatica", return_value=None):
+            resp = await self.async_client.post(
+                reverse("upload-imagem-exame-async", args=[self.paciente.uuid_paciente]),
+                {"caminho_arquivo": arquivo, "usuario_upload": self.user.id, "instituicao": self.instituicao.id},
+            )
+
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.json()["paciente"], self.paciente.id)
+        self.assertEqual(await ImagemExame.objects.filter(paciente=self.paciente).acount(), 2)
+
+    async def test_status_da_analise(self):
+        await self.async_client.aforce_login(self.user)
+        resp = await self.async_client.get(reverse("analise-status-async", args=[self.analise.id]))
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        dados = resp.json()
+        self.assertEqual(dados["resultado_classificacao"], "Benigno")
+        self.assertEqual(dados["laudo"]["id"], self.laudo.id)
+        self.assertIsNone(dados["laudo"]["renderizacao"])
+
+        resp = await self.async_client.get(reverse("analise-status-async", args=[999999]))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_pdf_streaming_304_e_range(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse("laudo-pdf-async", args=[self.laudo.id])
+
+        resp = await self.async_client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        conteudo = await self._conteudo(resp)
+        self.assertTrue(conteudo.startswith(b"%PDF"))
+        self.assertEqual(int(resp["Content-Length"]), len(conteudo))
+        self.assertEqual(resp["ETag"], _etag_pdf(self.laudo))
+
+        resp = await self.async_client.get(url, headers={"If-None-Match": resp["ETag"]})
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        resp = await self.async_client.get(url, headers={"Range": "bytes=0-9"})
+        self.assertEqual(resp.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(await self._conteudo(resp), conteudo[:10])
+
+        self.assertEqual(await LaudoImpressao.objects.filter(laudo=self.laudo).acount(), 3)
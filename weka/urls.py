@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import weka_status
+from .views import weka_status, weka_metricas
 
 urlpatterns = [
     path('status/', weka_status, name='weka_status'),
-]
\ No newline at end of file
+    path('metrics/', weka_metricas, name='weka_metricas'),
+]
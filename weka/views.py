@@ -1,15 +1,32 @@
+from django.http import HttpResponse
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 
+from nucleo.metricas import registro
+from weka_adapter.resiliencia import breaker_classificador
+
 @api_view(['GET']) #Diz que essa função só aceita pedidos de leitura (GET)
 def weka_status(request):
     """
     View simples para provar que o app WEKA existe e está integrado.
     """
+    breaker = breaker_classificador.resumo()
     return Response({
         "modulo": "WEKA (Core)", # Identifica quem está falando
-        "status": "Online",      # Diz que está tudo bem
-        "msg": "Módulo base do Weka carregado com sucesso." # Mensagem para humanos
+        "status": "Online" if breaker["estado"] == "FECHADO" else "Degradado", # Diz se está tudo bem
+        "msg": "Módulo base do Weka carregado com sucesso.", # Mensagem para humanos
+        "classificador": breaker, # Estado do circuit breaker e quantas vezes abriu
     })
 
-# Isola o núcleo do Weka. Criado um endpoint de status para garantir a observabilidade do sistema. Se o Weka cair, se descobre por aqui!!!
\ No newline at end of file
+# Isola o núcleo do Weka. Criado um endpoint de status para garantir a observabilidade do sistema. Se o Weka cair, se descobre por aqui!!!
+
+
+def weka_metricas(request):
+    """
+    Exporta as métricas do pipeline (histogramas por etapa) no formato texto do Prometheus.
+    Os valores são do processo que atendeu a requisição.
+    """
+    return HttpResponse(
+        registro.exportar_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
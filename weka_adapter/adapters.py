@@ -1,18 +1,48 @@
 import random
 
+from nucleo.metricas import cronometrar
+
 class WekaAdapter:
     """
     Simula a comunicação com o Weka sem precisar de Java.
     Esta classe serve como uma ponte. Ela esconde a complexidade 
     de como o Weka funciona. O resto do sistema não precisa saber 
     se é Java, Python, só precisa chamar o método .classificar()
+
+    Quando existe uma versão ativa no registro de modelos (VersaoModelo)
+    e os dados trazem características, a classificação usa esse modelo.
     """
+    def __init__(self):
+        self._modelo = None
+        self._versao = None
+        self._preparado = False
+
+    def preparar(self):
+        """
+        Resolve a versão ativa do modelo (consulta ao banco).
+        Chamado antes de classificar() fora da thread da requisição.
+        """
+        from .registro_modelos import modelo_ativo
+        self._modelo, self._versao = modelo_ativo()
+        self._preparado = True
+        return self
+
     def classificar(self, dados):    # Aqui entraria a lógica complexa de converter dados para .ARFF (formato do Weka) e chamar o processo Java.
-        opcoes = ['Benigno', 'Maligno', 'Cisto', 'Saudavel'] #Sorteio de respostas (simulação)
-        return {
-            "classificacao": random.choice(opcoes), #Resultado
-            "confianca": round(random.uniform(0.70, 0.99), 4), #Certeza (70% a 99%)
-            "modelo": "Weka-J48-Mock-v2" #IA utilizada
-        }
+        if isinstance(dados, dict) and dados:
+            if not self._preparado:
+                self.preparar()
+            # Versão sem exemplos (recomeçada sem laudos revisados): segue no simulador
+            if self._modelo is not None and self._modelo.total_exemplos:
+                resultado = self._modelo.classificar(dados)
+                resultado["checksum"] = self._versao.checksum
+                return resultado
+
+        with cronometrar('classificacao'):
+            opcoes = ['Benigno', 'Maligno', 'Cisto', 'Saudavel'] #Sorteio de respostas (simulação)
+            return {
+                "classificacao": random.choice(opcoes), #Resultado
+                "confianca": round(random.uniform(0.70, 0.99), 4), #Certeza (70% a 99%)
+                "modelo": "Weka-J48-Mock-v2" #IA utilizada
+            }
     
-# Recebe os dados do Python, "traduz" para o formato que o Weka entende, pega a resposta e traduz de volta para o Python.
\ No newline at end of file
+# Recebe os dados do Python, "traduz" para o formato que o Weka entende, pega a resposta e traduz de volta para o Python.
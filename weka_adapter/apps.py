@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class WekaAdapterConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'weka_adapter'
+
+    def ready(self):
+        # Streams binários nos PDFs: configuração global do ReportLab (utils/pdf_compacto.py)
+        from .utils.pdf_compacto import aplicar_modo_compacto
+        aplicar_modo_compacto(getattr(settings, 'PDF_MODO_COMPACTO', True))
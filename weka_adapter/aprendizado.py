@@ -0,0 +1,180 @@
+"""
+Naive Bayes incremental para o motor de IA.
+
+O modelo guarda apenas estatísticas suficientes em arrays compactos
+(array('d'), uma posição por classe):
+- contagem de exemplos por classe
+- contagens por valor para atributos nominais
+- n / média / M2 (algoritmo de Welford) para atributos numéricos
+
+Assim, novos laudos confirmados podem ser incorporados sem reler o
+histórico: basta somar as estatísticas dos exemplos novos (e subtrair as
+de um exemplo cuja classe o médico corrigiu depois).
+"""
+
+import hashlib
+import json
+import math
+from array import array
+
+from nucleo.metricas import cronometrar
+
+from .avaliacao import CLASSES
+
+# Variância mínima para evitar divisão por zero em atributos constantes
+VARIANCIA_MINIMA = 1e-6
+
+
+def _zeros():
+    return array('d', [0.0] * len(CLASSES))
+
+
+class NaiveBayesIncremental:
+    """
+    Classificador compatível com o WekaAdapter:
+    classificar(dados) -> {"classificacao", "confianca", "modelo"}
+    """
+
+    def __init__(self, nome_modelo="SAD-NaiveBayes-inc"):
+        self.nome_modelo = nome_modelo
+        self.contagem_classes = _zeros()
+        self.nominais = {}   # atributo -> {valor: array por classe}
+        self.numericos = {}  # atributo -> (n, media, m2), cada um array por classe
+
+    # --- Aprendizado ---
+    def atualizar(self, dados, classe):
+        """Incorpora um único exemplo rotulado."""
+        c = CLASSES.index(classe)
+        self.contagem_classes[c] += 1
+        for atributo, valor in dados.items():
+            if valor is None:
+                continue
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                n, media, m2 = self.numericos.setdefault(atributo, (_zeros(), _zeros(), _zeros()))
+                n[c] += 1
+                delta = valor - media[c]
+                media[c] += delta / n[c]
+                m2[c] += delta * (valor - media[c])
+            else:
+                valores = self.nominais.setdefault(atributo, {})
+                valores.setdefault(str(valor), _zeros())[c] += 1
+
+    def remover(self, dados, classe):
+        """Desfaz atualizar(dados, classe): o médico mudou a classe de um exemplo já incorporado."""
+        c = CLASSES.index(classe)
+        if self.contagem_classes[c] < 1:
+            raise ValueError(f"Nenhum exemplo da classe {classe} para remover.")
+        self.contagem_classes[c] -= 1
+        for atributo, valor in dados.items():
+            if valor is None:
+                continue
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                if atributo not in self.numericos:
+                    continue
+                n, media, m2 = self.numericos[atributo]
+                if n[c] < 1:
+                    continue
+                n[c] -= 1
+                if not n[c]:
+                    media[c], m2[c] = 0.0, 0.0
+                    continue
+                # Welford ao contrário
+                media_anterior = media[c]
+                media[c] = media_anterior + (media_anterior - valor) / n[c]
+                m2[c] = max(m2[c] - (valor - media[c]) * (valor - media_anterior), 0.0)
+            else:
+                contagens = self.nominais.get(atributo, {}).get(str(valor))
+                if contagens is not None and contagens[c] >= 1:
+                    contagens[c] -= 1
+
+    def treinar(self, instancias, classes):
+        for dados, classe in zip(instancias, classes):
+            self.atualizar(dados, classe)
+
+    @property
+    def total_exemplos(self):
+        return int(sum(self.contagem_classes))
+
+    # --- Predição ---
+    def probabilidades(self, dados):
+        total = sum(self.contagem_classes)
+        if not total:
+            raise ValueError("Modelo sem exemplos de treino.")
+
+        log_post = []
+        for c in range(len(CLASSES)):
+            if not self.contagem_classes[c]:
+                # Classe nunca vista no treino não pode ser prevista
+                log_post.append(float('-inf'))
+                continue
+            # Prior com suavização de Laplace
+            lp = math.log((self.contagem_classes[c] + 1) / (total + len(CLASSES)))
+            for atributo, valor in dados.items():
+                if valor is None:
+                    continue
+                if atributo in self.numericos and isinstance(valor, (int, float)):
+                    n, media, m2 = self.numericos[atributo]
+                    if n[c] < 1:
+                        continue
+                    variancia = max(m2[c] / n[c], VARIANCIA_MINIMA)
+                    lp += -0.5 * math.log(2 * math.pi * variancia) - (valor - media[c]) ** 2 / (2 * variancia)
+                elif atributo in self.nominais:
+                    valores = self.nominais[atributo]
+                    contagem = valores.get(str(valor))
+                    vistos = contagem[c] if contagem else 0.0
+                    total_atributo = sum(v[c] for v in valores.values())
+                    lp += math.log((vistos + 1) / (total_atributo + len(valores) + 1))
+            log_post.append(lp)
+
+        maior = max(log_post)
+        exps = [math.exp(v - maior) for v in log_post]
+        soma = sum(exps)
+        return {classe: e / soma for classe, e in zip(CLASSES, exps)}
+
+    def classificar(self, dados):
+        with cronometrar('classificacao'):
+            probs = self.probabilidades(dados)
+            classe = max(probs, key=probs.get)
+            return {
+                "classificacao": classe,
+                "confianca": round(probs[classe], 4),
+                "modelo": self.nome_modelo,
+            }
+
+    def classificar_lote(self, lista_dados):
+        return [self.classificar(dados) for dados in lista_dados]
+
+    # --- Serialização (registro de versões) ---
+    def para_dict(self):
+        return {
+            "classes": CLASSES,
+            "contagem_classes": list(self.contagem_classes),
+            "nominais": {
+                atributo: {valor: list(contagens) for valor, contagens in valores.items()}
+                for atributo, valores in self.nominais.items()
+            },
+            "numericos": {
+                atributo: {"n": list(n), "media": list(media), "m2": list(m2)}
+                for atributo, (n, media, m2) in self.numericos.items()
+            },
+        }
+
+    @classmethod
+    def de_dict(cls, parametros, nome_modelo="SAD-NaiveBayes-inc"):
+        if parametros.get("classes", CLASSES) != CLASSES:
+            raise ValueError("Parâmetros gerados com outro conjunto de classes.")
+        modelo = cls(nome_modelo)
+        modelo.contagem_classes = array('d', parametros.get("contagem_classes", [0.0] * len(CLASSES)))
+        modelo.nominais = {
+            atributo: {valor: array('d', contagens) for valor, contagens in valores.items()}
+            for atributo, valores in parametros.get("nominais", {}).items()
+        }
+        modelo.numericos = {
+            atributo: (array('d', est["n"]), array('d', est["media"]), array('d', est["m2"]))
+            for atributo, est in parametros.get("numericos", {}).items()
+        }
+        return modelo
+
+    def checksum(self):
+        conteudo = json.dumps(self.para_dict(), sort_keys=True).encode()
+        return hashlib.sha256(conteudo).hexdigest()
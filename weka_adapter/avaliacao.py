@@ -0,0 +1,308 @@
+"""
+Avaliação do classificador por trás do WekaAdapter.
+
+Responsabilidades:
+- Carregar datasets ARFF (mesmo formato exportado em /simulador/lote_arff/)
+- Gerar datasets sintéticos com o serviço do simulador
+- Validação cruzada estratificada (k-fold) com matriz de confusão por classe
+- Latência por item (percentis) e vazão em lote
+"""
+
+import csv
+import math
+import random
+import time
+import unicodedata
+
+# Classes oficiais de AnaliseImagem.RESULTADOS (exceto AGUARDANDO/ERRO)
+CLASSES = ['Maligno', 'Benigno', 'Cisto', 'Saudavel']
+
+# Atributos identificadores que nunca entram como característica
+ATRIBUTOS_IGNORADOS = {'nome', 'cpf', 'cpf_fake'}
+
+
+def normalizar_classe(valor):
+    """
+    Converte rótulos como 'MALIGNO' ou 'SAUDÁVEL' para as classes oficiais.
+    Retorna None para rótulos fora do domínio (ex.: 'INCONCLUSIVO').
+    """
+    if valor is None:
+        return None
+    sem_acento = unicodedata.normalize('NFKD', str(valor)).encode('ascii', 'ignore').decode()
+    for classe in CLASSES:
+        if sem_acento.strip().lower() == classe.lower():
+            return classe
+    return None
+
+
+# ============================================
+# DATASETS
+# ============================================
+def carregar_arff(caminho, atributo_classe=None, ignorar=ATRIBUTOS_IGNORADOS):
+    """
+    Lê um arquivo ARFF e devolve (instancias, classes, descartadas).
+
+    - NUMERIC/REAL/INTEGER viram float
+    - Nominais ({a,b}) viram string
+    - STRING com valores separados por vírgula (ex.: sintomas) viram um
+      atributo binário por termo ('sintomas:dor localizada' = '1'/'0')
+    """
+    atributos = []
+    linhas_dados = []
+    em_dados = False
+
+    with open(caminho, encoding='utf-8') as f:
+        for linha in f:
+            linha = linha.strip()
+            if not linha or linha.startswith('%'):
+                continue
+            if em_dados:
+                linhas_dados.append(linha)
+                continue
+            maiuscula = linha.upper()
+            if maiuscula.startswith('@ATTRIBUTE'):
+                _, resto = linha.split(None, 1)
+                nome, tipo = _separar_atributo(resto)
+                atributos.append((nome, tipo))
+            elif maiuscula.startswith('@DATA'):
+                em_dados = True
+
+    if not atributos:
+        raise ValueError(f"Arquivo ARFF sem atributos: {caminho}")
+
+    nomes = [nome for nome, _ in atributos]
+    if atributo_classe is None:
+        atributo_classe = next((n for n in ('classe', 'class', 'diagnostico') if n in nomes), nomes[-1])
+    if atributo_classe not in nomes:
+        raise ValueError(f"Atributo de classe '{atributo_classe}' não existe no ARFF.")
+
+    registros = []
+    leitor = csv.reader(linhas_dados, quotechar="'", skipinitialspace=True)
+    for valores in leitor:
+        if len(valores) != len(atributos):
+            continue
+        registros.append(dict(zip(nomes, valores)))
+
+    return _montar_instancias(registros, atributos, atributo_classe, ignorar)
+
+
+def _separar_atributo(resto):
+    if resto.startswith("'"):
+        fim = resto.index("'", 1)
+        return resto[1:fim], resto[fim + 1:].strip()
+    nome, tipo = resto.split(None, 1)
+    return nome, tipo.strip()
+
+
+def _montar_instancias(registros, atributos, atributo_classe, ignorar):
+    tipos = {nome: tipo.upper() for nome, tipo in atributos}
+
+    # Vocabulário dos atributos STRING multivalorados (ex.: sintomas)
+    vocabulario = {}
+    for nome, tipo in tipos.items():
+        if tipo == 'STRING' and nome not in ignorar and nome != atributo_classe:
+            termos = set()
+            for registro in registros:
+                termos.update(_termos(registro[nome]))
+            vocabulario[nome] = sorted(termos)
+
+    instancias, classes, descartadas = [], [], 0
+    for registro in registros:
+        classe = normalizar_classe(registro[atributo_classe])
+        if classe is None:
+            descartadas += 1
+            continue
+
+        dados = {}
+        for nome, tipo in tipos.items():
+            if nome == atributo_classe or nome in ignorar:
+                continue
+            valor = registro[nome]
+            if nome in vocabulario:
+                presentes = _termos(valor)
+                for termo in vocabulario[nome]:
+                    dados[f"{nome}:{termo}"] = '1' if termo in presentes else '0'
+            elif valor == '?':
+                continue
+            elif tipo in ('NUMERIC', 'REAL', 'INTEGER'):
+                dados[nome] = float(valor)
+            else:
+                dados[nome] = valor
+
+        instancias.append(dados)
+        classes.append(classe)
+
+    return instancias, classes, descartadas
+
+
+def _termos(valor):
+    if not valor or valor == '?':
+        return set()
+    return {t.strip().lower() for t in valor.split(',') if t.strip()}
+
+
+def gerar_dataset_simulado(quantidade, caminho_arff):
+    """
+    Gera `quantidade` casos com o simulador (Aluno 6) e grava em ARFF,
+    no mesmo layout do endpoint /simulador/lote_arff/.
+    """
+    from simulador.services import gerar_simulacao_fake
+
+    with open(caminho_arff, 'w', encoding='utf-8') as f:
+        f.write("@RELATION simulacoes\n\n")
+        f.write("@ATTRIBUTE nome STRING\n")
+        f.write("@ATTRIBUTE cpf STRING\n")
+        f.write("@ATTRIBUTE idade NUMERIC\n")
+        f.write("@ATTRIBUTE sintomas STRING\n")
+        f.write("@ATTRIBUTE diagnostico STRING\n")
+        f.write("@ATTRIBUTE confianca NUMERIC\n\n")
+        f.write("@DATA\n")
+        for _ in range(quantidade):
+            item = gerar_simulacao_fake()
+            f.write("'{}','{}',{},'{}','{}',{}\n".format(
+                item["nome"].replace("'", " "),
+                item["cpf_fake"],
+                item["idade"],
+                item["sintomas"].replace("'", " "),
+                item["diagnostico_fake"],
+                item["confianca"],
+            ))
+    return caminho_arff
+
+
+# ============================================
+# VALIDAÇÃO CRUZADA
+# ============================================
+def dividir_estratificado(classes, folds, semente=42):
+    """
+    Distribui os índices em `folds` partições mantendo a proporção de cada classe.
+    """
+    aleatorio = random.Random(semente)
+    particoes = [[] for _ in range(folds)]
+    proximo = 0
+    for classe in sorted(set(classes)):
+        indices = [i for i, c in enumerate(classes) if c == classe]
+        aleatorio.shuffle(indices)
+        for indice in indices:
+            particoes[proximo % folds].append(indice)
+            proximo += 1
+    return particoes
+
+
+def validacao_cruzada(fabrica, instancias, classes, folds=10, semente=42):
+    """
+    Executa k-fold estratificado.
+
+    `fabrica()` deve devolver um novo classificador a cada fold. Se ele tiver
+    o método `treinar(instancias, classes)`, é treinado com as partições de
+    treino; caso contrário é avaliado como está (ex.: o mock do WekaAdapter).
+    """
+    if folds < 2:
+        raise ValueError("São necessários pelo menos 2 folds.")
+    if len(instancias) < folds:
+        raise ValueError("Dataset menor que o número de folds.")
+
+    particoes = dividir_estratificado(classes, folds, semente)
+    matriz = {real: {prevista: 0 for prevista in CLASSES} for real in CLASSES}
+    acuracias = []
+
+    for i, teste in enumerate(particoes):
+        classificador = fabrica()
+        if hasattr(classificador, 'treinar'):
+            treino = [j for k, p in enumerate(particoes) if k != i for j in p]
+            classificador.treinar([instancias[j] for j in treino], [classes[j] for j in treino])
+
+        acertos = 0
+        for j in teste:
+            prevista = normalizar_classe(classificador.classificar(instancias[j])['classificacao'])
+            real = classes[j]
+            if prevista in matriz[real]:
+                matriz[real][prevista] += 1
+            acertos += prevista == real
+        acuracias.append(acertos / len(teste) if teste else 0.0)
+
+    return _resumir_matriz(matriz, acuracias)
+
+
+def _resumir_matriz(matriz, acuracias):
+    total = sum(sum(linha.values()) for linha in matriz.values())
+    corretos = sum(matriz[c][c] for c in CLASSES)
+
+    por_classe = {}
+    for classe in CLASSES:
+        vp = matriz[classe][classe]
+        suporte = sum(matriz[classe].values())
+        previstos = sum(matriz[real][classe] for real in CLASSES)
+        precisao = vp / previstos if previstos else 0.0
+        revocacao = vp / suporte if suporte else 0.0
+        f1 = 2 * precisao * revocacao / (precisao + revocacao) if precisao + revocacao else 0.0
+        por_classe[classe] = {
+            "precisao": round(precisao, 4),
+            "revocacao": round(revocacao, 4),
+            "f1": round(f1, 4),
+            "suporte": suporte,
+        }
+
+    return {
+        "folds": len(acuracias),
+        "acuracia": round(corretos / total, 4) if total else 0.0,
+        "acuracia_por_fold": [round(a, 4) for a in acuracias],
+        "por_classe": por_classe,
+        "matriz_confusao": {
+            "classes": CLASSES,
+            "linhas": [[matriz[real][prevista] for prevista in CLASSES] for real in CLASSES],
+        },
+    }
+
+
+# ============================================
+# DESEMPENHO
+# ============================================
+def percentil(valores_ordenados, p):
+    """Percentil pelo método nearest-rank (valores já ordenados): posição ceil(p/100 * n)."""
+    if not valores_ordenados:
+        return 0.0
+    # Tolerância: p * n / 100 em ponto flutuante pode passar um pouco do inteiro exato
+    posicao = max(0, min(len(valores_ordenados) - 1, math.ceil(p * len(valores_ordenados) / 100 - 1e-9) - 1))
+    return valores_ordenados[posicao]
+
+
+def medir_latencia(classificador, instancias, amostras=500):
+    """Latência de chamadas individuais a classificar(), em milissegundos."""
+    tempos = []
+    for i in range(min(amostras, len(instancias))):
+        inicio = time.perf_counter()
+        classificador.classificar(instancias[i])
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "amostras": len(tempos),
+        "p50": round(percentil(tempos, 50), 4),
+        "p90": round(percentil(tempos, 90), 4),
+        "p99": round(percentil(tempos, 99), 4),
+        "max": round(tempos[-1], 4) if tempos else 0.0,
+    }
+
+
+def medir_vazao(classificador, instancias, tamanho_lote=256):
+    """
+    Itens por segundo processando o dataset em lotes.
+    Usa classificar_lote() quando o classificador oferece esse método.
+    """
+    lote_nativo = getattr(classificador, 'classificar_lote', None)
+    inicio = time.perf_counter()
+    for i in range(0, len(instancias), tamanho_lote):
+        lote = instancias[i:i + tamanho_lote]
+        if lote_nativo:
+            lote_nativo(lote)
+        else:
+            for dados in lote:
+                classificador.classificar(dados)
+    duracao = time.perf_counter() - inicio
+    return {
+        "itens": len(instancias),
+        "tamanho_lote": tamanho_lote,
+        "lote_nativo": lote_nativo is not None,
+        "segundos": round(duracao, 4),
+        "itens_por_segundo": round(len(instancias) / duracao, 2) if duracao else None,
+    }
@@ -0,0 +1,112 @@
+"""
+Reclassificação do histórico de análises sob uma nova versão do modelo.
+
+Cada partição é uma faixa de ids de AnaliseImagem [id_inicio, id_fim).
+As partições são processadas em paralelo (um processo por núcleo) e,
+ao terminar, ficam registradas em ParticaoReclassificacao, o que permite
+retomar uma execução interrompida a partir da última partição concluída.
+"""
+
+import time
+
+from django.db import transaction
+
+from .aprendizado import NaiveBayesIncremental
+from .caracteristicas import caracteristicas_da_imagem
+
+# Modelo desserializado por processo (evita reler o JSON a cada partição)
+_modelos = {}
+
+
+def calcular_particoes(id_min, id_max, tamanho):
+    return [(inicio, min(inicio + tamanho, id_max + 1)) for inicio in range(id_min, id_max + 1, tamanho)]
+
+
+def particoes_pendentes(id_min, id_max, tamanho, concluidas):
+    """
+    Partições de [id_min, id_max] ainda não cobertas pelas faixas
+    `concluidas` ([(id_inicio, id_fim)]). As faixas concluídas podem ter
+    outro tamanho (execução anterior com outro --tamanho-particao): só os
+    buracos entre elas são repartidos.
+    """
+    pendentes, cursor = [], id_min
+    for inicio, fim in sorted(concluidas):
+        if fim <= cursor:
+            continue
+        if inicio > cursor:
+            pendentes += calcular_particoes(cursor, min(inicio, id_max + 1) - 1, tamanho)
+        cursor = max(cursor, fim)
+        if cursor > id_max:
+            return pendentes
+    return pendentes + calcular_particoes(cursor, id_max, tamanho)
+
+
+def _carregar_modelo(versao_id):
+    from nucleo.models import VersaoModelo
+
+    if versao_id not in _modelos:
+        versao = VersaoModelo.objects.get(id=versao_id)
+        _modelos[versao_id] = (NaiveBayesIncremental.de_dict(versao.parametros, nome_modelo=versao.versao), versao.versao)
+    return _modelos[versao_id]
+
+
+def processar_particao(versao_id, id_inicio, id_fim, tamanho_lote=100, pausa=0.0):
+    """
+    Reclassifica as análises da faixa e grava os resultados na tabela lateral.
+    Retorna (id_inicio, processadas, sem_imagem).
+    """
+    from nucleo.models import AnaliseImagem, ReclassificacaoAnalise, ParticaoReclassificacao
+
+    modelo, nome_versao = _carregar_modelo(versao_id)
+
+    analises = (
+        AnaliseImagem.objects
+        .filter(id__gte=id_inicio, id__lt=id_fim)
+        .select_related('imagem')
+        .order_by('id')
+    )
+
+    processadas, sem_imagem = 0, 0
+    lote_ids, lote_dados = [], []
+
+    def descarregar():
+        nonlocal processadas
+        if not lote_ids:
+            return
+        resultados = modelo.classificar_lote(lote_dados)
+        ReclassificacaoAnalise.objects.bulk_create(
+            [
+                ReclassificacaoAnalise(
+                    analise_id=analise_id,
+                    modelo_versao=nome_versao,
+                    resultado_classificacao=r['classificacao'],
+                    score_confianca=round(r['confianca'], 3),
+                )
+                for analise_id, r in zip(lote_ids, resultados)
+            ],
+            ignore_conflicts=True,
+        )
+        processadas += len(lote_ids)
+        lote_ids.clear()
+        lote_dados.clear()
+        if pausa:
+            time.sleep(pausa)  # throttling: alivia disco/banco para o tráfego normal
+
+    for analise in analises.iterator(chunk_size=tamanho_lote):
+        dados = caracteristicas_da_imagem(analise.imagem, analise.hash_imagem)
+        if not dados:
+            sem_imagem += 1
+            continue
+        lote_ids.append(analise.id)
+        lote_dados.append(dados)
+        if len(lote_ids) >= tamanho_lote:
+            descarregar()
+    descarregar()
+
+    with transaction.atomic():
+        ParticaoReclassificacao.objects.get_or_create(
+            modelo_versao=nome_versao,
+            id_inicio=id_inicio,
+            defaults={"id_fim": id_fim, "processadas": processadas},
+        )
+    return id_inicio, processadas, sem_imagem
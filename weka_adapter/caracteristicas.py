@@ -0,0 +1,91 @@
+"""
+Extração de características das imagens termográficas.
+
+A imagem é lida pelo storage (que já descriptografa quando necessário),
+decodificada com Pillow e reduzida para tons de cinza. As estatísticas
+resultantes ficam em cache na tabela CaracteristicasImagem, indexadas
+pelo hash SHA-256 da imagem, para que retreinos e reclassificações não
+precisem decodificar a mesma imagem de novo.
+"""
+
+from io import BytesIO
+
+from PIL import Image, ImageStat
+
+from nucleo.metricas import cronometrar
+
+# Incrementar sempre que o cálculo abaixo mudar (invalida o cache)
+VERSAO_EXTRATOR = "termo-stats-v1"
+
+# Lado da miniatura usada no cálculo (mantém o custo constante)
+LADO_MINIATURA = 128
+
+# Nível de cinza a partir do qual o pixel é considerado "região quente"
+LIMIAR_QUENTE = 200
+
+
+def extrair_caracteristicas(conteudo):
+    """
+    Recebe os bytes da imagem e devolve um dicionário de atributos numéricos.
+    """
+    with cronometrar('caracteristicas'):
+        img = Image.open(BytesIO(conteudo))
+        img.draft('L', (LADO_MINIATURA, LADO_MINIATURA))  # decodificação reduzida (JPEG)
+        cinza = img.convert('L')
+        cinza.thumbnail((LADO_MINIATURA, LADO_MINIATURA))
+
+        stat = ImageStat.Stat(cinza)
+        histograma = cinza.histogram()
+        total = sum(histograma) or 1
+
+        # Percentil 95 a partir do histograma acumulado
+        acumulado, p95 = 0, 255
+        for nivel, quantidade in enumerate(histograma):
+            acumulado += quantidade
+            if acumulado >= 0.95 * total:
+                p95 = nivel
+                break
+
+        # Assimetria térmica entre as metades esquerda e direita
+        largura, altura = cinza.size
+        meio = max(1, largura // 2)
+        esquerda = ImageStat.Stat(cinza.crop((0, 0, meio, altura))).mean[0]
+        direita = ImageStat.Stat(cinza.crop((largura - meio, 0, largura, altura))).mean[0]
+
+        return {
+            "media": round(stat.mean[0], 4),
+            "desvio": round(stat.stddev[0], 4),
+            "maximo": float(stat.extrema[0][1]),
+            "p95": float(p95),
+            "fracao_quente": round(sum(histograma[LIMIAR_QUENTE:]) / total, 6),
+            "assimetria": round(abs(esquerda - direita), 4),
+        }
+
+
+def caracteristicas_da_imagem(imagem, hash_imagem=None):
+    """
+    Devolve as características de uma ImagemExame, usando o cache em banco
+    quando o hash e a versão do extrator coincidem.
+    Retorna None se o arquivo não puder ser lido/decodificado.
+    """
+    from nucleo.models import CaracteristicasImagem
+
+    cache = CaracteristicasImagem.objects.filter(imagem_id=imagem.id).first()
+    if cache and cache.extrator_versao == VERSAO_EXTRATOR and (hash_imagem is None or cache.hash_imagem == hash_imagem):
+        return cache.valores
+
+    try:
+        with imagem.caminho_arquivo.open('rb') as f:
+            valores = extrair_caracteristicas(f.read())
+    except Exception:
+        return None
+
+    CaracteristicasImagem.objects.update_or_create(
+        imagem_id=imagem.id,
+        defaults={
+            "hash_imagem": hash_imagem or "",
+            "extrator_versao": VERSAO_EXTRATOR,
+            "valores": valores,
+        },
+    )
+    return valores
@@ -1,12 +1,17 @@
-import os
-import uuid
 import hashlib
 import logging
 from django.utils import timezone
-from nucleo.models import Paciente, ImagemExame, Laudo # Ajuste conforme seus models reais
+from nucleo.models import ImagemExame, AnaliseImagem, PerfilUsuario, CaracteristicasImagem
+from nucleo.metricas import cronometrar
+
+from .adapters import WekaAdapter
+from .avaliacao import normalizar_classe
+from .caracteristicas import extrair_caracteristicas, VERSAO_EXTRATOR
+from .resiliencia import executar_com_prazo, ClassificadorIndisponivel
+from .services.report_generator import ReportService
 
 # CONFIGURAÇÕES DO MODELO WEKA (SIMULADO)
-# Como o usuário não digita isso, deixamos fixo ou pegamos de um arquivo .conf
+# Usadas quando o classificador não informa versão/checksum (ex.: mock)
 MODELO_VERSAO_ATUAL = "Weka-J48-v2.1"
 MODELO_CHECKSUM_ATUAL = "a1b2c3d4e5f6-weka-check"
 
@@ -17,79 +22,121 @@ def calcular_hash_imagem(arquivo_imagem):
     Lê o arquivo da imagem em blocos e gera um Hash SHA256 único.
     Isso garante a integridade da prova digital (Segurança).
     """
-    sha256_hash = hashlib.sha256()
-    # Garante que o ponteiro do arquivo está no início
-    if hasattr(arquivo_imagem, 'open'):
-        arquivo_imagem.open('rb')
-    
-    # Lê em pedaços para não estourar a memória
-    for byte_block in iter(lambda: arquivo_imagem.read(4096), b""):
-        sha256_hash.update(byte_block)
-        
-    return sha256_hash.hexdigest()
+    with cronometrar('hash'):
+        sha256_hash = hashlib.sha256()
+        # Garante que o ponteiro do arquivo está no início
+        if hasattr(arquivo_imagem, 'open'):
+            arquivo_imagem.open('rb')
+
+        # Lê em pedaços para não estourar a memória
+        for byte_block in iter(lambda: arquivo_imagem.read(4096), b""):
+            sha256_hash.update(byte_block)
+
+        return sha256_hash.hexdigest()
+
+
+def _classificar_conteudo(adapter, conteudo):
+    """
+    Executado no pool do classificador (sem acesso ao banco):
+    decodifica a imagem, extrai as características e classifica.
+    Retorna (None, None) se o arquivo não for uma imagem válida.
+    """
+    try:
+        dados = extrair_caracteristicas(conteudo)
+    except Exception:
+        return None, None
+    return dados, adapter.classificar(dados)
+
 
 def processar_analise_automatica(imagem_id, usuario_solicitante, ip_cliente):
     """
-    Função que simula a integração com o Weka e preenche
-    TODOS os campos técnicos automaticamente.
+    Integração upload -> AnaliseImagem -> classificação -> Laudo.
+
+    A classificação respeita o orçamento de latência (WEKA_PRAZO_CLASSIFICACAO)
+    e o circuit breaker. Se o classificador estiver lento/indisponível, a
+    análise fica como AGUARDANDO e a função retorna None sem bloquear o upload.
     """
     try:
         # 1. Busca a imagem no banco
-        imagem = ImagemExame.objects.get(id=imagem_id)
-        
+        imagem = ImagemExame.objects.select_related('paciente', 'instituicao').get(id=imagem_id)
+
         print(f"--- [INTEGRAÇÃO] Iniciando processamento da imagem {imagem.id} ---")
 
         # 2. CALCULAR O HASH DA IMAGEM (Automático)
-        # Isso preenche o campo 'Hash imagem'
-        hash_calculado = calcular_hash_imagem(imagem.arquivo)
+        with imagem.caminho_arquivo.open('rb') as f:
+            conteudo = f.read()
+        with cronometrar('hash'):
+            hash_calculado = hashlib.sha256(conteudo).hexdigest()
         print(f"--- [INTEGRAÇÃO] Hash Gerado: {hash_calculado} ---")
 
-        # 3. SIMULAÇÃO DA CHAMADA AO WEKA (Aqui entraria o java -jar weka.jar...)
-        # Vamos supor que o Weka retornou isso:
-        resultado_classificacao = "PNEUMONIA_DETECTADA"
-        confianca = 98.5
-        
-        # 4. CRIAR O LAUDO AUTOMATICAMENTE
-        # Aqui preenchemos tudo que o médico não deve digitar
-        novo_laudo = Laudo.objects.create(
-            paciente=imagem.paciente,
-            imagem_exame=imagem,
-            medico_responsavel=usuario_solicitante, # Quem fez o upload
-            
-            # --- DADOS DA ANÁLISE ---
-            diagnostico_ia=resultado_classificacao,
-            confianca_ia=confianca,
-            conteudo_laudo=f"Análise automática sugere {resultado_classificacao} com {confianca}% de confiança.",
-            
-            # --- CAMPOS AUTOMATIZADOS (O QUE VOCÊ PEDIU) ---
-            modelo_versao=MODELO_VERSAO_ATUAL,      # Preenchido via constante
-            modelo_checksum=MODELO_CHECKSUM_ATUAL,  # Preenchido via constante
-            hash_imagem=hash_calculado,             # Calculado agora
-            ip_emissao=ip_cliente,                  # Veio da View
-            
-            # Status e Verificação
-            status_laudo='CONCLUIDO',               # Finalizado/Bloqueado = True (ou status equivalente)
-            bloqueado_edicao=True,                  # Trava o laudo para não alterar o resultado da IA
-            codigo_verificacao=str(uuid.uuid4())[:8].upper(), # Gera ex: A1B2C3D4
-            
-            data_emissao=timezone.now()
+        analise = AnaliseImagem(
+            imagem=imagem,
+            usuario_solicitante=usuario_solicitante,
+            hash_imagem=hash_calculado,
         )
-        
-        print(f"--- [SUCESSO] Laudo {novo_laudo.id} gerado automaticamente! ---")
-        
-        # Retornamos um objeto simples para a View usar (DTO ou o próprio objeto)
-        # Criando uma estrutura simples para simular o retorno que a view espera
-        class ResultadoIntegracao:
-            def __init__(self, laudo_obj):
-                self.analise = type('obj', (object,), {
-                    'resultado_classificacao': laudo_obj.diagnostico_ia,
-                    'score_confianca': laudo_obj.confianca_ia
-                })
-                self.caminho_pdf = None # Se tiver gerador de PDF, coloca aqui
-        
-        return ResultadoIntegracao(novo_laudo)
+
+        # 3. CHAMADA AO CLASSIFICADOR (com prazo e circuit breaker)
+        adapter = WekaAdapter().preparar()
+        try:
+            dados, resultado = executar_com_prazo(_classificar_conteudo, adapter, conteudo)
+        except ClassificadorIndisponivel as e:
+            logger.warning("Classificador indisponível (%s): imagem %s fica AGUARDANDO", e.motivo, imagem.id)
+            analise.save(simular_ia=False)
+            return None
+
+        # 4. REGISTRA O RESULTADO E CRIA O LAUDO
+        laudo = concluir_analise(analise, dados, resultado, usuario_solicitante, ip_cliente)
+        if laudo:
+            print(f"--- [SUCESSO] Laudo {laudo.id} gerado automaticamente! ---")
+        return laudo
 
     except Exception as e:
         logger.error(f"Erro na integração Weka: {str(e)}")
         print(f"ERRO CRÍTICO: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def concluir_analise(analise, dados, resultado, usuario_solicitante, ip_cliente):
+    """
+    Grava o resultado da classificação na análise e, havendo médico
+    responsável (PerfilUsuario), gera o laudo. Retorna o Laudo ou None.
+    """
+    analise.data_hora_conclusao = timezone.now()
+
+    if resultado is None:
+        # Arquivo não decodificável: não há o que classificar
+        analise.resultado_classificacao = 'ERRO'
+        analise.save(simular_ia=False)
+        return None
+
+    analise.resultado_classificacao = normalizar_classe(resultado['classificacao']) or 'ERRO'
+    analise.score_confianca = round(resultado['confianca'], 3)
+    analise.modelo_versao = resultado.get('modelo', MODELO_VERSAO_ATUAL)
+    analise.modelo_checksum = resultado.get('checksum', MODELO_CHECKSUM_ATUAL)
+    analise.save(simular_ia=False)
+
+    CaracteristicasImagem.objects.update_or_create(
+        imagem_id=analise.imagem_id,
+        defaults={"hash_imagem": analise.hash_imagem, "extrator_versao": VERSAO_EXTRATOR, "valores": dados},
+    )
+
+    perfil = PerfilUsuario.objects.filter(usuario=usuario_solicitante).first() if usuario_solicitante else None
+    if perfil is None or analise.resultado_classificacao == 'ERRO':
+        return None
+
+    return ReportService.gerar_e_registrar(
+        analise_obj=analise,
+        medico_perfil=perfil,
+        ip_cliente=ip_cliente,
+    )
+
+
+def reprocessar_analise_pendente(analise, ip_cliente="Processamento Posterior"):
+    """
+    Classifica uma análise que ficou AGUARDANDO (sem prazo: roda em job,
+    fora da requisição). Retorna o Laudo gerado ou None.
+    """
+    with analise.imagem.caminho_arquivo.open('rb') as f:
+        conteudo = f.read()
+    dados, resultado = _classificar_conteudo(WekaAdapter().preparar(), conteudo)
+    return concluir_analise(analise, dados, resultado, analise.usuario_solicitante, ip_cliente)
@@ -0,0 +1,57 @@
+"""
+Job de atualização incremental do modelo de IA a partir dos laudos revisados
+pelo médico (POST /api/laudos/<id>/revisao/).
+
+Pensado para rodar periodicamente (cron), por exemplo a cada hora:
+    0 * * * *  python manage.py atualizar_modelo_incremental
+
+Ou como processo contínuo:
+    python manage.py atualizar_modelo_incremental --intervalo 3600
+
+Para descartar o que as versões anteriores aprenderam e reaprender só com
+os laudos revisados:
+    python manage.py atualizar_modelo_incremental --recomecar
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from weka_adapter.registro_modelos import ConflitoVersaoModelo, atualizar_modelo_incremental
+
+
+class Command(BaseCommand):
+    help = "Incorpora laudos revisados (confirmados/corrigidos) ao modelo e publica uma nova versão."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, help="Máximo de laudos por execução.")
+        parser.add_argument('--intervalo', type=int,
+                            help="Repete a cada N segundos em vez de executar uma vez.")
+        parser.add_argument('--recomecar', action='store_true',
+                            help="Parte de um modelo vazio e reaprende todos os laudos revisados.")
+
+    def handle(self, *args, **opts):
+        if opts['recomecar'] and opts['limite']:
+            raise CommandError("--recomecar reaprende todos os laudos revisados: não use --limite.")
+
+        recomecar = opts['recomecar']
+        while True:
+            try:
+                resumo = atualizar_modelo_incremental(limite=opts['limite'], recomecar=recomecar)
+            except ConflitoVersaoModelo:
+                self.stderr.write("Outra execução publicou uma versão ao mesmo tempo; nada gravado.")
+            else:
+                recomecar = False
+                if resumo['nova_versao']:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Versão {resumo['nova_versao']} publicada: +{resumo['incorporados']} / "
+                        f"-{resumo['removidos']} laudos ({resumo['ignorados']} ignorados)."
+                    ))
+                else:
+                    self.stdout.write(
+                        f"Nenhuma revisão nova incorporada ({resumo['ignorados']} ignorados)."
+                    )
+
+            if not opts['intervalo']:
+                break
+            time.sleep(opts['intervalo'])
@@ -0,0 +1,108 @@
+"""
+Avalia acurácia e desempenho do classificador usado pelo WekaAdapter.
+
+Exemplos:
+    python manage.py avaliar_classificador --arff lote.arff --folds 10
+    python manage.py avaliar_classificador --gerar 1000 --saida avaliacoes/j48.json
+"""
+
+import json
+import os
+import tempfile
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from weka_adapter import avaliacao
+
+
+class Command(BaseCommand):
+    help = "Validação cruzada estratificada, latência e vazão do classificador (saída em JSON)."
+
+    def add_arguments(self, parser):
+        origem = parser.add_mutually_exclusive_group(required=True)
+        origem.add_argument('--arff', help="Dataset ARFF (ex.: exportado em /simulador/lote_arff/).")
+        origem.add_argument('--gerar', type=int, help="Gera N casos com o simulador.")
+        parser.add_argument('--classe', help="Atributo de classe (padrão: classe/diagnostico/último).")
+        parser.add_argument('--folds', type=int, default=10)
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument('--adaptador', default='weka_adapter.adapters.WekaAdapter',
+                            help="Caminho da classe do classificador a avaliar.")
+        parser.add_argument('--amostras-latencia', type=int, default=500)
+        parser.add_argument('--lote', type=int, default=256, help="Tamanho do lote na medição de vazão.")
+        parser.add_argument('--saida', help="Arquivo JSON do relatório (padrão: avaliacoes/<modelo>_<data>.json).")
+
+    def handle(self, *args, **opts):
+        try:
+            fabrica = import_string(opts['adaptador'])
+        except ImportError as e:
+            raise CommandError(f"Adaptador inválido: {e}")
+
+        if opts['gerar']:
+            with tempfile.NamedTemporaryFile(suffix='.arff', delete=False) as tmp:
+                caminho = tmp.name
+            try:
+                avaliacao.gerar_dataset_simulado(opts['gerar'], caminho)
+                instancias, classes, descartadas = avaliacao.carregar_arff(caminho, opts['classe'])
+            finally:
+                os.remove(caminho)
+            origem = f"simulador ({opts['gerar']} casos)"
+        else:
+            try:
+                instancias, classes, descartadas = avaliacao.carregar_arff(opts['arff'], opts['classe'])
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+            origem = opts['arff']
+
+        if not instancias:
+            raise CommandError("Nenhuma instância com classe válida no dataset.")
+
+        self.stdout.write(f"Dataset: {len(instancias)} instâncias ({descartadas} descartadas)")
+
+        try:
+            cv = avaliacao.validacao_cruzada(fabrica, instancias, classes, opts['folds'], opts['semente'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        # Desempenho medido com um classificador treinado no dataset inteiro
+        classificador = fabrica()
+        if hasattr(classificador, 'treinar'):
+            classificador.treinar(instancias, classes)
+        modelo = classificador.classificar(instancias[0]).get('modelo', opts['adaptador'])
+
+        relatorio = {
+            "modelo": modelo,
+            "adaptador": opts['adaptador'],
+            "data": timezone.now().isoformat(),
+            "dataset": {
+                "origem": origem,
+                "instancias": len(instancias),
+                "descartadas": descartadas,
+                "distribuicao": dict(Counter(classes)),
+            },
+            "validacao_cruzada": cv,
+            "latencia_ms": avaliacao.medir_latencia(classificador, instancias, opts['amostras_latencia']),
+            "vazao": avaliacao.medir_vazao(classificador, instancias, opts['lote']),
+        }
+
+        saida = opts['saida']
+        if not saida:
+            data = timezone.now().strftime('%Y%m%d_%H%M%S')
+            saida = os.path.join(settings.BASE_DIR, 'avaliacoes', f"{_nome_arquivo(modelo)}_{data}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+        with open(saida, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+        self.stdout.write(f"Acurácia ({cv['folds']} folds): {cv['acuracia']:.4f}")
+        self.stdout.write(
+            "Latência p50/p99: {p50} / {p99} ms".format(**relatorio['latencia_ms'])
+        )
+        self.stdout.write(f"Vazão: {relatorio['vazao']['itens_por_segundo']} itens/s")
+        self.stdout.write(self.style.SUCCESS(f"Relatório salvo em {saida}"))
+
+
+def _nome_arquivo(texto):
+    return "".join(c if c.isalnum() or c in '-_.' else '_' for c in str(texto))
@@ -0,0 +1,145 @@
+"""
+Compara WSGI e ASGI servindo o PDF de um laudo para clientes lentos.
+
+Não sobe servidor: chama as aplicações do projeto (projeto_sad.wsgi e
+projeto_sad.asgi) como um servidor faria e simula a rede lenta na entrega
+de cada bloco da resposta (`--atraso` segundos por bloco de 64 KB).
+
+- WSGI: um pool de `--threads` threads (ex.: gunicorn gthread). A thread
+  fica presa enquanto o cliente lento lê a resposta.
+- ASGI: um processo, um loop de eventos. O envio lento é um `await`; a
+  view assíncrona (/api/async/laudos/<id>/pdf/) não ocupa thread.
+
+As requisições pedem `Range: bytes=1-` (continuação de download): mesmo
+caminho de leitura e envio do arquivo, sem registrar visualização na
+auditoria a cada requisição do benchmark.
+
+Exemplo:
+    python manage.py benchmark_asgi --usuario medico --clientes 64 --threads 8 --atraso 0.2
+"""
+
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from nucleo.models import Laudo
+from weka_adapter.services.report_generator import ReportService
+
+HOST = '127.0.0.1'
+
+
+class Command(BaseCommand):
+    help = "Benchmark WSGI x ASGI com clientes lentos baixando o PDF de um laudo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', required=True, help="Username usado nas requisições (sessão).")
+        parser.add_argument('--laudo', type=int, help="Id do laudo (padrão: o mais recente com PDF).")
+        parser.add_argument('--clientes', type=int, default=64, help="Requisições simultâneas.")
+        parser.add_argument('--threads', type=int, default=8, help="Threads do servidor WSGI.")
+        parser.add_argument('--atraso', type=float, default=0.2, help="Segundos por bloco enviado ao cliente.")
+
+    def handle(self, *args, **opts):
+        usuario = User.objects.filter(username=opts['usuario']).first()
+        if usuario is None:
+            raise CommandError(f"Usuário '{opts['usuario']}' não encontrado.")
+        laudo = self._laudo(opts['laudo'])
+
+        sessao = SessionStore()
+        sessao[SESSION_KEY] = str(usuario.pk)
+        sessao[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        sessao[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+        sessao.create()
+        cookie = f"{settings.SESSION_COOKIE_NAME}={sessao.session_key}"
+
+        n, atraso = opts['clientes'], opts['atraso']
+        self.stdout.write(
+            f"Laudo {laudo.id}, {n} clientes, {atraso:.2f}s por bloco, WSGI com {opts['threads']} threads"
+        )
+        try:
+            wsgi = self._wsgi(reverse('laudo-pdf', args=[laudo.id]), cookie, n, opts['threads'], atraso)
+            asgi = asyncio.run(self._asgi(reverse('laudo-pdf-async', args=[laudo.id]), cookie, n, atraso))
+        finally:
+            sessao.delete()
+
+        for rotulo, (duracao, status) in (("WSGI", wsgi), ("ASGI", asgi)):
+            self.stdout.write(
+                f"  {rotulo}  {duracao:6.2f}s  {n / duracao:7.1f} req/s  status: {sorted(status)}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Ganho: {wsgi[0] / asgi[0]:.2f}x"))
+
+    def _laudo(self, laudo_id):
+        laudos = Laudo.objects.select_related(
+            'analise__imagem__paciente', 'analise__imagem__instituicao', 'usuario_responsavel__usuario'
+        ).exclude(caminho_pdf='')
+        laudo = laudos.filter(id=laudo_id).first() if laudo_id else laudos.order_by('-id').first()
+        if laudo is None or not ReportService.pdf_atualizado(laudo):
+            raise CommandError("Informe um laudo com PDF gerado e atualizado (--laudo).")
+        return laudo
+
+    # --- WSGI: pool de threads, envio bloqueante ---
+
+    def _wsgi(self, caminho, cookie, n, threads, atraso):
+        from projeto_sad.wsgi import application
+
+        def requisicao(_):
+            ambiente = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': caminho, 'HTTP_HOST': HOST,
+                'HTTP_COOKIE': cookie, 'HTTP_RANGE': 'bytes=1-', 'wsgi.input': io.BytesIO(),
+            }
+            setup_testing_defaults(ambiente)
+            status = []
+            corpo = application(ambiente, lambda s, cabecalhos, *a: status.append(int(s[:3])))
+            try:
+                for _bloco in corpo:
+                    time.sleep(atraso)  # socket.sendall para um cliente lento
+            finally:
+                getattr(corpo, 'close', lambda: None)()
+            return status[0]
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            status = set(pool.map(requisicao, range(n)))
+        return time.perf_counter() - inicio, status
+
+    # --- ASGI: um loop de eventos, envio com await ---
+
+    async def _asgi(self, caminho, cookie, n, atraso):
+        from projeto_sad.asgi import application
+
+        async def requisicao():
+            escopo = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': caminho, 'raw_path': caminho.encode(),
+                'query_string': b'', 'root_path': '', 'server': (HOST, 80), 'client': (HOST, 50000),
+                'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode()), (b'range', b'bytes=1-')],
+            }
+            status = []
+            corpo_enviado = asyncio.Event()
+
+            async def receber():
+                if corpo_enviado.is_set():
+                    await asyncio.Event().wait()  # conexão aberta até o fim da resposta
+                corpo_enviado.set()
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def enviar(mensagem):
+                if mensagem['type'] == 'http.response.start':
+                    status.append(mensagem['status'])
+                elif mensagem['type'] == 'http.response.body' and mensagem.get('body'):
+                    await asyncio.sleep(atraso)  # transporte aguardando o cliente lento
+
+            await application(escopo, receber, enviar)
+            return status[0]
+
+        inicio = time.perf_counter()
+        status = set(await asyncio.gather(*(requisicao() for _ in range(n))))
+        return time.perf_counter() - inicio, status
@@ -0,0 +1,53 @@
+"""
+Mede a vazão (PDFs/s) da renderização de laudos, com e sem o cache de
+camadas por instituição. Só renderiza em memória: nada é salvo nem auditado.
+
+Exemplo:
+    python manage.py benchmark_pdf --laudo 12 --repeticoes 200
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from nucleo.models import Laudo
+from weka_adapter.services import camadas_pdf
+from weka_adapter.services.report_generator import ReportService
+
+
+class Command(BaseCommand):
+    help = "Benchmark de PDFs/s do ReportService (cache de camadas desligado x ligado)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--laudo', type=int, help="Id do laudo (padrão: o mais recente).")
+        parser.add_argument('--repeticoes', type=int, default=100)
+
+    def handle(self, *args, **opts):
+        laudos = Laudo.objects.select_related(
+            'analise__imagem__paciente', 'analise__imagem__instituicao', 'usuario_responsavel__usuario'
+        )
+        laudo = laudos.filter(id=opts['laudo']).first() if opts['laudo'] else laudos.order_by('-id').first()
+        if laudo is None:
+            raise CommandError("Nenhum laudo encontrado para o benchmark.")
+
+        n = opts['repeticoes']
+        self.stdout.write(f"Laudo {laudo.id} ({laudo.analise.imagem.instituicao.nome_instituicao}), {n} repetições")
+
+        resultados = {}
+        for rotulo, usar_cache in (("sem cache", False), ("com cache", True)):
+            camadas_pdf.limpar_cache()
+            with override_settings(PDF_CACHE_CAMADAS=usar_cache):
+                ReportService.renderizar_pdf(laudo)  # aquecimento
+                inicio = time.perf_counter()
+                for _ in range(n):
+                    tamanho = len(ReportService.renderizar_pdf(laudo))
+                duracao = time.perf_counter() - inicio
+            resultados[rotulo] = n / duracao
+            self.stdout.write(
+                f"  {rotulo:<10} {resultados[rotulo]:8.1f} PDFs/s  "
+                f"({duracao / n * 1000:.2f} ms/PDF, {tamanho} bytes)"
+            )
+
+        ganho = resultados["com cache"] / resultados["sem cache"]
+        self.stdout.write(self.style.SUCCESS(f"Ganho: {ganho:.2f}x"))
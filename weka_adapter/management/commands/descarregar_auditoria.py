@@ -0,0 +1,39 @@
+"""
+Grava em LogAuditoria os eventos pendentes no diário da auditoria
+(nucleo/auditoria.py), sem esperar o flusher em segundo plano.
+
+Inclui segmentos de processos que morreram (abertos ou em gravação parados
+há mais de AUDITORIA_SEGMENTO_ORFAO segundos; `--orfao 0` pega todos; use
+só com o servidor parado). Regravar é seguro: eventos já gravados são
+ignorados pelo id.
+
+Exemplos:
+    python manage.py descarregar_auditoria
+    python manage.py descarregar_auditoria --orfao 0
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from nucleo.auditoria import descarregar
+
+
+class Command(BaseCommand):
+    help = "Grava em LogAuditoria os eventos pendentes no diário da auditoria."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orfao', type=float,
+                            help="Segundos parado para um segmento aberto ser considerado órfão.")
+
+    def handle(self, *args, **opts):
+        inicio = time.perf_counter()
+        if opts['orfao'] is not None:
+            with override_settings(AUDITORIA_SEGMENTO_ORFAO=opts['orfao']):
+                total = descarregar()
+        else:
+            total = descarregar()
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} evento(s) gravado(s) em {time.perf_counter() - inicio:.2f}s."
+        ))
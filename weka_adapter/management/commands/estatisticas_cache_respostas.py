@@ -0,0 +1,35 @@
+"""
+Mostra acertos/faltas do cache de respostas (nucleo/cache_respostas.py) por view.
+
+Os contadores ficam no próprio backend de cache: com LocMemCache cada
+processo tem os seus (rode no mesmo processo ou use Redis/Memcached).
+
+Exemplos:
+    python manage.py estatisticas_cache_respostas
+    python manage.py estatisticas_cache_respostas --zerar
+"""
+
+from django.core.management.base import BaseCommand
+
+from nucleo.cache_respostas import estatisticas, zerar_estatisticas
+
+
+class Command(BaseCommand):
+    help = "Acertos e faltas do cache de respostas, por view."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zerar', action='store_true', help="Zera os contadores depois de mostrar.")
+
+    def handle(self, *args, **opts):
+        dados = estatisticas()
+        if not dados:
+            self.stdout.write("Nenhuma leitura registrada no cache de respostas.")
+        for nome, valores in dados.items():
+            taxa = valores['taxa_acerto']
+            self.stdout.write(
+                f"  {nome:<20} {valores['acertos']:7d} acertos  {valores['faltas']:7d} faltas  "
+                f"taxa {'-' if taxa is None else f'{taxa:.1%}'}"
+            )
+        if opts['zerar']:
+            zerar_estatisticas()
+            self.stdout.write(self.style.SUCCESS("Contadores zerados."))
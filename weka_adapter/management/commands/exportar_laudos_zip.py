@@ -0,0 +1,51 @@
+"""
+Exporta os PDFs de laudo de um período para um ZIP (auditoria).
+Os PDFs que faltam são renderizados em paralelo; o ZIP é escrito em
+streaming, com uso de memória constante.
+
+Exemplo:
+    python manage.py exportar_laudos_zip --inicio 2025-01-01 --fim 2025-03-31 --instituicao 2 --saida auditoria_q1.zip
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from weka_adapter.services.exportacao_zip import selecionar_laudos, gerar_zip
+
+
+class Command(BaseCommand):
+    help = "Gera um ZIP com os PDFs dos laudos emitidos no período."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', required=True, help="Data inicial (AAAA-MM-DD).")
+        parser.add_argument('--fim', required=True, help="Data final (AAAA-MM-DD), inclusiva.")
+        parser.add_argument('--instituicao', type=int, help="Id da instituição (padrão: todas).")
+        parser.add_argument('--janela', type=int, default=8, help="Renderizações adiantadas em paralelo.")
+        parser.add_argument('--saida', required=True, help="Arquivo ZIP de destino.")
+
+    def handle(self, *args, **opts):
+        try:
+            inicio, fim = parse_date(opts['inicio']), parse_date(opts['fim'])
+        except ValueError:
+            inicio = fim = None
+        if not inicio or not fim:
+            raise CommandError("Datas inválidas: use AAAA-MM-DD.")
+
+        laudos = selecionar_laudos(inicio, fim, opts['instituicao'])
+        total = laudos.count()
+        self.stdout.write(f"{total} laudos entre {inicio} e {fim}.")
+
+        inicio_exec = time.perf_counter()
+        escritos = 0
+        with open(opts['saida'], 'wb') as destino:
+            for bloco in gerar_zip(laudos, janela=opts['janela']):
+                destino.write(bloco)
+                escritos += len(bloco)
+        duracao = time.perf_counter() - inicio_exec
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{opts['saida']}: {escritos / 1024 / 1024:.1f} MB em {duracao:.1f}s "
+            f"(detalhes por laudo em manifesto.csv)."
+        ))
@@ -0,0 +1,52 @@
+"""
+Importa pacientes em lote a partir de um arquivo CSV ou NDJSON
+(mesma lógica da rota pacientes/importar/).
+
+Cabeçalho/chaves aceitos: nome_completo, cpf, data_nascimento, sintomas,
+possivel_diagnostico. Linhas com erro ou CPF duplicado são listadas e não
+interrompem a importação.
+
+Exemplos:
+    python manage.py importar_pacientes pacientes.csv
+    python manage.py importar_pacientes dump.txt --formato ndjson --lote 1000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from nucleo.importacao_pacientes import TAMANHO_LOTE, formato_do_arquivo, importar_pacientes, ler_registros
+
+
+class Command(BaseCommand):
+    help = "Importa pacientes de um arquivo CSV/NDJSON (validação, deduplicação por CPF e bulk_create em lotes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help="Caminho do arquivo .csv ou .ndjson.")
+        parser.add_argument('--formato', choices=['csv', 'ndjson'], help="Força o formato (padrão: pela extensão).")
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help=f"Linhas por transação (padrão {TAMANHO_LOTE}).")
+
+    def handle(self, *args, **opts):
+        try:
+            formato = formato_do_arquivo(opts['arquivo'], opts['formato'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if opts['lote'] < 1:
+            raise CommandError("--lote deve ser maior que zero.")
+
+        inicio = time.perf_counter()
+        try:
+            with open(opts['arquivo'], 'rb') as arquivo:
+                resultado = importar_pacientes(ler_registros(arquivo, formato), tamanho_lote=opts['lote'])
+        except OSError as exc:
+            raise CommandError(f"Não foi possível ler o arquivo: {exc}")
+
+        for item in resultado.erros:
+            self.stdout.write(self.style.WARNING(f"linha {item['linha']}: {item['erro']}"))
+        for item in resultado.duplicados:
+            self.stdout.write(f"linha {item['linha']}: {item['motivo']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.criados} pacientes criados, {len(resultado.duplicados)} duplicados, "
+            f"{len(resultado.erros)} com erro em {time.perf_counter() - inicio:.1f}s."
+        ))
@@ -0,0 +1,40 @@
+"""
+Processa as análises que ficaram AGUARDANDO porque o classificador estava
+lento ou indisponível no momento do upload.
+
+Pensado para rodar periodicamente (cron):
+    */5 * * * *  python manage.py processar_analises_pendentes
+"""
+
+from django.core.management.base import BaseCommand
+
+from nucleo.models import AnaliseImagem
+from weka_adapter.integration import reprocessar_analise_pendente
+
+
+class Command(BaseCommand):
+    help = "Classifica as análises pendentes (AGUARDANDO) e gera os laudos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=500, help="Máximo de análises por execução.")
+
+    def handle(self, *args, **opts):
+        pendentes = (
+            AnaliseImagem.objects
+            .filter(resultado_classificacao='AGUARDANDO')
+            .select_related('imagem', 'usuario_solicitante')
+            .order_by('id')[:opts['limite']]
+        )
+
+        concluidas, falhas = 0, 0
+        for analise in pendentes:
+            try:
+                reprocessar_analise_pendente(analise)
+                concluidas += 1
+            except Exception as e:
+                falhas += 1
+                self.stderr.write(f"Análise {analise.id}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{concluidas} análises processadas, {falhas} com falha."
+        ))
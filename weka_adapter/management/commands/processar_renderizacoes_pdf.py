@@ -0,0 +1,49 @@
+"""
+Executa os jobs de renderização de PDF que ficaram na fila (ex.: o processo
+web reiniciou antes de o pool terminar). Também pode ser usado como worker
+dedicado, em vez do pool do processo web:
+
+    python manage.py processar_renderizacoes_pdf --intervalo 5
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from nucleo.models import RenderizacaoPDF
+from weka_adapter.services.fila_pdf import executar_renderizacao, retomar_travados
+
+
+class Command(BaseCommand):
+    help = "Renderiza os PDFs de laudo pendentes na fila."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=200, help="Máximo de jobs por rodada.")
+        parser.add_argument('--travados-minutos', type=int, default=15,
+                            help="Jobs 'renderizando' há mais que isso voltam para a fila.")
+        parser.add_argument('--intervalo', type=float, default=0,
+                            help="Se > 0, repete a cada N segundos (modo worker).")
+
+    def handle(self, *args, **opts):
+        while True:
+            retomados = retomar_travados(opts['travados_minutos'])
+            if retomados:
+                self.stdout.write(f"{retomados} jobs travados devolvidos à fila.")
+
+            ids = list(
+                RenderizacaoPDF.objects.filter(status=RenderizacaoPDF.PENDENTE)
+                .order_by('id').values_list('id', flat=True)[:opts['limite']]
+            )
+            prontos, falhas = 0, 0
+            for job_id in ids:
+                status = executar_renderizacao(job_id)
+                if status == RenderizacaoPDF.PRONTO:
+                    prontos += 1
+                elif status == RenderizacaoPDF.FALHOU:
+                    falhas += 1
+
+            if ids or not opts['intervalo']:
+                self.stdout.write(self.style.SUCCESS(f"{prontos} PDFs prontos, {falhas} com falha."))
+            if not opts['intervalo']:
+                break
+            time.sleep(opts['intervalo'])
@@ -0,0 +1,41 @@
+"""
+Spooler de impressão: junta os laudos na fila de cada local em um único
+PDF e grava em SPOOL_IMPRESSAO_DIR/<local>/.
+
+Uso típico (cron a cada poucos minutos, ou como worker):
+    python manage.py processar_spool_impressao
+    python manage.py processar_spool_impressao --intervalo 60
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from weka_adapter.services.spooler import processar_spool
+
+
+class Command(BaseCommand):
+    help = "Gera os lotes de impressão (um PDF por local) a partir da fila."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--diretorio', help="Diretório de spool (padrão: SPOOL_IMPRESSAO_DIR).")
+        parser.add_argument('--lote', type=int, help="Máximo de laudos por arquivo (padrão: SPOOL_IMPRESSAO_LOTE).")
+        parser.add_argument('--intervalo', type=float, default=0,
+                            help="Se > 0, repete a cada N segundos (modo worker).")
+
+    def handle(self, *args, **opts):
+        while True:
+            inicio = time.perf_counter()
+            resultados = processar_spool(opts['diretorio'], opts['lote'])
+            duracao = time.perf_counter() - inicio
+
+            for r in resultados:
+                destino = r['arquivo'] or "(nenhum arquivo)"
+                self.stdout.write(f"{r['local']}: {r['impressos']} laudos -> {destino} ({r['falhas']} falhas)")
+            if resultados or not opts['intervalo']:
+                total = sum(r['impressos'] for r in resultados)
+                self.stdout.write(self.style.SUCCESS(f"{total} laudos impressos em {duracao:.1f}s."))
+
+            if not opts['intervalo']:
+                break
+            time.sleep(opts['intervalo'])
@@ -0,0 +1,98 @@
+"""
+Reclassifica todas as AnaliseImagem históricas com uma versão do modelo,
+gravando os resultados em ReclassificacaoAnalise (tabela lateral).
+
+Exemplos:
+    python manage.py reclassificar_historico
+    python manage.py reclassificar_historico --versao SAD-NB-inc-v3 --workers 8 --pausa 0.05
+
+Execuções interrompidas podem ser repetidas (mesmo com outro
+--tamanho-particao): as faixas de ids já concluídas para a versão são
+puladas e só o que falta é reparticionado.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+
+from nucleo.models import AnaliseImagem, VersaoModelo, ParticaoReclassificacao
+from weka_adapter import backfill
+from weka_adapter.utils.processos import inicializar_worker
+
+
+class Command(BaseCommand):
+    help = "Reclassifica o histórico de análises em paralelo, com retomada por partição."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--versao', help="Versão do modelo (padrão: versão ativa).")
+        parser.add_argument('--tamanho-particao', type=int, default=1000, help="Ids por partição.")
+        parser.add_argument('--lote', type=int, default=100, help="Análises por lote de classificação/insert.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Processos paralelos (1 = executa no próprio processo).")
+        parser.add_argument('--pausa', type=float, default=0.0,
+                            help="Segundos de pausa após cada lote (throttling).")
+        parser.add_argument('--reiniciar', action='store_true',
+                            help="Ignora partições já concluídas e processa tudo de novo.")
+
+    def handle(self, *args, **opts):
+        if opts['versao']:
+            versao = VersaoModelo.objects.filter(versao=opts['versao']).first()
+        else:
+            versao = VersaoModelo.objects.filter(ativo=True).first()
+        if versao is None:
+            raise CommandError("Nenhuma versão de modelo encontrada (rode atualizar_modelo_incremental).")
+
+        limites = AnaliseImagem.objects.aggregate(minimo=Min('id'), maximo=Max('id'))
+        if limites['minimo'] is None:
+            self.stdout.write("Nenhuma análise para reclassificar.")
+            return
+
+        if opts['reiniciar']:
+            ParticaoReclassificacao.objects.filter(modelo_versao=versao.versao).delete()
+        concluidas = list(
+            ParticaoReclassificacao.objects.filter(modelo_versao=versao.versao).values_list('id_inicio', 'id_fim')
+        )
+        # Compara faixas, não só o início: o tamanho da partição pode ter mudado entre execuções
+        pendentes = backfill.particoes_pendentes(
+            limites['minimo'], limites['maximo'], opts['tamanho_particao'], concluidas
+        )
+
+        self.stdout.write(
+            f"Versão {versao.versao}: {len(concluidas)} partições já concluídas, {len(pendentes)} pendentes."
+        )
+        if not pendentes:
+            return
+
+        inicio = time.monotonic()
+        total = sem_imagem = 0
+        argumentos = [(versao.id, a, b, opts['lote'], opts['pausa']) for a, b in pendentes]
+
+        if opts['workers'] <= 1:
+            resultados = (backfill.processar_particao(*arg) for arg in argumentos)
+        else:
+            # Cada processo abre a própria conexão com o banco
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=opts['workers'], initializer=inicializar_worker)
+            futuros = [executor.submit(backfill.processar_particao, *arg) for arg in argumentos]
+            resultados = (f.result() for f in as_completed(futuros))
+
+        try:
+            for feitas, (id_inicio, processadas, faltando) in enumerate(resultados, start=1):
+                total += processadas
+                sem_imagem += faltando
+                decorrido = time.monotonic() - inicio
+                self.stdout.write(
+                    f"[{feitas}/{len(pendentes)}] partição {id_inicio}: {processadas} análises "
+                    f"| total {total} | {total / decorrido if decorrido else 0:.1f} análises/s"
+                )
+        finally:
+            if opts['workers'] > 1:
+                executor.shutdown(cancel_futures=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfill concluído: {total} análises reclassificadas, {sem_imagem} sem imagem legível."
+        ))
@@ -0,0 +1,102 @@
+"""
+Recomprime os PDFs de laudo já gravados no formato compacto (streams
+binários, Flate nível 9, imagens cinza em DeviceGray). O conteúdo visual
+não muda; arquivos que não ficariam menores são mantidos como estão.
+
+Os bytes mudam, então o PDF de um laudo nunca é sobrescrito: a versão
+compacta é gravada com outro nome e o laudo passa a apontar para ela (com
+novo pdf_gerado_em) num único UPDATE. A ETag do PDF inclui pdf_gerado_em:
+um download retomado com If-Range da versão antiga recebe o arquivo
+inteiro, e não trechos dos dois arquivos emendados.
+
+Exemplos:
+    python manage.py recomprimir_pdfs --simular
+    python manage.py recomprimir_pdfs
+    python manage.py recomprimir_pdfs --saida /tmp/laudos_compactos
+"""
+
+import os
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from nucleo.models import Laudo
+from weka_adapter.utils.pdf_compacto import PdfNaoSuportado, recomprimir_pdf
+
+
+class Command(BaseCommand):
+    help = "Reescreve os PDFs de laudo existentes no formato compacto e informa a economia."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--diretorio', help="Diretório dos PDFs (padrão: MEDIA_ROOT/laudos).")
+        parser.add_argument('--saida', help="Grava as versões compactas neste diretório em vez de substituir.")
+        parser.add_argument('--simular', action='store_true', help="Só calcula a economia, sem gravar.")
+
+    def handle(self, *args, **opts):
+        origem = Path(opts['diretorio'] or Path(settings.MEDIA_ROOT) / 'laudos')
+        if not origem.is_dir():
+            raise CommandError(f"Diretório não encontrado: {origem}")
+        saida = Path(opts['saida']) if opts['saida'] else None
+        if saida:
+            saida.mkdir(parents=True, exist_ok=True)
+
+        antes = depois = arquivos = ignorados = 0
+        for caminho in sorted(origem.glob('*.pdf')):
+            dados = caminho.read_bytes()
+            try:
+                compacto = recomprimir_pdf(dados)
+            except (PdfNaoSuportado, ValueError, zlib.error) as e:
+                ignorados += 1
+                self.stderr.write(f"{caminho.name}: ignorado ({e})")
+                continue
+            if len(compacto) >= len(dados):
+                compacto = dados
+
+            arquivos += 1
+            antes += len(dados)
+            depois += len(compacto)
+            if opts['verbosity'] > 1:
+                self.stdout.write(f"{caminho.name}: {len(dados)} -> {len(compacto)} bytes")
+
+            if opts['simular'] or (compacto is dados and not saida):
+                continue
+            if not saida and self._trocar_pdf_do_laudo(caminho, compacto):
+                continue
+            destino = saida / caminho.name if saida else caminho
+            temporario = destino.with_name(destino.name + '.parcial')
+            with open(temporario, 'wb') as f:
+                f.write(compacto)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, destino)
+
+        economia = (1 - depois / antes) * 100 if antes else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{arquivos} PDFs: {antes} -> {depois} bytes ({economia:.1f}% menor), {ignorados} ignorados."
+        ))
+
+    def _trocar_pdf_do_laudo(self, caminho, compacto):
+        """
+        Se `caminho` é o PDF de algum laudo, grava a versão compacta com outro
+        nome e troca o laudo para ela. Retorna False para arquivos sem laudo.
+        """
+        try:
+            nome = caminho.resolve().relative_to(Path(settings.MEDIA_ROOT).resolve()).as_posix()
+        except ValueError:
+            return False
+        laudo_id = Laudo.objects.filter(caminho_pdf=nome).values_list('id', flat=True).first()
+        if laudo_id is None:
+            return False
+
+        novo = default_storage.save(nome, ContentFile(compacto))
+        # Condicional: se o PDF foi regenerado no meio tempo, a versão nova vale mais
+        trocado = Laudo.objects.filter(id=laudo_id, caminho_pdf=nome).update(
+            caminho_pdf=novo, pdf_gerado_em=timezone.now()
+        )
+        default_storage.delete(nome if trocado else novo)
+        return True
@@ -0,0 +1,40 @@
+"""
+Recalcula a tabela AgregadoDiarioLaudos a partir das análises e laudos.
+
+Os agregados são mantidos pelos signals a cada save/delete; use este
+comando na carga inicial, depois de alterações em massa (queryset.update,
+bulk_create) ou para conferir/corrigir divergências.
+
+Exemplos:
+    python manage.py reconstruir_agregados_laudos
+    python manage.py reconstruir_agregados_laudos --inicio 2025-01-01 --fim 2025-01-31
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from nucleo.agregados import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Reconstrói os agregados diários de análises/laudos (dia x instituição x resultado)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', help="Primeiro dia (AAAA-MM-DD). Padrão: desde o início.")
+        parser.add_argument('--fim', help="Último dia (AAAA-MM-DD). Padrão: até hoje.")
+
+    def handle(self, *args, **opts):
+        datas = {}
+        for nome in ('inicio', 'fim'):
+            valor = opts[nome]
+            datas[nome] = parse_date(valor) if valor else None
+            if valor and datas[nome] is None:
+                raise CommandError(f"--{nome} deve estar no formato AAAA-MM-DD.")
+
+        inicio = time.perf_counter()
+        linhas = reconstruir(datas['inicio'], datas['fim'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{linhas} linhas de agregado gravadas em {time.perf_counter() - inicio:.1f}s."
+        ))
@@ -0,0 +1,57 @@
+"""
+Recria o índice de busca por nome (TokenNomePaciente) de todos os pacientes.
+
+Necessário quando AES_KEY muda (os tokens são HMAC com chave derivada dela)
+ou quando a regra de normalização em nucleo/busca_nome.py é alterada.
+Pacientes que não puderem ser decifrados são contados e ignorados.
+
+Exemplo:
+    python manage.py reindexar_nomes_pacientes
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models.functions import Cast
+
+from nucleo.busca_nome import tokens_nome
+from nucleo.models import Paciente, TokenNomePaciente
+from nucleo.seguranca.crypto_utils import decrypt_value
+
+
+class Command(BaseCommand):
+    help = "Recria os tokens de busca por nome de todos os pacientes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help="Tokens por INSERT (padrão 1000).")
+
+    def handle(self, *args, **opts):
+        inicio = time.perf_counter()
+        indexados = falhas = 0
+        # Cast: lê o texto cifrado sem o conversor do campo, para pular (e não
+        # abortar por) linhas que não decifram com a chave atual
+        linhas = Paciente.objects.annotate(
+            bruto=Cast('nome_completo', models.TextField())
+        ).values_list('id', 'bruto')
+
+        with transaction.atomic():
+            TokenNomePaciente.objects.all().delete()
+            tokens = []
+            for paciente_id, bruto in linhas.iterator():
+                try:
+                    nome = decrypt_value(bruto)
+                except ValueError:
+                    falhas += 1
+                    continue
+                tokens += [TokenNomePaciente(paciente_id=paciente_id, token=t) for t in tokens_nome(nome)]
+                indexados += 1
+                if len(tokens) >= opts['lote']:
+                    TokenNomePaciente.objects.bulk_create(tokens)
+                    tokens = []
+            TokenNomePaciente.objects.bulk_create(tokens)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{indexados} paciente(s) indexado(s) em {time.perf_counter() - inicio:.2f}s"
+            + (f"; {falhas} não puderam ser decifrados." if falhas else ".")
+        ))
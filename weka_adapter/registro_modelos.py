@@ -0,0 +1,194 @@
+"""
+Registro de versões do modelo (nucleo.VersaoModelo) e atualização incremental.
+
+Fluxo do job de atualização:
+1. Carrega a versão ativa (ou um modelo vazio, na primeira execução)
+2. Busca os laudos revisados pelo médico (Laudo.revisado_em) cuja revisão
+   ainda não foi incorporada (Laudo.revisao_incorporada_em)
+3. Usa a classe confirmada (concordância) ou a corrigida pelo médico
+4. Soma as estatísticas desses exemplos ao modelo; se o laudo já tinha sido
+   aprendido com outra classe (rotulo_incorporado), subtrai a antiga antes
+5. Publica uma nova versão ativa e marca, na mesma transação, o que cada
+   laudo ensinou ao modelo
+
+Laudos sem revisão explícita nunca entram: confirmou_concordancia vale True
+por padrão e o próprio fluxo de emissão grava True, então tratá-lo como
+opinião do médico treinaria o modelo com as próprias predições.
+"""
+
+import logging
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Q
+
+from nucleo.models import Laudo, VersaoModelo
+
+from .aprendizado import NaiveBayesIncremental
+from .avaliacao import CLASSES
+from .caracteristicas import caracteristicas_da_imagem
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (segundos) entre verificações de troca da versão ativa
+TTL_MODELO_ATIVO = 30
+
+_cache_ativo = {"id": None, "modelo": None, "versao": None, "verificado_em": 0.0}
+
+
+def modelo_ativo():
+    """
+    Devolve (modelo, versao_obj) da versão ativa, ou (None, None).
+    O modelo desserializado fica em memória e só é recarregado quando a
+    versão ativa muda.
+    """
+    agora = time.monotonic()
+    if agora - _cache_ativo["verificado_em"] < TTL_MODELO_ATIVO:
+        return _cache_ativo["modelo"], _cache_ativo["versao"]
+
+    versao = VersaoModelo.objects.filter(ativo=True).only('id', 'versao', 'checksum').first()
+    if versao is None:
+        _cache_ativo.update(id=None, modelo=None, versao=None)
+    elif versao.id != _cache_ativo["id"]:
+        completa = VersaoModelo.objects.get(id=versao.id)
+        _cache_ativo.update(
+            id=completa.id,
+            modelo=NaiveBayesIncremental.de_dict(completa.parametros, nome_modelo=completa.versao),
+            versao=completa,
+        )
+    _cache_ativo["verificado_em"] = agora
+    return _cache_ativo["modelo"], _cache_ativo["versao"]
+
+
+def invalidar_cache_modelo():
+    _cache_ativo.update(id=None, modelo=None, versao=None, verificado_em=0.0)
+
+
+class ConflitoVersaoModelo(Exception):
+    """Outra execução publicou uma versão enquanto esta calculava."""
+
+
+def rotulo_do_laudo(laudo):
+    """Classe de treino de um laudo, ou None se ele não servir como exemplo."""
+    if laudo.revisado_em is None:
+        return None
+    if laudo.confirmou_concordancia:
+        rotulo = laudo.analise.resultado_classificacao
+    else:
+        rotulo = laudo.classificacao_corrigida
+    return rotulo if rotulo in CLASSES else None
+
+
+def laudos_pendentes(recomecar=False):
+    """Laudos com revisão do médico ainda não refletida no modelo (todos, ao recomeçar)."""
+    qs = Laudo.objects.filter(revisado_em__isnull=False)
+    if not recomecar:
+        qs = qs.filter(Q(revisao_incorporada_em__isnull=True) | Q(revisado_em__gt=F('revisao_incorporada_em')))
+    return qs.select_related('analise__imagem').order_by('id')
+
+
+def _publicar(modelo, anterior, marcacoes, ultimo_id, recomecar):
+    """
+    Troca a versão ativa e grava as marcações dos laudos, tudo ou nada.
+    A troca é condicional: se a ativa não é mais `anterior`, nada é gravado.
+    """
+    numero = (VersaoModelo.objects.aggregate(maior=Max('id'))['maior'] or 0) + 1
+    for _tentativa in range(5):
+        nome = f"SAD-NB-inc-v{numero}"
+        modelo.nome_modelo = nome
+        try:
+            with transaction.atomic():
+                ativas = VersaoModelo.objects.filter(ativo=True)
+                if anterior is None:
+                    if ativas.exists():
+                        raise ConflitoVersaoModelo()
+                elif not ativas.filter(id=anterior.id).update(ativo=False):
+                    raise ConflitoVersaoModelo()
+                nova = VersaoModelo.objects.create(
+                    versao=nome,
+                    checksum=modelo.checksum(),
+                    parametros=modelo.para_dict(),
+                    versao_anterior=anterior,
+                    instancias_treino=modelo.total_exemplos,
+                    ultimo_laudo_id=ultimo_id,
+                    ativo=True,
+                )
+                if recomecar:
+                    # Modelo novo: o que as versões antigas aprenderam não vale mais
+                    Laudo.objects.filter(revisao_incorporada_em__isnull=False).update(
+                        rotulo_incorporado=None, revisao_incorporada_em=None
+                    )
+                for laudo_id, (rotulo, revisado_em) in marcacoes.items():
+                    Laudo.objects.filter(id=laudo_id).update(
+                        rotulo_incorporado=rotulo, revisao_incorporada_em=revisado_em
+                    )
+                return nova
+        except IntegrityError:
+            # Nome já usado (versão criada à mão ou removida e recriada): tenta o próximo
+            numero += 1
+    raise IntegrityError("Não foi possível escolher um nome livre para a nova versão do modelo.")
+
+
+def atualizar_modelo_incremental(limite=None, recomecar=False):
+    """
+    Incorpora as revisões novas ao modelo ativo e publica uma nova versão.
+    Com `recomecar`, parte de um modelo vazio e reaprende todos os laudos revisados.
+    Retorna um dicionário com o resumo da execução.
+    """
+    if recomecar and limite:
+        raise ValueError("Recomeçar reaprende todos os laudos revisados: não use limite.")
+    anterior = VersaoModelo.objects.filter(ativo=True).first()
+    if anterior and not recomecar:
+        modelo = NaiveBayesIncremental.de_dict(anterior.parametros)
+    else:
+        modelo = NaiveBayesIncremental()
+
+    qs = laudos_pendentes(recomecar)
+    if limite:
+        qs = qs[:limite]
+
+    # laudo_id -> (classe que o modelo passa a conter, revisão incorporada)
+    marcacoes = {}
+    incorporados, removidos, ignorados = 0, 0, 0
+    ultimo_id = anterior.ultimo_laudo_id if anterior and not recomecar else 0
+    for laudo in qs.iterator(chunk_size=200):
+        rotulo = rotulo_do_laudo(laudo)
+        antigo = None if recomecar else laudo.rotulo_incorporado
+        if rotulo == antigo:
+            marcacoes[laudo.id] = (antigo, laudo.revisado_em)
+            continue
+
+        dados = caracteristicas_da_imagem(laudo.analise.imagem, laudo.analise.hash_imagem)
+        if not dados:
+            # Sem imagem legível: fica pendente para a próxima execução
+            ignorados += 1
+            continue
+        if antigo:
+            modelo.remover(dados, antigo)
+            removidos += 1
+        if rotulo:
+            modelo.atualizar(dados, rotulo)
+            incorporados += 1
+            ultimo_id = max(ultimo_id, laudo.id)
+        marcacoes[laudo.id] = (rotulo, laudo.revisado_em)
+
+    resumo = {
+        "versao_anterior": anterior.versao if anterior else None,
+        "incorporados": incorporados,
+        "removidos": removidos,
+        "ignorados": ignorados,
+        "ultimo_laudo_id": ultimo_id,
+        "nova_versao": None,
+    }
+    if not (incorporados or removidos or recomecar):
+        # Nada muda no modelo: só registra as revisões que confirmaram o que ele já sabia
+        for laudo_id, (rotulo, revisado_em) in marcacoes.items():
+            Laudo.objects.filter(id=laudo_id).update(rotulo_incorporado=rotulo, revisao_incorporada_em=revisado_em)
+        return resumo
+
+    nova = _publicar(modelo, anterior, marcacoes, ultimo_id, recomecar)
+    invalidar_cache_modelo()
+
+    logger.info("Nova versão de modelo publicada: %s (+%d/-%d exemplos)", nova.versao, incorporados, removidos)
+    resumo["nova_versao"] = nova.versao
+    return resumo
@@ -0,0 +1,167 @@
+"""
+Proteções em torno das chamadas ao classificador.
+
+- Prazo por chamada: a classificação roda em um pool de threads e o
+  chamador espera no máximo WEKA_PRAZO_CLASSIFICACAO segundos.
+- Circuit breaker: após falhas/lentidões consecutivas o circuito abre e
+  as chamadas seguintes falham imediatamente (sem esperar o prazo) até
+  o tempo de reabertura, quando uma chamada de teste é permitida.
+
+Estado e número de aberturas ficam visíveis em /weka/status/ e /weka/metrics/.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturoTimeout
+
+from django.conf import settings
+
+from nucleo.metricas import registro
+
+FECHADO = 'FECHADO'
+MEIO_ABERTO = 'MEIO_ABERTO'
+ABERTO = 'ABERTO'
+
+_CODIGO_ESTADO = {FECHADO: 0, MEIO_ABERTO: 1, ABERTO: 2}
+
+registro.medidor(
+    'sad_circuit_breaker_estado',
+    'Estado do circuit breaker (0=fechado, 1=meio-aberto, 2=aberto).',
+)
+registro.contador(
+    'sad_circuit_breaker_aberturas_total',
+    'Quantas vezes o circuit breaker abriu.',
+)
+registro.contador(
+    'sad_classificacao_fallback_total',
+    'Análises deixadas como AGUARDANDO por indisponibilidade do classificador, por motivo.',
+)
+
+
+class ClassificadorIndisponivel(Exception):
+    """A classificação não pôde ser feita dentro do orçamento de latência."""
+
+    def __init__(self, motivo, mensagem=""):
+        self.motivo = motivo
+        super().__init__(mensagem or motivo)
+
+
+class CircuitBreaker:
+    """Circuit breaker simples, seguro para threads (estado por processo)."""
+
+    def __init__(self, nome, limite_falhas=5, tempo_reabertura=30.0, limiar_lentidao=None):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.tempo_reabertura = tempo_reabertura
+        self.limiar_lentidao = limiar_lentidao
+        self.estado = FECHADO
+        self.falhas_consecutivas = 0
+        self.aberturas = 0
+        self.aberto_em = None
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+        self._publicar()
+
+    def permitir(self):
+        """True se a chamada pode prosseguir."""
+        with self._lock:
+            if self.estado == ABERTO:
+                if time.monotonic() - self.aberto_em < self.tempo_reabertura:
+                    return False
+                self.estado = MEIO_ABERTO
+                self._teste_em_andamento = False
+                self._publicar()
+            if self.estado == MEIO_ABERTO:
+                # Só uma chamada de teste por vez enquanto meio-aberto
+                if self._teste_em_andamento:
+                    return False
+                self._teste_em_andamento = True
+            return True
+
+    def registrar_sucesso(self, duracao=0.0):
+        if self.limiar_lentidao is not None and duracao > self.limiar_lentidao:
+            # Chamada lenta conta como falha para o breaker
+            self.registrar_falha()
+            return
+        with self._lock:
+            self.falhas_consecutivas = 0
+            self._teste_em_andamento = False
+            if self.estado != FECHADO:
+                self.estado = FECHADO
+                self._publicar()
+
+    def registrar_falha(self):
+        with self._lock:
+            self.falhas_consecutivas += 1
+            self._teste_em_andamento = False
+            if self.estado == MEIO_ABERTO or self.falhas_consecutivas >= self.limite_falhas:
+                if self.estado != ABERTO:
+                    self.aberturas += 1
+                    registro.incrementar('sad_circuit_breaker_aberturas_total', breaker=self.nome)
+                self.estado = ABERTO
+                self.aberto_em = time.monotonic()
+                self._publicar()
+
+    def resetar(self):
+        with self._lock:
+            self.estado = FECHADO
+            self.falhas_consecutivas = 0
+            self._teste_em_andamento = False
+            self._publicar()
+
+    def resumo(self):
+        return {
+            "estado": self.estado,
+            "falhas_consecutivas": self.falhas_consecutivas,
+            "aberturas": self.aberturas,
+        }
+
+    def _publicar(self):
+        registro.definir('sad_circuit_breaker_estado', _CODIGO_ESTADO[self.estado], breaker=self.nome)
+
+
+breaker_classificador = CircuitBreaker(
+    'classificador',
+    limite_falhas=getattr(settings, 'WEKA_BREAKER_FALHAS', 5),
+    tempo_reabertura=getattr(settings, 'WEKA_BREAKER_REABERTURA', 30.0),
+    limiar_lentidao=getattr(settings, 'WEKA_LIMIAR_LENTIDAO', None),
+)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'WEKA_CLASSIFICACAO_WORKERS', 4),
+    thread_name_prefix='classificador',
+)
+
+
+def executar_com_prazo(funcao, *args, prazo=None, breaker=breaker_classificador):
+    """
+    Executa `funcao(*args)` respeitando o prazo e o circuit breaker.
+    Levanta ClassificadorIndisponivel ('circuito_aberto', 'timeout' ou 'erro').
+
+    Observação: em caso de timeout a thread não é interrompida (Python não
+    permite), mas o chamador é liberado; se o travamento persistir, o
+    breaker abre e novas chamadas deixam de ocupar o pool.
+    """
+    if prazo is None:
+        prazo = getattr(settings, 'WEKA_PRAZO_CLASSIFICACAO', 2.0)
+
+    if not breaker.permitir():
+        registro.incrementar('sad_classificacao_fallback_total', motivo='circuito_aberto')
+        raise ClassificadorIndisponivel('circuito_aberto')
+
+    inicio = time.monotonic()
+    futuro = _executor.submit(funcao, *args)
+    try:
+        resultado = futuro.result(timeout=prazo)
+    except FuturoTimeout:
+        futuro.cancel()
+        breaker.registrar_falha()
+        registro.incrementar('sad_classificacao_fallback_total', motivo='timeout')
+        raise ClassificadorIndisponivel('timeout', f"classificação excedeu {prazo}s")
+    except Exception as e:
+        breaker.registrar_falha()
+        registro.incrementar('sad_classificacao_fallback_total', motivo='erro')
+        raise ClassificadorIndisponivel('erro', str(e)) from e
+
+    breaker.registrar_sucesso(time.monotonic() - inicio)
+    return resultado
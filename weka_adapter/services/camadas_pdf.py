@@ -0,0 +1,139 @@
+"""
+Camadas estáticas das páginas de laudo, preparadas uma vez por instituição.
+
+O cabeçalho, a marca d'água e o logotipo não mudam de um laudo para outro
+da mesma instituição. Por isso:
+- O logotipo é lido, decodificado, convertido para RGB e reduzido para a
+  resolução de impressão UMA vez por instituição (cache em memória).
+- Em cada documento, cabeçalho + marca d'água + logo viram um único Form
+  XObject, desenhado na primeira página e apenas referenciado nas demais.
+
+No modo compacto (PDF_MODO_COMPACTO) o logotipo é embutido na forma mais
+enxuta sem perda: um JPEG que já cabe na resolução de impressão vai como
+está (DCTDecode), e um logo só com tons de cinza vai em DeviceGray.
+
+O cache é invalidado quando o nome da instituição, o arquivo do logo ou a
+data de modificação do arquivo mudam.
+"""
+
+import hashlib
+import logging
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageChops
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+
+logger = logging.getLogger(__name__)
+
+# Posição/tamanho do logo na página (mesmos valores do layout original)
+LOGO_X = 15 * cm
+LOGO_Y = 22.5 * cm
+LOGO_LARGURA = 4 * cm
+
+# Resolução usada ao reduzir o logo (4cm a 300 DPI ~ 472 px)
+LOGO_DPI = 300
+
+
+class CamadasInstituicao:
+    """Recursos já preparados para desenhar o fundo das páginas de uma instituição."""
+
+    def __init__(self, instituicao, assinatura, compacto=False):
+        self.instituicao_id = instituicao.id
+        self.compacto = compacto
+        self.nome = instituicao.nome_instituicao
+        self.assinatura = assinatura
+        self.nome_form = "camada_%s" % hashlib.md5(repr(assinatura).encode()).hexdigest()[:12]
+        self.logo = None
+        self.logo_altura = None
+        if instituicao.logo:
+            self._preparar_logo(instituicao.logo)
+
+    def _preparar_logo(self, campo_logo):
+        try:
+            with campo_logo.open('rb') as f:
+                img_bytes = f.read()
+            if not img_bytes:
+                return
+            img_pil = Image.open(BytesIO(img_bytes))
+            # Altura original em pontos: preserva a mesma caixa de ajuste do layout anterior
+            self.logo_altura = img_pil.height
+            largura_px = int(LOGO_LARGURA / 72 * LOGO_DPI)
+            if (self.compacto and img_pil.format == "JPEG" and img_pil.mode in ("RGB", "L")
+                    and img_pil.width <= largura_px):
+                # O ReportLab copia os bytes do JPEG direto para o PDF
+                self.logo = ImageReader(BytesIO(img_bytes))
+                return
+            if img_pil.mode in ("RGBA", "P"):
+                img_pil = img_pil.convert("RGB")
+            if img_pil.width > largura_px:
+                img_pil.thumbnail((largura_px, img_pil.height), Image.LANCZOS)
+            else:
+                img_pil.load()
+            if self.compacto and img_pil.mode == "RGB" and _somente_cinza(img_pil):
+                img_pil = img_pil.convert("L")
+            self.logo = ImageReader(img_pil)
+        except Exception as e:
+            logger.warning("Falha ao preparar o logotipo da instituição %s: %s", self.instituicao_id, e)
+            self.logo = None
+
+    def desenhar(self, canvas_obj, desenhar_fundo):
+        """
+        Desenha as camadas estáticas na página atual.
+        `desenhar_fundo(canvas, nome_instituicao)` desenha cabeçalho e marca d'água.
+        """
+        if not canvas_obj.hasForm(self.nome_form):
+            canvas_obj.beginForm(self.nome_form)
+            desenhar_fundo(canvas_obj, self.nome)
+            if self.logo is not None:
+                canvas_obj.drawImage(
+                    self.logo, LOGO_X, LOGO_Y,
+                    width=LOGO_LARGURA, height=self.logo_altura,
+                    preserveAspectRatio=True, mask='auto',
+                )
+            canvas_obj.endForm()
+        canvas_obj.doForm(self.nome_form)
+
+
+def _somente_cinza(img_rgb):
+    r, g, b = img_rgb.split()
+    return not ImageChops.difference(r, g).getbbox() and not ImageChops.difference(g, b).getbbox()
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _assinatura(instituicao):
+    modificado = None
+    if instituicao.logo:
+        try:
+            modificado = instituicao.logo.storage.get_modified_time(instituicao.logo.name).timestamp()
+        except Exception:
+            modificado = None
+    return (instituicao.id, instituicao.nome_instituicao, instituicao.logo.name or "", modificado)
+
+
+def camadas_da_instituicao(instituicao, compacto=False):
+    """Devolve as camadas preparadas da instituição (do cache, quando válido)."""
+    assinatura = _assinatura(instituicao)
+    if not getattr(settings, 'PDF_CACHE_CAMADAS', True):
+        return CamadasInstituicao(instituicao, assinatura, compacto)
+
+    chave = (instituicao.id, compacto)
+    with _lock:
+        camadas = _cache.get(chave)
+    if camadas is not None and camadas.assinatura == assinatura:
+        return camadas
+
+    camadas = CamadasInstituicao(instituicao, assinatura, compacto)
+    with _lock:
+        _cache[chave] = camadas
+    return camadas
+
+
+def limpar_cache():
+    with _lock:
+        _cache.clear()
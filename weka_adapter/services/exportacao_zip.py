@@ -0,0 +1,154 @@
+"""
+Exportação em lote dos PDFs de laudo (auditoria) como um ZIP em streaming.
+
+- Os laudos do período/instituição são percorridos com iterator(), sem
+  carregar o queryset inteiro.
+- Laudos sem PDF (ou com PDF desatualizado) são renderizados em paralelo
+  no pool de renderização, com no máximo `janela` renderizações adiantadas.
+- O ZIP é montado sobre um buffer não posicionável (data descriptors):
+  cada bloco escrito é entregue imediatamente ao chamador, sem o arquivo
+  completo em memória.
+- O manifesto.csv (uma linha por laudo) vai sendo escrito num arquivo
+  temporário e entra por último no ZIP, copiado em blocos.
+"""
+
+import csv
+import io
+import logging
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+
+from nucleo.models import Laudo
+
+from .fila_pdf import pool_renderizacao
+from .report_generator import ReportService
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_BLOCO = 64 * 1024
+
+CABECALHO_MANIFESTO = ["laudo_id", "codigo_verificacao", "data_emissao", "instituicao", "arquivo", "situacao"]
+
+
+class _SaidaZip(io.RawIOBase):
+    """Destino do ZipFile: acumula os bytes escritos até serem consumidos."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def esvaziar(self):
+        partes, self._partes = self._partes, []
+        return partes
+
+
+def selecionar_laudos(inicio, fim, instituicao_id=None):
+    laudos = Laudo.objects.filter(data_hora_emissao__date__range=[inicio, fim])
+    if instituicao_id:
+        laudos = laudos.filter(analise__imagem__instituicao_id=instituicao_id)
+    return laudos.select_related(
+        'analise__imagem__paciente', 'analise__imagem__instituicao', 'usuario_responsavel__usuario'
+    ).order_by('id')
+
+
+def renderizar_laudo(laudo_id):
+    """Gera (se ausente ou desatualizado) o PDF do laudo e devolve o nome do arquivo. Roda no worker."""
+    laudo = Laudo.objects.select_related(
+        'analise__imagem__paciente', 'analise__imagem__instituicao', 'usuario_responsavel__usuario'
+    ).get(id=laudo_id)
+    if not ReportService.pdf_atualizado(laudo):
+        ReportService.gerar_pdf_para_laudo_existente(laudo)
+    return laudo.caminho_pdf.name
+
+
+def _resolver(laudo, pendente):
+    """Converte o item da janela em (laudo, nome_pdf, erro)."""
+    try:
+        if isinstance(pendente, Future):
+            pendente = pendente.result()
+        return laudo, pendente or laudo.caminho_pdf.name, None
+    except Exception as e:
+        logger.error("Falha ao renderizar o laudo %s para exportação: %s", laudo.id, e)
+        return laudo, None, str(e)
+
+
+def laudos_com_pdf(laudos, janela=8):
+    """Itera (laudo, nome_pdf, erro), renderizando em paralelo os PDFs que faltam."""
+    sincrono = getattr(settings, 'PDF_RENDERIZACAO_SINCRONA', False)
+    fila = deque()
+    for laudo in laudos.iterator(chunk_size=500):
+        if ReportService.pdf_atualizado(laudo):
+            pendente = None
+        elif sincrono:
+            try:
+                pendente = renderizar_laudo(laudo.id)
+            except Exception as e:
+                pendente = Future()
+                pendente.set_exception(e)
+        else:
+            pendente = pool_renderizacao().submit(renderizar_laudo, laudo.id)
+        fila.append((laudo, pendente))
+        while len(fila) > janela:
+            yield _resolver(*fila.popleft())
+    while fila:
+        yield _resolver(*fila.popleft())
+
+
+def _nome_no_zip(laudo):
+    inst = laudo.analise.imagem.instituicao
+    return f"{inst.id}_{slugify(inst.nome_instituicao) or 'instituicao'}/laudo_{laudo.id}_{laudo.codigo_verificacao}.pdf"
+
+
+def gerar_zip(laudos, janela=8):
+    """
+    Gera o ZIP em blocos de bytes (para StreamingHttpResponse ou arquivo).
+    Inclui um manifesto.csv com a situação de cada laudo.
+    """
+    saida = _SaidaZip()
+    # Em disco, não em memória: o manifesto cresce com o número de laudos do período
+    manifesto = tempfile.TemporaryFile(mode='w+b')
+    texto = io.TextIOWrapper(manifesto, encoding='utf-8', newline='')
+    escritor = csv.writer(texto)
+    escritor.writerow(CABECALHO_MANIFESTO)
+
+    # PDFs já são compactados internamente: ZIP_STORED evita gastar CPU à toa
+    with texto, zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for laudo, nome_pdf, erro in laudos_com_pdf(laudos, janela):
+            emissao = timezone.localtime(laudo.data_hora_emissao)
+            linha = [laudo.id, laudo.codigo_verificacao, emissao.isoformat(),
+                     laudo.analise.imagem.instituicao.nome_instituicao]
+            if erro:
+                escritor.writerow(linha + ["", f"FALHOU: {erro}"])
+                continue
+
+            info = zipfile.ZipInfo(_nome_no_zip(laudo), date_time=emissao.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            with laudo.caminho_pdf.storage.open(nome_pdf, 'rb') as origem, zf.open(info, 'w') as destino:
+                for bloco in iter(lambda: origem.read(TAMANHO_BLOCO), b""):
+                    destino.write(bloco)
+                    yield from saida.esvaziar()
+            yield from saida.esvaziar()
+            escritor.writerow(linha + [info.filename, "OK"])
+
+        texto.flush()
+        manifesto.seek(0)
+        info = zipfile.ZipInfo("manifesto.csv", date_time=timezone.localtime().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with zf.open(info, 'w') as destino:
+            for bloco in iter(lambda: manifesto.read(TAMANHO_BLOCO), b""):
+                destino.write(bloco)
+                yield from saida.esvaziar()
+    # Diretório central (escrito no close)
+    yield from saida.esvaziar()
@@ -0,0 +1,129 @@
+"""
+Fila de renderização de PDFs de laudo.
+
+A renderização (ReportLab) é CPU-bound: em vez de ocupar o worker da
+requisição, cada pedido vira um RenderizacaoPDF e é executado em um pool
+de processos. O admin e a API devolvem o id do job na hora e consultam o
+status (na fila / renderizando / pronto / falhou) depois.
+
+- Pedidos simultâneos para o mesmo laudo caem no mesmo job (restrição
+  única condicional no banco: um job ativo por laudo).
+- Com PDF_RENDERIZACAO_SINCRONA=True (testes/desenvolvimento) o job roda
+  no próprio processo, logo após o commit.
+- Jobs que ficaram para trás (ex.: processo reiniciado) são retomados pelo
+  comando `processar_renderizacoes_pdf`.
+"""
+
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from nucleo.models import RenderizacaoPDF
+
+from ..utils.processos import inicializar_worker
+from .report_generator import ReportService
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def pool_renderizacao():
+    """Pool de processos compartilhado pelas renderizações em segundo plano."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'PDF_RENDERIZACAO_WORKERS', 2),
+                initializer=inicializar_worker,
+            )
+        return _executor
+
+
+def solicitar_renderizacao(laudo, usuario_solicitante=None, ip_cliente="0.0.0.0"):
+    """
+    Enfileira a renderização do PDF do laudo.
+    Retorna (job, criado); criado=False quando já havia um job ativo.
+    """
+    ativo = RenderizacaoPDF.objects.filter(laudo=laudo, status__in=RenderizacaoPDF.ATIVOS).first()
+    if ativo:
+        return ativo, False
+
+    try:
+        with transaction.atomic():
+            job = RenderizacaoPDF.objects.create(
+                laudo=laudo,
+                usuario_solicitante=usuario_solicitante,
+                ip_origem=ip_cliente or "0.0.0.0",
+            )
+    except IntegrityError:
+        # Outro pedido criou o job entre a consulta e o insert
+        ativo = RenderizacaoPDF.objects.filter(laudo=laudo, status__in=RenderizacaoPDF.ATIVOS).first()
+        if ativo is None:
+            raise
+        return ativo, False
+
+    transaction.on_commit(lambda: despachar(job.id))
+    return job, True
+
+
+def despachar(job_id):
+    """Envia o job para o pool (ou executa na hora, no modo síncrono)."""
+    if getattr(settings, 'PDF_RENDERIZACAO_SINCRONA', False):
+        executar_renderizacao(job_id)
+        return
+    try:
+        pool_renderizacao().submit(executar_renderizacao, job_id)
+    except Exception as e:
+        # Pool indisponível: o job continua PENDENTE e será retomado pelo comando
+        logger.error("Falha ao despachar renderização %s: %s", job_id, e)
+
+
+def executar_renderizacao(job_id):
+    """
+    Renderiza o PDF do job (no worker). Retorna o status final, ou None se
+    o job já tiver sido assumido por outro worker.
+    """
+    assumido = RenderizacaoPDF.objects.filter(id=job_id, status=RenderizacaoPDF.PENDENTE).update(
+        status=RenderizacaoPDF.RENDERIZANDO, data_inicio=timezone.now()
+    )
+    if not assumido:
+        return None
+
+    job = RenderizacaoPDF.objects.select_related(
+        'laudo__analise__imagem__paciente',
+        'laudo__analise__imagem__instituicao',
+        'laudo__usuario_responsavel__usuario',
+        'usuario_solicitante',
+    ).get(id=job_id)
+
+    try:
+        ReportService.gerar_pdf_para_laudo_existente(
+            laudo_obj=job.laudo,
+            usuario_solicitante=job.usuario_solicitante,
+            ip_cliente=job.ip_origem,
+        )
+        job.status = RenderizacaoPDF.PRONTO
+        job.erro = ""
+    except Exception as e:
+        logger.exception("Falha ao renderizar o PDF do laudo %s", job.laudo_id)
+        job.status = RenderizacaoPDF.FALHOU
+        job.erro = str(e)[:1000]
+
+    job.data_conclusao = timezone.now()
+    job.save(update_fields=['status', 'erro', 'data_conclusao'])
+    return job.status
+
+
+def retomar_travados(minutos):
+    """Devolve à fila jobs RENDERIZANDO há mais de `minutos` (worker perdido)."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return RenderizacaoPDF.objects.filter(
+        status=RenderizacaoPDF.RENDERIZANDO, data_inicio__lt=limite
+    ).update(status=RenderizacaoPDF.PENDENTE, data_inicio=None)
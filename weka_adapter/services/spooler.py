@@ -0,0 +1,181 @@
+"""
+Spooler de impressão de laudos.
+
+Os pedidos ficam em FilaImpressao, por local (impressora). A cada rodada,
+o spooler junta os pendentes de cada local em UM PDF de várias páginas
+(estilos, documento e camadas das instituições montados uma vez para o
+lote), grava o arquivo no diretório de spool do local e registra uma
+LaudoImpressao por laudo.
+
+O arquivo é escrito com nome temporário e renomeado ao final, então a
+impressora (ou o serviço que observa o diretório) nunca vê um lote pela
+metade.
+
+Cada rodada assume seus pedidos antes de renderizar (PENDENTE ->
+IMPRIMINDO com um id de reserva, por update condicional), então duas
+rodadas sobrepostas nunca imprimem o mesmo pedido.
+"""
+
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from nucleo.models import FilaImpressao, LaudoImpressao
+
+from .report_generator import ReportService
+
+logger = logging.getLogger(__name__)
+
+
+def enfileirar_impressao(laudo, local_impressao, usuario_solicitante, ip_cliente="0.0.0.0"):
+    """
+    Coloca o laudo na fila do local. Retorna (item, criado); criado=False
+    quando o laudo já estava aguardando impressão nesse local.
+    """
+    pendente = FilaImpressao.objects.filter(
+        laudo=laudo, local_impressao=local_impressao, status=FilaImpressao.PENDENTE
+    ).first()
+    if pendente:
+        return pendente, False
+    try:
+        with transaction.atomic():
+            item = FilaImpressao.objects.create(
+                laudo=laudo,
+                local_impressao=local_impressao,
+                usuario_solicitante=usuario_solicitante,
+                ip_origem=ip_cliente or "0.0.0.0",
+            )
+    except IntegrityError:
+        pendente = FilaImpressao.objects.filter(
+            laudo=laudo, local_impressao=local_impressao, status=FilaImpressao.PENDENTE
+        ).first()
+        if pendente is None:
+            raise
+        return pendente, False
+    return item, True
+
+
+def _renderizar_isolando_falhas(itens):
+    """
+    Renderiza o lote; se falhar, testa laudo a laudo para que um único
+    laudo com problema não bloqueie o lote inteiro.
+    Retorna (pdf, itens_impressos, falhas[(item, erro)]).
+    """
+    try:
+        return ReportService.renderizar_lote_pdf([i.laudo for i in itens]), itens, []
+    except Exception:
+        logger.exception("Falha no lote de %s laudos; isolando o(s) laudo(s) com problema", len(itens))
+
+    bons, falhas = [], []
+    for item in itens:
+        try:
+            ReportService.renderizar_lote_pdf([item.laudo])
+            bons.append(item)
+        except Exception as e:
+            falhas.append((item, e))
+    if not bons:
+        return None, [], falhas
+    return ReportService.renderizar_lote_pdf([i.laudo for i in bons]), bons, falhas
+
+
+def _gravar_arquivo(pasta, nome, conteudo):
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, nome)
+    temporario = caminho + ".parcial"
+    with open(temporario, "wb") as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def imprimir_lote(local_impressao, itens, diretorio):
+    """Gera o arquivo do lote e registra as impressões. Retorna (caminho, impressos, falhas)."""
+    pdf, impressos, falhas = _renderizar_isolando_falhas(itens)
+
+    for item, erro in falhas:
+        item.status = FilaImpressao.FALHOU
+        item.erro = str(erro)[:1000]
+        item.save(update_fields=['status', 'erro'])
+
+    if not impressos:
+        return None, 0, len(falhas)
+
+    agora = timezone.now()
+    pasta = os.path.join(str(diretorio), slugify(local_impressao) or "local")
+    nome = f"lote_{timezone.localtime(agora):%Y%m%d_%H%M%S}_{impressos[0].id}.pdf"
+    caminho = _gravar_arquivo(pasta, nome, pdf)
+
+    with transaction.atomic():
+        LaudoImpressao.objects.bulk_create([
+            LaudoImpressao(
+                laudo_id=item.laudo_id,
+                usuario_id=item.usuario_solicitante_id,
+                ip_origem=item.ip_origem,
+                local_impressao=local_impressao,
+            )
+            for item in impressos
+        ])
+        FilaImpressao.objects.filter(id__in=[i.id for i in impressos]).update(
+            status=FilaImpressao.IMPRESSO, data_impressao=agora, arquivo_lote=caminho
+        )
+    return caminho, len(impressos), len(falhas)
+
+
+def processar_spool(diretorio=None, tamanho_lote=None):
+    """
+    Processa todos os locais com pedidos pendentes.
+    Retorna uma lista de dicts {local, arquivo, impressos, falhas} (um por lote).
+    """
+    diretorio = diretorio or settings.SPOOL_IMPRESSAO_DIR
+    tamanho_lote = tamanho_lote or getattr(settings, 'SPOOL_IMPRESSAO_LOTE', 500)
+
+    locais = list(
+        FilaImpressao.objects.filter(status=FilaImpressao.PENDENTE)
+        .order_by().values_list('local_impressao', flat=True).distinct()
+    )
+
+    resultados = []
+    for local in locais:
+        while True:
+            # Ordena por instituição: menos trocas de PageTemplate no lote
+            candidatos = list(
+                FilaImpressao.objects.filter(status=FilaImpressao.PENDENTE, local_impressao=local)
+                .order_by('laudo__analise__imagem__instituicao_id', 'id')
+                .values_list('id', flat=True)[:tamanho_lote]
+            )
+            if not candidatos:
+                break
+            itens = _assumir(candidatos)
+            if itens:
+                arquivo, impressos, falhas = imprimir_lote(local, itens, diretorio)
+                resultados.append({"local": local, "arquivo": arquivo, "impressos": impressos, "falhas": falhas})
+            if len(candidatos) < tamanho_lote:
+                break
+    return resultados
+
+
+def _assumir(ids):
+    """
+    Passa para IMPRIMINDO os pedidos que ainda estão PENDENTE e devolve só
+    os que esta rodada assumiu (os demais já foram pegos por outra).
+    """
+    reserva = uuid.uuid4()
+    FilaImpressao.objects.filter(id__in=ids, status=FilaImpressao.PENDENTE).update(
+        status=FilaImpressao.IMPRIMINDO, reserva=reserva
+    )
+    return list(
+        FilaImpressao.objects.filter(reserva=reserva)
+        .select_related(
+            'laudo__analise__imagem__paciente',
+            'laudo__analise__imagem__instituicao',
+            'laudo__usuario_responsavel__usuario',
+        )
+        .order_by('laudo__analise__imagem__instituicao_id', 'id')
+    )
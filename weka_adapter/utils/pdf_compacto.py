@@ -0,0 +1,171 @@
+"""
+Saída compacta dos PDFs de laudo (armazenamento de longo prazo).
+
+Onde estavam os bytes nos PDFs gerados:
+- Todo stream (conteúdo das páginas, logotipo) era Flate + ASCII85. O
+  ASCII85 só serve para manter o arquivo em texto puro e aumenta os dados
+  binários em 25%.
+- O logotipo era decodificado e regravado como RGB cru + Flate, mesmo
+  quando o original já era um JPEG (bem menor) ou só tinha tons de cinza.
+- As fontes (Helvetica/Helvetica-Bold) são as 14 fontes padrão do PDF: não
+  são embutidas, então não há o que subconjuntar. Se um dia o layout usar
+  TTF, o ReportLab já embute só os glifos usados.
+- O logotipo já é embutido uma vez por documento (Form XObject, ver
+  camadas_pdf), não uma vez por página.
+
+`aplicar_modo_compacto(compacto)` liga os streams binários no ReportLab
+(uma vez, na inicialização: ver weka_adapter.apps), e
+`recomprimir_pdf(dados)` reescreve um PDF já gerado pelo ReportLab sem
+alterar o conteúdo visual (comando `recomprimir_pdfs`).
+"""
+
+import base64
+import re
+import zlib
+
+from reportlab import rl_config
+
+_USA_A85_PADRAO = rl_config.useA85
+
+
+def aplicar_modo_compacto(compacto):
+    """
+    Streams binários (compacto) ou no padrão ASCII85 para todos os builds do
+    processo. O ReportLab lê rl_config.useA85 como configuração global, então
+    isto é feito uma vez na inicialização, e não em volta de cada build.
+    """
+    rl_config.useA85 = 0 if compacto else _USA_A85_PADRAO
+
+
+# =============================================================
+# RECOMPRESSÃO DE PDFs JÁ GERADOS
+# =============================================================
+
+_OBJETO = re.compile(rb'(\d+) (\d+) obj\r?\n')
+_TRAILER = re.compile(rb'trailer\s*(<<.*?>>)\s*startxref', re.S)
+_STREAM = re.compile(rb'stream\r?\n')
+_FILTRO = re.compile(rb'/Filter\s*(\[[^\]]*\]|/\w+)')
+_TAMANHO = re.compile(rb'/Length\s+(\d+)')
+
+
+class PdfNaoSuportado(ValueError):
+    """O arquivo não tem a estrutura simples gerada pelo ReportLab."""
+
+
+def _decodificar_a85(dados):
+    dados = re.sub(rb'\s', b'', dados)
+    if dados.startswith(b'<~'):
+        dados = dados[2:]
+    if not dados.endswith(b'~>'):
+        raise PdfNaoSuportado("Stream ASCII85 sem terminador.")
+    return base64.a85decode(dados[:-2])
+
+
+def _rgb_em_cinza(dados, largura, altura):
+    """Se a imagem RGB crua só tem cinzas (R == G == B), devolve o canal único."""
+    if len(dados) != largura * altura * 3:
+        return None
+    r = dados[0::3]
+    if r == dados[1::3] == dados[2::3]:
+        return r
+    return None
+
+
+def _recomprimir_stream(dicionario, conteudo):
+    """Devolve (dicionario, conteudo) sem ASCII85 e com Flate no nível máximo."""
+    casamento = _FILTRO.search(dicionario)
+    if not casamento:
+        return dicionario, conteudo
+    filtros = re.findall(rb'/(\w+)', casamento.group(1))
+
+    if filtros and filtros[0] in (b'ASCII85Decode', b'A85'):
+        conteudo = _decodificar_a85(conteudo)
+        filtros = filtros[1:]
+
+    if filtros in ([b'FlateDecode'], [b'Fl']):
+        bruto = zlib.decompress(conteudo)
+        if b'/Subtype /Image' in dicionario and b'/DeviceRGB' in dicionario and b'/SMask' not in dicionario:
+            largura = re.search(rb'/Width\s+(\d+)', dicionario)
+            altura = re.search(rb'/Height\s+(\d+)', dicionario)
+            if largura and altura:
+                cinza = _rgb_em_cinza(bruto, int(largura.group(1)), int(altura.group(1)))
+                if cinza is not None:
+                    bruto = cinza
+                    dicionario = dicionario.replace(b'/DeviceRGB', b'/DeviceGray')
+        conteudo = zlib.compress(bruto, 9)
+
+    novo_filtro = b'/Filter [ ' + b' '.join(b'/' + f for f in filtros) + b' ]' if filtros else b''
+    dicionario = dicionario[:casamento.start()] + novo_filtro + dicionario[casamento.end():]
+    dicionario = _TAMANHO.sub(b'/Length %d' % len(conteudo), dicionario, count=1)
+    return dicionario, conteudo
+
+
+def _objetos(dados):
+    """Itera (numero, geracao, corpo) dos objetos de um PDF sem atualizações incrementais."""
+    if dados.count(b'startxref') != 1 or b'/ObjStm' in dados or b'/XRefStm' in dados:
+        raise PdfNaoSuportado("Atualizações incrementais ou streams de objetos não são suportados.")
+
+    posicao = 0
+    while True:
+        casamento = _OBJETO.search(dados, posicao)
+        if not casamento:
+            return
+        inicio = casamento.end()
+        stream = _STREAM.search(dados, inicio)
+        fim_obj = dados.find(b'endobj', inicio)
+        if fim_obj < 0:
+            raise PdfNaoSuportado("Objeto sem 'endobj'.")
+
+        if stream and stream.start() < fim_obj:
+            dicionario = dados[inicio:stream.start()]
+            tamanho = _TAMANHO.search(dicionario)
+            if not tamanho:
+                raise PdfNaoSuportado("Stream sem /Length direto.")
+            comeco = stream.end()
+            conteudo = dados[comeco:comeco + int(tamanho.group(1))]
+            fim_obj = dados.find(b'endobj', comeco + len(conteudo))
+            yield int(casamento.group(1)), int(casamento.group(2)), (dicionario, conteudo)
+        else:
+            yield int(casamento.group(1)), int(casamento.group(2)), (dados[inicio:fim_obj], None)
+        posicao = fim_obj + len(b'endobj')
+
+
+def recomprimir_pdf(dados):
+    """
+    Reescreve um PDF gerado pelo ReportLab no formato compacto (streams
+    binários, Flate nível 9, imagens cinza em DeviceGray) e refaz a tabela
+    xref. O conteúdo visual não muda. Levanta PdfNaoSuportado para PDFs
+    com estrutura diferente.
+    """
+    if not dados.startswith(b'%PDF-'):
+        raise PdfNaoSuportado("Não é um arquivo PDF.")
+    trailer = _TRAILER.search(dados)
+    if not trailer:
+        raise PdfNaoSuportado("Trailer não encontrado.")
+
+    cabecalho = dados[:_OBJETO.search(dados).start()]
+    saida = bytearray(cabecalho)
+    deslocamentos = {}
+    for numero, geracao, (dicionario, conteudo) in _objetos(dados):
+        deslocamentos[numero] = (len(saida), geracao)
+        saida += b'%d %d obj\n' % (numero, geracao)
+        if conteudo is None:
+            saida += dicionario
+        else:
+            dicionario, conteudo = _recomprimir_stream(dicionario, conteudo)
+            saida += dicionario.rstrip() + b'\nstream\n' + conteudo + b'\nendstream\n'
+        saida += b'endobj\n'
+
+    if not deslocamentos:
+        raise PdfNaoSuportado("Nenhum objeto encontrado.")
+    total = max(deslocamentos) + 1
+    inicio_xref = len(saida)
+    saida += b'xref\n0 %d\n0000000000 65535 f \n' % total
+    for numero in range(1, total):
+        if numero in deslocamentos:
+            posicao, geracao = deslocamentos[numero]
+            saida += b'%010d %05d n \n' % (posicao, geracao)
+        else:
+            saida += b'0000000000 65535 f \n'
+    saida += b'trailer\n' + trailer.group(1) + b'\nstartxref\n%d\n%%%%EOF\n' % inicio_xref
+    return bytes(saida)
@@ -0,0 +1,12 @@
+"""
+Pools de processos do weka_adapter (fila de PDFs, backfill de reclassificação).
+"""
+
+import django
+from django.db import connections
+
+
+def inicializar_worker():
+    """Initializer do pool: garante o Django configurado e conexões próprias."""
+    django.setup()
+    connections.close_all()